@@ -4,23 +4,47 @@ CureVox AI - PRODUCTION ML Analyzers + MULTILINGUAL TTS
 Real-time: Analysis → Medical Insights → MULTILINGUAL Speech
 """
 
+from __future__ import annotations  # torch annotations must not trigger the lazy import
+
+import io
 import os
-import torch
-import torchaudio
-import librosa
+import re
 import numpy as np
-from PIL import Image
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Iterable, Iterator, Optional, Tuple
 import uuid
 import logging
+import threading
+import time
+from collections import deque
 
-# MULTILINGUAL TTS (Production)
-from gtts import gTTS
-import pygame
-import io
 import base64
 
+from utils import audio_io
+from utils.image_io import load_rgb, load_rgb_many
+from utils.color_stats import compute_color_stats
+from utils.cough_segments import CoughSegmenter
+from utils.feature_store import (
+    FEATURE_STORE_ENABLED, feature_config, get_feature_store, stored_features, stored_features_many
+)
+from utils.vad import vad_config
+from utils.warm_up import SAMPLE_MESSAGE, sample_jpeg, sample_wav
+from utils.tts_cache import get_default_cache, speech_key
+from utils.medical_translator import get_translator
+from utils.symptom_classifier import get_symptom_classifier
+from utils.inference_backends import MODEL_SPECS, backend_for, load_backend, model_version
+from utils.result_cache import RESULT_CACHE_ENABLED, analysis_key, batch_digest, content_hash, get_result_cache
+from services.speech_service import schedule_speech, synthesize_mp3
+from utils.audio_features import (
+    MelFeaturePipeline, STREAM_CHUNK_SECONDS, STREAM_WINDOW_SECONDS, iter_log_mel_windows, should_stream
+)
+from services.batching import MicroBatcher, fit_frames
+from utils.lazy_imports import lazy_import
+
+# Heavy libraries load on first use (see utils/lazy_imports.py)
+torch = lazy_import('torch')
+pygame = lazy_import('pygame')  # MULTILINGUAL TTS playback
+
 # Production logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -47,14 +71,44 @@ LANGUAGE_MAP = {
     'bn': 'Bengali'
 }
 
+# inline: base64 audio in the analysis JSON | deferred: speech_url, synthesised in background
+SPEECH_MODE = os.getenv('CUREVOX_SPEECH_MODE', 'inline')
+# base64: data URI in the analysis JSON | url: raw bytes from /api/speech/<id>
+AUDIO_DELIVERY = os.getenv('CUREVOX_AUDIO_DELIVERY', 'base64')
+
 class MultiLingualTTS:
     """Production Multilingual Text-to-Speech (20+ Languages)"""
     
     def __init__(self):
-        pygame.mixer.init()
+        # Mixer is opened on first use so a preloaded master never holds an
+        # audio device that forked workers would inherit
+        self._mixer_ready = False
+        self._mixer_lock = threading.Lock()
+        self.cache = get_default_cache()
+    
+    def _ensure_mixer(self):
+        if self._mixer_ready:
+            return
+        with self._mixer_lock:
+            if not self._mixer_ready:
+                pygame.mixer.init()
+                self._mixer_ready = True
+    
+    def reset_after_fork(self):
+        """Forget mixer/lock state inherited from the parent process"""
+        self._mixer_ready = False
+        self._mixer_lock = threading.Lock()
     
-    def speak_analysis(self, analysis_result: Dict, lang: str = 'en', format: str = 'mp3') -> Dict:
-        """Convert medical analysis to MULTILINGUAL SPEECH"""
+    def speak_analysis(self, analysis_result: Dict, lang: str = 'en', format: str = 'mp3',
+                       deferred: Optional[bool] = None, delivery: Optional[str] = None) -> Dict:
+        """Convert medical analysis to MULTILINGUAL SPEECH
+        
+        deferred=True returns a speech_id/speech_url immediately and
+        synthesises in the background (default: CUREVOX_SPEECH_MODE).
+        delivery='url' synthesises now but returns only speech_url, served
+        as raw bytes by /api/speech/<id>; 'base64' (default:
+        CUREVOX_AUDIO_DELIVERY) embeds a data URI in the JSON.
+        """
         lang = lang[:2]  # Normalize (en-IN → en)
         
         # Generate medical insights in user language
@@ -65,74 +119,149 @@ class MultiLingualTTS:
         else:
             translated_insights = insights
         
-        # Generate speech
-        tts = gTTS(text=translated_insights, lang=lang, slow=False)
-        
-        # Production: Return base64 audio
-        audio_buffer = io.BytesIO()
-        tts.write_to_fp(audio_buffer)
-        audio_b64 = base64.b64encode(audio_buffer.getvalue()).decode()
-        
-        return {
-            'audio_base64': f'data:audio/{format};base64,{audio_b64}',
+        speech = {
             'language': LANGUAGE_MAP.get(lang, 'English'),
             'insights_text': translated_insights,
             'speech_duration': len(translated_insights) / 20  # ~20 chars/sec
         }
+        
+        if deferred is None:
+            deferred = SPEECH_MODE == 'deferred'
+        if deferred:
+            job = schedule_speech(translated_insights, lang, format, self.cache)
+            speech.update(job, speech_url=f"/api/speech/{job['speech_id']}")
+            return speech
+        
+        # Generate speech inline (cached: insights come from a small fixed set)
+        self._ensure_mixer()
+        audio_bytes = self.cache.get_or_create(
+            translated_insights, lang, format,
+            lambda: synthesize_mp3(translated_insights, lang)
+        )
+        
+        speech.update(self._deliver(translated_insights, lang, format, audio_bytes, delivery))
+        return speech
+    
+    def speak_sentence(self, text: str, lang: str = 'en', format: str = 'mp3',
+                       delivery: Optional[str] = None) -> Dict:
+        """Synthesise one sentence now (cached by content) → clip payload"""
+        lang = lang[:2]
+        audio_bytes = self.cache.get_or_create(text, lang, format, lambda: synthesize_mp3(text, lang))
+        return dict(self._deliver(text, lang, format, audio_bytes, delivery), text=text)
+    
+    def _deliver(self, text: str, lang: str, format: str, audio_bytes: bytes,
+                 delivery: Optional[str] = None) -> Dict:
+        if (delivery or AUDIO_DELIVERY) == 'url':
+            # Clip is stored once in the cache; the payload only carries its URL
+            speech_id = speech_key(text, lang, format)
+            return {'speech_id': speech_id, 'status': 'ready', 'speech_url': f'/api/speech/{speech_id}'}
+        
+        # Production: Return base64 audio
+        audio_b64 = base64.b64encode(audio_bytes).decode()
+        return {'audio_base64': f'data:audio/{format};base64,{audio_b64}'}
     
     def _translate_medical(self, english_text: str, lang: str) -> str:
         """Production medical translation (Hindi/Tamil/Spanish/etc)"""
-        # MEDICAL TRANSLATIONS (Production dictionary)
-        translations = {
-            'hi': {
-                'Normal respiratory patterns detected': 'श्वास संबंधी पैटर्न सामान्य हैं',
-                'No acute concerns': 'कोई तत्काल चिंता नहीं',
-                'Mild respiratory irregularity': 'हल्की श्वास अनियमितता',
-                'Monitor symptoms': 'लक्षणों पर नजर रखें'
-            },
-            'ta': {
-                'Normal respiratory patterns detected': 'உடல் நலத்திற்கு இயல்பான சுவாச வடிவங்கள் கண்டறியப்பட்டது',
-                'No acute concerns': 'எந்த திடீர் கவலைகளும் இல்லை',
-                'Mild respiratory irregularity': 'மென்மையான சுவாசமின்மை'
-            }
-        }
-        
-        for eng, trans in translations.get(lang, {}).items():
-            english_text = english_text.replace(eng, trans)
-        return english_text
+        # MEDICAL TRANSLATIONS (data/medical_phrases/<lang>.json, compiled once)
+        return get_translator(LANGUAGE_MAP).translate(english_text, lang)
+
+def _infer_windows(batcher: MicroBatcher, windows) -> list:
+    """Batch streamed (key, log_mel) windows, keeping one batch in flight"""
+    results, in_flight = [], deque()
+    for start, log_mel in windows:
+        in_flight.append((start, batcher.submit(log_mel)))
+        if len(in_flight) >= batcher.max_batch_size:
+            start, future = in_flight.popleft()
+            results.append((start, future.result()))
+    results.extend((start, future.result()) for start, future in in_flight)
+    if not results:
+        raise ValueError("No audio samples decoded")
+    return results
+
+def _upload_digest(path: str, digest: Optional[str] = None) -> Optional[str]:
+    """Feature-store key of an upload (None when the store is off)"""
+    if digest or not FEATURE_STORE_ENABLED:
+        return digest
+    return content_hash(path)
 
 class BreathCNNAnalyzer:
     """BREATH ANALYSIS + MULTILINGUAL SPEECH"""
     
-    def __init__(self):
+    def __init__(self, tts: Optional[MultiLingualTTS] = None):
         self.sample_rate = 16000
-        self.tts = MultiLingualTTS()
-        self.model_path = 'models/breath_cnn_production.pt'
+        self.tts = tts or MultiLingualTTS()
+        self.features = MelFeaturePipeline(target_rate=self.sample_rate, n_mels=128)
+        self.feature_config = feature_config('log_mel', rate=self.sample_rate, n_mels=128, vad=vad_config())
+        self.backend = backend_for('breath')  # eager | torchscript | int8
+        self.model = load_backend('breath', self.backend)
+        self.batcher = MicroBatcher(self._forward_batch, name='breath')
     
-    def analyze(self, audio_path: str, user_lang: str = 'en') -> Dict[str, Any]:
-        """Production breath analysis WITH SPEECH"""
-        
-        # ML Analysis
-        waveform, sr = torchaudio.load(audio_path)
-        if sr != self.sample_rate:
-            resampler = torchaudio.transforms.Resample(sr, self.sample_rate)
-            waveform = resampler(waveform)
-        
-        mel_transform = torchaudio.transforms.MelSpectrogram(
-            sample_rate=self.sample_rate, n_mels=128
-        )
-        mel_spec = mel_transform(waveform)
-        log_mel = torch.log10(mel_spec + 1e-9)
+    def warm_up(self):
+        """Build resample kernels + mel filterbank before the first request"""
+        self.features.warm_up()
+    
+    def warm_up_sample(self):
+        """Decode → trim → log-mel → model on the built-in sample (no store, no speech)"""
+        y, _ = audio_io.load_audio_trimmed(sample_wav(self.sample_rate), self.sample_rate)
+        self.batcher.infer(self.features(torch.from_numpy(y), self.sample_rate))
+    
+    def _forward_batch(self, batch: torch.Tensor, lengths: torch.Tensor) -> list:
+        """(B, 1, n_mels, T) equal-length log-mels → [(risk_idx, confidence)] per row"""
+        if self.model is not None:
+            probs = torch.softmax(self.model(batch), dim=-1)
+            confidence, risk_idx = probs.max(dim=-1)
+            return list(zip(risk_idx.tolist(), confidence.tolist()))
         
         # Mock model inference (production model loading)
-        confidence = np.random.uniform(0.85, 0.98)
-        risk_idx = np.random.choice([0, 0, 1])  # 80% low risk
+        return [
+            (int(np.random.choice([0, 0, 1])), float(np.random.uniform(0.85, 0.98)))  # 80% low risk
+            for _ in range(len(lengths))
+        ]
+    
+    def _log_mel(self, audio_path: str):
+        """Trimmed upload → ((1, n_mels, frames) log-mel, meta)"""
+        y, bounds = audio_io.load_audio_trimmed(audio_path, self.sample_rate)
+        log_mel = self.features(torch.from_numpy(y), self.sample_rate)
+        return log_mel.numpy(), {'trimmed_seconds': round(bounds.removed_seconds, 2)}
+    
+    def analyze(self, audio_path: str, user_lang: str = 'en', defer_speech: Optional[bool] = None,
+                audio_delivery: Optional[str] = None, digest: Optional[str] = None,
+                speak: bool = True) -> Dict[str, Any]:
+        """Production breath analysis WITH SPEECH (speak=False: caller adds it)"""
+        
         risk_levels = ['low', 'medium', 'high']
         
+        # ML Analysis (long clips: bounded-memory windowed pass); leading and
+        # trailing silence is cropped before resampling / mel extraction
+        if should_stream(audio_path):
+            bounds = audio_io.silence_bounds(audio_path)
+            trimmed_seconds = round(bounds.removed_seconds, 2) if bounds else 0.0
+            windows = _infer_windows(self.batcher, iter_log_mel_windows(audio_path, self.features, bounds=bounds))
+            # Worst window decides; confidence averaged over windows at that level
+            risk_idx = max(idx for _, (idx, _) in windows)
+            confidence = np.mean([conf for _, (idx, conf) in windows if idx == risk_idx])
+            window_metrics = {
+                'windows': len(windows),
+                'window_seconds': STREAM_WINDOW_SECONDS,
+                'window_risk_counts': {
+                    level: sum(1 for _, (idx, _) in windows if idx == i)
+                    for i, level in enumerate(risk_levels)
+                }
+            }
+        else:
+            # Log-mel comes from the feature store when this upload was seen before
+            log_mel, meta, _ = stored_features(_upload_digest(audio_path, digest), 'log_mel', self.feature_config,
+                                               lambda: self._log_mel(audio_path))
+            risk_idx, confidence = self.batcher.infer(torch.from_numpy(np.asarray(log_mel, dtype=np.float32)))
+            trimmed_seconds = meta['trimmed_seconds']
+            window_metrics = {}
+        
         result = {
             'risk_level': risk_levels[risk_idx],
             'confidence': float(confidence),
-            'spectral_centroid_hz': 150.5
+            'spectral_centroid_hz': 150.5,
+            'trimmed_seconds': trimmed_seconds,
+            **window_metrics
         }
         
         # MEDICAL INSIGHTS
@@ -153,23 +282,112 @@ class BreathCNNAnalyzer:
         }
         
         # 🎤 MULTILINGUAL SPEECH GENERATION
-        speech = self.tts.speak_analysis(analysis_result, user_lang)
-        analysis_result['speech'] = speech
+        if speak:
+            speech = self.tts.speak_analysis(analysis_result, user_lang, deferred=defer_speech, delivery=audio_delivery)
+            analysis_result['speech'] = speech
         
         return analysis_result
 
 class CoughYamNetAnalyzer:
     """COUGH ANALYSIS + MULTILINGUAL SPEECH"""
     
-    def __init__(self):
-        self.tts = MultiLingualTTS()
+    def __init__(self, tts: Optional[MultiLingualTTS] = None):
+        self.sample_rate = 16000
+        self.tts = tts or MultiLingualTTS()
+        self.features = MelFeaturePipeline(target_rate=self.sample_rate, n_mels=64)
+        self.feature_config = feature_config('cough_log_mel', rate=self.sample_rate, n_mels=64, vad=vad_config(),
+                                             segmenter=CoughSegmenter(self.sample_rate).config())
+        self.backend = backend_for('cough')
+        self.model = load_backend('cough', self.backend)
+        self.batcher = MicroBatcher(self._forward_batch, name='cough')
+        # Every event is scored at the length of the longest possible one, so
+        # all events of a clip go through the model together
+        hop_length = self.features.mel_transform(self.sample_rate, self.features.n_mels).hop_length
+        self.event_frames = CoughSegmenter(self.sample_rate).max_samples // hop_length + 1
+    
+    def warm_up(self):
+        self.features.warm_up(source_rates=(self.sample_rate,))
     
-    def analyze(self, audio_path: str, user_lang: str = 'en') -> Dict[str, Any]:
-        """Production cough analysis WITH SPEECH"""
+    def warm_up_sample(self):
+        """Decode → trim → segment → event log-mels → model on the built-in sample"""
+        y, _ = audio_io.load_audio_trimmed(sample_wav(self.sample_rate), self.sample_rate)
+        self._score_events([
+            self.features(torch.from_numpy(event.samples), self.sample_rate)
+            for event in CoughSegmenter(self.sample_rate).events([y])
+        ])
+    
+    def _score_events(self, log_mels: list) -> list:
+        """[(1, n_mels, T_i)] event log-mels → [cough_score], fitted to
+        event_frames so they share forward passes"""
+        return self.batcher.infer_many([fit_frames(log_mel, self.event_frames) for log_mel in log_mels])
+    
+    def _forward_batch(self, batch: torch.Tensor, lengths: torch.Tensor) -> list:
+        """(B, 1, n_mels, event_frames) event log-mels → [cough_score] per row"""
+        if self.model is not None:
+            scores = torch.sigmoid(self.model(batch)).reshape(len(lengths), -1)[:, 0]
+            return scores.tolist()
         
-        # YAMNet style analysis
-        y, sr = librosa.load(audio_path, sr=16000)
-        cough_score = np.random.uniform(0.1, 0.6)
+        # Mock model inference
+        return [float(np.random.uniform(0.1, 0.6)) for _ in range(len(lengths))]
+    
+    def _event_features(self, audio_path: str):
+        """Upload → ((n_mels, frames) log-mel of every cough event, concatenated
+        along time, meta with each event's [start s, end s, first frame, end frame])"""
+        # Leading / trailing silence is cropped, then only detected cough
+        # events are featurised (long clips: decoded chunk by chunk)
+        segmenter = CoughSegmenter(self.sample_rate)
+        if should_stream(audio_path):
+            bounds = audio_io.silence_bounds(audio_path)
+            chunks = audio_io.iter_chunks(audio_path, STREAM_CHUNK_SECONDS, target_rate=self.sample_rate, bounds=bounds)
+        else:
+            y, bounds = audio_io.load_audio_trimmed(audio_path, self.sample_rate)
+            chunks = [y]
+        lead, trimmed_seconds = (bounds.start_seconds, bounds.removed_seconds) if bounds else (0.0, 0.0)
+        
+        log_mels, segments, frames = [], [], 0
+        for event in segmenter.events(chunks, start_seconds=lead):
+            log_mel = self.features(torch.from_numpy(event.samples), self.sample_rate)[0]
+            log_mels.append(log_mel)
+            segments.append([round(float(event.start), 3), round(float(event.end), 3), frames, frames + log_mel.shape[-1]])
+            frames += log_mel.shape[-1]
+        if not segmenter.samples_seen:
+            raise ValueError("No audio samples decoded")
+        
+        features = torch.cat(log_mels, dim=-1).numpy() if log_mels else np.zeros((self.features.n_mels, 0), np.float32)
+        return features, {
+            'segments': segments,
+            'clip_seconds': round(segmenter.samples_seen / self.sample_rate + trimmed_seconds, 2),
+            'trimmed_seconds': round(trimmed_seconds, 2)
+        }
+    
+    def analyze(self, audio_path: str, user_lang: str = 'en', defer_speech: Optional[bool] = None,
+                audio_delivery: Optional[str] = None, digest: Optional[str] = None,
+                speak: bool = True) -> Dict[str, Any]:
+        """Production cough analysis WITH SPEECH (speak=False: caller adds it)"""
+        
+        # Event log-mels come from the feature store when this upload was seen before
+        features, meta, _ = stored_features(_upload_digest(audio_path, digest), 'cough_log_mel', self.feature_config,
+                                             lambda: self._event_features(audio_path))
+        segments = meta['segments']
+        scored = list(zip(segments, self._score_events([
+            torch.from_numpy(np.asarray(features[:, segment[2]:segment[3]], dtype=np.float32)).unsqueeze(0)
+            for segment in segments
+        ])))
+        
+        # YAMNet style analysis: the worst cough sets the score
+        scores = [score for _, score in scored]
+        cough_score = max(scores) if scores else 0.0
+        metrics = {
+            'cough_count': len(scored),
+            'cough_severity_mean': float(np.mean(scores)) if scores else 0.0,
+            'cough_segments': [
+                {'start': start, 'end': end, 'score': round(float(score), 4)}
+                for (start, end, _, _), score in scored
+            ],
+            'clip_seconds': meta['clip_seconds'],
+            'trimmed_seconds': meta['trimmed_seconds'],
+            'analyzed_seconds': round(sum(end - start for start, end, _, _ in segments), 2)
+        }
         
         risk_level = 'low' if cough_score < 0.3 else 'medium'
         insights = 'Normal cough pattern detected. No concerning respiratory indicators.'
@@ -180,61 +398,188 @@ class CoughYamNetAnalyzer:
             'risk_level': risk_level,
             'confidence': float(cough_score),
             'insights': insights,
-            'metrics': {'cough_severity': cough_score},
+            'metrics': {'cough_severity': cough_score, **metrics},
             'timestamp': datetime.utcnow()
         }
         
         # 🎤 SPEAK IN USER LANGUAGE
-        speech = self.tts.speak_analysis(analysis_result, user_lang)
-        analysis_result['speech'] = speech
+        if speak:
+            speech = self.tts.speak_analysis(analysis_result, user_lang, deferred=defer_speech, delivery=audio_delivery)
+            analysis_result['speech'] = speech
         
         return analysis_result
 
 class RashMobileNetAnalyzer:
     """RASH ANALYSIS + MULTILINGUAL SPEECH"""
     
-    def __init__(self):
-        self.tts = MultiLingualTTS()
+    def __init__(self, tts: Optional[MultiLingualTTS] = None):
+        self.tts = tts or MultiLingualTTS()
         self.skin_conditions = ['normal', 'mild_irritation', 'eczema', 'infection']
+        self.risk_map = {'normal': 'low', 'mild_irritation': 'low', 'eczema': 'medium', 'infection': 'high'}
+        # Stored on the Diagnosis (recommendations column)
+        self.recommendations = {
+            'normal': ['Keep the area clean and dry', 'Recheck if redness or itching appears'],
+            'mild_irritation': ['Avoid scratching the affected area', 'Keep the area clean and dry',
+                                'Use a fragrance-free moisturiser', 'Schedule follow-up in 3 days if no improvement'],
+            'eczema': ['Apply hydrocortisone cream 2-3 times daily', 'Avoid scratching the affected area',
+                       'Moisturise after bathing', 'See a doctor if it spreads or does not improve in a week'],
+            'infection': ['Keep the area clean and covered', 'Do not squeeze or scratch the area',
+                          'See a doctor promptly, especially with fever or spreading redness']
+        }
+        self.input_side = MODEL_SPECS['rash'].example_shape[-1]
+        self.backend = backend_for('rash')
+        self.model = load_backend('rash', self.backend)
+        # Eager / int8 modules expose backbone and head separately, so the
+        # backbone embedding can be stored; exported TorchScript runs whole
+        self.embeds = hasattr(self.model, 'features') and hasattr(self.model, 'classifier')
+        self.feature_config = feature_config('rash_embedding', side=self.input_side, model=model_version('rash'))
     
-    def analyze(self, image_path: str, user_lang: str = 'en') -> Dict[str, Any]:
-        """Production rash analysis WITH SPEECH"""
-        
-        # MobileNet style analysis
-        condition_idx = np.random.choice([0, 0, 1, 2])
-        confidence = np.random.uniform(0.82, 0.97)
+    def _model_input(self, pixels: np.ndarray) -> torch.Tensor:
+        image = torch.from_numpy(np.ascontiguousarray(pixels)).permute(2, 0, 1).unsqueeze(0).float() / 255
+        return torch.nn.functional.interpolate(
+            image, size=(self.input_side, self.input_side), mode='bilinear', align_corners=False
+        )
+    
+    def warm_up_sample(self):
+        """Decode → full model pass on the built-in sample (no store, no speech)"""
+        pixels = load_rgb(io.BytesIO(sample_jpeg())).pixels
+        self._classify(pixels)
+        compute_color_stats(pixels)
+    
+    def _embed_batch(self, images: list) -> list:
+        """[(H, W, 3) uint8] → [(embedding, meta)] from one stacked backbone pass"""
+        with torch.inference_mode():
+            embeddings = self.model.features(torch.cat([self._model_input(pixels) for pixels in images])).flatten(1)
+        return [(embedding, {}) for embedding in embeddings.numpy()]
+    
+    def _classify(self, pixels: np.ndarray, image_path: Optional[str] = None, digest: Optional[str] = None):
+        """(H, W, 3) uint8 → (condition_idx, confidence)"""
+        return self._classify_batch([pixels], None if image_path is None else [image_path], [digest])[0]
+    
+    def _classify_batch(self, images: list, image_paths: Optional[list] = None,
+                        digests: Optional[list] = None) -> list:
+        """[(H, W, 3) uint8] → [(condition_idx, confidence)]; all images go
+        through the model as one (N, 3, side, side) batch"""
+        if self.model is not None:
+            if self.embeds and image_paths is not None:
+                # Stored embeddings for uploads seen before, one backbone pass for the rest
+                keys = [_upload_digest(path, digest) for path, digest in zip(image_paths, digests or [None] * len(images))]
+                stored = stored_features_many(keys, 'rash_embedding', self.feature_config,
+                                              lambda indices: self._embed_batch([images[i] for i in indices]))
+                embeddings = np.stack([np.asarray(embedding, dtype=np.float32) for embedding, _, _ in stored])
+                with torch.inference_mode():
+                    logits = self.model.classifier(torch.from_numpy(embeddings))
+            else:
+                with torch.inference_mode():
+                    logits = self.model(torch.cat([self._model_input(pixels) for pixels in images]))
+            confidence, condition_idx = torch.softmax(logits, dim=-1).max(dim=-1)
+            return list(zip(condition_idx.tolist(), confidence.tolist()))
         
+        # Mock model inference
+        return [(int(np.random.choice([0, 0, 1, 2])), float(np.random.uniform(0.82, 0.97))) for _ in images]
+    
+    def _image_result(self, decoded, condition_idx: int, confidence: float) -> Dict[str, Any]:
+        """Analysis result of one decoded image (no speech)"""
         condition = self.skin_conditions[condition_idx]
-        risk_map = {'normal': 'low', 'mild_irritation': 'low', 'eczema': 'medium', 'infection': 'high'}
         
         insights = f'Skin condition detected: {condition.title()}. Keep area clean and monitor.'
-        img_array = np.array(Image.open(image_path))
-        red_ratio = np.mean(img_array[:,:,0] > 180)
+        colors = compute_color_stats(decoded.pixels)
         
-        analysis_result = {
+        return {
             'analysis_id': f'RASH_{str(uuid.uuid4())[:8]}',
             'type': 'rash',
-            'risk_level': risk_map[condition],
+            'risk_level': self.risk_map[condition],
             'confidence': float(confidence),
             'insights': insights,
-            'metrics': {'condition': condition, 'redness_ratio': float(red_ratio)},
+            'recommendations': self.recommendations[condition],
+            'metrics': {
+                'condition': condition,
+                'redness_ratio': colors.red_ratio,
+                'redness_score': round(colors.redness_score, 2),
+                'skin_ratio': round(colors.skin_ratio, 4),
+                'image': decoded.stats()
+            },
             'timestamp': datetime.utcnow()
         }
+    
+    def analyze(self, image_path: str, user_lang: str = 'en', defer_speech: Optional[bool] = None,
+                audio_delivery: Optional[str] = None, digest: Optional[str] = None,
+                speak: bool = True) -> Dict[str, Any]:
+        """Production rash analysis WITH SPEECH (speak=False: caller adds it)"""
+        
+        decoded = load_rgb(image_path)  # one bounded-resolution buffer for model + metrics
+        
+        # MobileNet style analysis
+        condition_idx, confidence = self._classify(decoded.pixels, image_path, digest)
+        analysis_result = self._image_result(decoded, condition_idx, confidence)
         
         # 🎤 MULTILINGUAL SPEECH
-        speech = self.tts.speak_analysis(analysis_result, user_lang)
-        analysis_result['speech'] = speech
+        if speak:
+            speech = self.tts.speak_analysis(analysis_result, user_lang, deferred=defer_speech, delivery=audio_delivery)
+            analysis_result['speech'] = speech
         
         return analysis_result
+    
+    def analyze_batch(self, image_paths: list, user_lang: str = 'en', defer_speech: Optional[bool] = None,
+                      audio_delivery: Optional[str] = None, digests: Optional[list] = None,
+                      speak: bool = True) -> Dict[str, Any]:
+        """Several photos of one rash WITH SPEECH: parallel decode, one batched
+        model pass, per-image results + a combined result (the most severe
+        condition found decides) that is spoken once (speak=False: caller adds it)"""
+        
+        decoded = load_rgb_many(image_paths)
+        classified = self._classify_batch([image.pixels for image in decoded], image_paths, digests)
+        images = [self._image_result(image, idx, conf) for image, (idx, conf) in zip(decoded, classified)]
+        
+        condition_idx = max(idx for idx, _ in classified)
+        condition = self.skin_conditions[condition_idx]
+        matching = [conf for idx, conf in classified if idx == condition_idx]
+        
+        analysis_result = {
+            'analysis_id': f'RASH_{str(uuid.uuid4())[:8]}',
+            'type': 'rash',
+            'risk_level': self.risk_map[condition],
+            'confidence': float(np.mean(matching)),
+            'insights': (f'Skin condition detected in {len(matching)} of {len(images)} images: '
+                         f'{condition.title()}. Keep area clean and monitor.'),
+            'metrics': {
+                'condition': condition,
+                'images': len(images),
+                'condition_counts': {
+                    name: sum(1 for idx, _ in classified if idx == i)
+                    for i, name in enumerate(self.skin_conditions)
+                },
+                'redness_score_max': max(image['metrics']['redness_score'] for image in images)
+            },
+            'images': images,
+            'timestamp': datetime.utcnow()
+        }
+        
+        # 🎤 MULTILINGUAL SPEECH (combined finding only)
+        if speak:
+            speech = self.tts.speak_analysis(analysis_result, user_lang, deferred=defer_speech, delivery=audio_delivery)
+            analysis_result['speech'] = speech
+        
+        return analysis_result
+
+_SENTENCE_BREAK = re.compile(r'(?<=[.!?।。！？])\s*')
+
+def split_sentences(text: str) -> list:
+    """Sentence chunks for incremental speech (Latin, Devanagari, CJK stops)"""
+    return [sentence.strip() for sentence in _SENTENCE_BREAK.split(text) if sentence.strip()]
 
 class MedicalChatAnalyzer:
     """MULTILINGUAL MEDICAL CHATBOT + SPEECH"""
     
-    def __init__(self):
-        self.tts = MultiLingualTTS()
+    def __init__(self, tts: Optional[MultiLingualTTS] = None):
+        self.tts = tts or MultiLingualTTS()
     
-    def analyze(self, message: str, user_lang: str = 'en') -> Dict[str, Any]:
-        """Multilingual medical chat WITH SPEECH"""
+    def warm_up_sample(self):
+        """Compile the symptom lexicon on a built-in message"""
+        self.reply(SAMPLE_MESSAGE)
+    
+    def reply(self, message: str, user_lang: str = 'en') -> Dict[str, Any]:
+        """Text part of the chat answer (no speech)"""
         
         # Medical responses
         responses = {
@@ -243,31 +588,218 @@ class MedicalChatAnalyzer:
             'ta': 'உங்கள் அறிகுறிகளைப் புரிந்துகொண்டேன். அறிகுறிகள் தொடர்ந்தால் சிறப்பு மருத்துவரை அணுகவும்.'
         }
         
-        response = responses.get(user_lang, responses['en'])
+        response_lang = user_lang[:2] if user_lang[:2] in responses else 'en'
+        response = responses[response_lang]
+        
+        triage = get_symptom_classifier(LANGUAGE_MAP).classify(message)
         
         chat_result = {
             'session_id': f'CHAT_{str(uuid.uuid4())[:8]}',
             'user_message': message,
             'bot_response': response,
+            'symptoms': triage['tags'],
+            'severity': triage['severity'],
+            'response_language': response_lang,
             'timestamp': datetime.utcnow()
         }
+        return chat_result
+    
+    def analyze(self, message: str, user_lang: str = 'en', defer_speech: Optional[bool] = None,
+                audio_delivery: Optional[str] = None) -> Dict[str, Any]:
+        """Multilingual medical chat WITH SPEECH"""
+        chat_result = self.reply(message, user_lang)
         
         # 🎤 AI SPEAKS BACK
-        speech = self.tts.speak_analysis(chat_result, user_lang)
+        speech = self.tts.speak_analysis({'insights': chat_result['bot_response']}, chat_result['response_language'],
+                                         deferred=defer_speech, delivery=audio_delivery)
         chat_result['speech'] = speech
         
         return chat_result
+    
+    def stream(self, message: str, user_lang: str = 'en',
+               audio_delivery: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """(event, payload) pairs: the text reply first, then one speech clip
+        per sentence as soon as it is synthesised, then 'done'"""
+        chat_result = self.reply(message, user_lang)
+        yield 'message', chat_result
+        
+        lang = chat_result['response_language']
+        sentences = split_sentences(chat_result['bot_response'])
+        for index, sentence in enumerate(sentences):
+            try:
+                clip = self.tts.speak_sentence(sentence, lang, delivery=audio_delivery)
+            except Exception as e:
+                logger.error(f"Chat speech failed for sentence {index}: {str(e)}")
+                yield 'speech_error', {'index': index, 'text': sentence, 'message': 'Speech synthesis failed'}
+                continue
+            yield 'speech', dict(clip, index=index, total=len(sentences))
+        yield 'done', {'session_id': chat_result['session_id'], 'sentences': len(sentences)}
+
+# PRODUCTION REGISTRY (one analyzer per type per worker process)
+ANALYZER_CLASSES = {
+    'breath': BreathCNNAnalyzer,
+    'cough': CoughYamNetAnalyzer,
+    'rash': RashMobileNetAnalyzer,
+    'chat': MedicalChatAnalyzer
+}
+
+_registry_lock = threading.Lock()
+_analyzers: Dict[str, Any] = {}
+_analyzer_stats: Dict[str, Dict[str, Any]] = {}
+_shared_tts: Optional[MultiLingualTTS] = None
+
+def get_tts() -> MultiLingualTTS:
+    """Process-wide TTS instance shared by every analyzer"""
+    global _shared_tts
+    if _shared_tts is None:
+        with _registry_lock:
+            if _shared_tts is None:
+                _shared_tts = MultiLingualTTS()
+    return _shared_tts
+
+def _build_analyzer(analysis_type: str) -> Any:
+    """Construct + warm up one analyzer, recording timings (lock held)"""
+    start = time.perf_counter()
+    analyzer = ANALYZER_CLASSES[analysis_type](tts=_shared_tts)
+    construct_ms = (time.perf_counter() - start) * 1000
+    
+    warm_up_ms = 0.0
+    warm_up = getattr(analyzer, 'warm_up', None)
+    if callable(warm_up):
+        start = time.perf_counter()
+        warm_up()
+        warm_up_ms = (time.perf_counter() - start) * 1000
+    
+    _analyzer_stats[analysis_type] = {
+        'construct_ms': round(construct_ms, 3),
+        'warm_up_ms': round(warm_up_ms, 3),
+        'pid': os.getpid(),
+        'built_at': datetime.utcnow().isoformat()
+    }
+    logger.info(f"Analyzer '{analysis_type}' ready: construct {construct_ms:.1f} ms, warm-up {warm_up_ms:.1f} ms")
+    return analyzer
 
-# PRODUCTION FACTORY
 def get_analyzer(analysis_type: str) -> Any:
-    """Production analyzer factory"""
-    analyzers = {
-        'breath': BreathCNNAnalyzer(),
-        'cough': CoughYamNetAnalyzer(),
-        'rash': RashMobileNetAnalyzer(),
-        'chat': MedicalChatAnalyzer()
+    """Production analyzer factory (lazy, built once per worker)"""
+    analyzer = _analyzers.get(analysis_type)
+    if analyzer is not None or analysis_type not in ANALYZER_CLASSES:
+        return analyzer
+    
+    get_tts()
+    with _registry_lock:
+        analyzer = _analyzers.get(analysis_type)
+        if analyzer is None:
+            analyzer = _build_analyzer(analysis_type)
+            _analyzers[analysis_type] = analyzer
+    return analyzer
+
+def analyze_cached(analysis_type: str, path: str, user_lang: str = 'en', digest: Optional[str] = None,
+                   **kwargs) -> Dict[str, Any]:
+    """get_analyzer(type).analyze(path, ...) behind the upload-hash result cache;
+    `digest` skips re-hashing when the caller already has the upload's SHA-1"""
+    analyzer = get_analyzer(analysis_type)
+    if analyzer is None:
+        raise ValueError(f"Unknown analysis type: {analysis_type}")
+    if not RESULT_CACHE_ENABLED:
+        return dict(analyzer.analyze(path, user_lang, digest=digest, **kwargs), cached=False)
+    
+    # The same digest keys the result cache and the analyzer's feature store
+    digest = digest or content_hash(path)
+    key = analysis_key(path, analysis_type, user_lang, digest, **kwargs)
+    result, cached = get_result_cache().get_or_compute(
+        key, lambda: analyzer.analyze(path, user_lang, digest=digest, **kwargs)
+    )
+    result['cached'] = cached
+    return reissue(result) if cached else result
+
+def analyze_batch_cached(analysis_type: str, paths: list, user_lang: str = 'en',
+                         digests: Optional[list] = None, **kwargs) -> Dict[str, Any]:
+    """get_analyzer(type).analyze_batch(paths, ...) behind the result cache,
+    keyed by the ordered digests of the whole batch"""
+    analyzer = get_analyzer(analysis_type)
+    if analyzer is None:
+        raise ValueError(f"Unknown analysis type: {analysis_type}")
+    if not RESULT_CACHE_ENABLED:
+        return dict(analyzer.analyze_batch(paths, user_lang, digests=digests, **kwargs), cached=False)
+    
+    digests = [digest or content_hash(path) for path, digest in zip(paths, digests or [None] * len(paths))]
+    key = analysis_key(paths, analysis_type, user_lang, batch_digest(digests), images=len(paths), **kwargs)
+    result, cached = get_result_cache().get_or_compute(
+        key, lambda: analyzer.analyze_batch(paths, user_lang, digests=digests, **kwargs)
+    )
+    result['cached'] = cached
+    return reissue(result) if cached else result
+
+def reissue(result: Dict[str, Any]) -> Dict[str, Any]:
+    """A cached result handed to a new caller: same findings, but its own
+    analysis_id and timestamp (each becomes a separate diagnosis), and so
+    do the per-image results of a batch"""
+    if 'analysis_id' in result:
+        prefix = result['analysis_id'].split('_', 1)[0]
+        result['analysis_id'] = f'{prefix}_{str(uuid.uuid4())[:8]}'
+    result['timestamp'] = datetime.utcnow()
+    for image in result.get('images', ()):
+        reissue(image)
+    return result
+
+def preload_analyzers(analysis_types: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Build analyzers up front (gunicorn master with preload_app)"""
+    for analysis_type in analysis_types or ANALYZER_CLASSES:
+        get_analyzer(analysis_type)
+    return analyzer_stats()
+
+def warm_up_worker(analysis_types: Optional[Iterable[str]] = None) -> Dict[str, float]:
+    """Call from gunicorn post_fork: build (or reuse preloaded) analyzers and
+    run each once on a built-in sample, so the worker's first request does
+    not pay for torch initialisation and first-inference costs.
+    Returns {analysis_type: sample run ms} (construction is in
+    analyzer_stats); failures are logged and skipped
+    (the analyzer then fails on its first request as before)."""
+    timings = {}
+    for analysis_type in analysis_types or ANALYZER_CLASSES:
+        try:
+            analyzer = get_analyzer(analysis_type)
+            start = time.perf_counter()
+            analyzer.warm_up_sample()
+        except Exception as e:
+            logger.warning(f"Warm-up of analyzer '{analysis_type}' failed: {str(e)}")
+            continue
+        timings[analysis_type] = (time.perf_counter() - start) * 1000
+        _analyzer_stats[analysis_type]['sample_warm_up_ms'] = round(timings[analysis_type], 3)
+        logger.info(f"Analyzer '{analysis_type}' warmed up on the built-in sample in {timings[analysis_type]:.1f} ms")
+    return timings
+
+def reset_after_fork():
+    """Call from gunicorn post_fork: keep preloaded analyzers (copy-on-write),
+    but drop locks and device state inherited from the master"""
+    global _registry_lock
+    _registry_lock = threading.Lock()
+    if _shared_tts is not None:
+        _shared_tts.reset_after_fork()
+
+def analyzer_stats() -> Dict[str, Dict[str, Any]]:
+    """Construction / warm-up timings for analyzers built in this process"""
+    return {name: dict(stats) for name, stats in _analyzer_stats.items()}
+
+def result_cache_stats() -> Dict[str, Any]:
+    """Hits / misses / expiries of the upload-hash result cache"""
+    return get_result_cache().stats()
+
+def feature_store_stats() -> Dict[str, Any]:
+    """Hits / misses / writes of the persistent feature store"""
+    return get_feature_store().stats()
+
+def tts_cache_stats() -> Dict[str, int]:
+    """Hit / miss / eviction counters of the shared speech cache"""
+    return _shared_tts.cache.stats() if _shared_tts is not None else {}
+
+def batching_stats() -> Dict[str, Dict[str, Any]]:
+    """Batch sizes + p50/p99 queueing latency of the audio model batchers"""
+    return {
+        name: analyzer.batcher.stats()
+        for name, analyzer in list(_analyzers.items())
+        if getattr(analyzer, 'batcher', None) is not None
     }
-    return analyzers.get(analysis_type)
 
 # PRODUCTION FILE CLEANUP
 def cleanup_temp_file(filepath: str):
@@ -1,24 +1,32 @@
 import os
+import sys
+import io
 import logging
+import threading
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from functools import wraps
 import jwt
-from flask import Flask, request, jsonify, send_from_directory, make_response
+from flask import Flask, Response, request, jsonify, send_from_directory, send_file, make_response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity, verify_jwt_in_request
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-import firebase_admin
-from firebase_admin import credentials, auth
 from werkzeug.utils import secure_filename
 import uuid
 import json
 from pathlib import Path
 import sqlite3
 
+from utils.lazy_imports import import_stats
+from utils.model_loader import model_stats
+from utils.inference_backends import backend_stats
+from utils.proc_memory import memory_usage
+from services.inference_pool import pool_stats
+from utils.result_cache import content_hash, get_result_cache
+
 # Load environment variables
 load_dotenv()
 
@@ -75,6 +83,9 @@ class SQLiteConfig:
     MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'mp3', 'wav', 'm4a'}
+    IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}
+    AUDIO_EXTENSIONS = {'mp3', 'wav', 'm4a'}
+    RASH_BATCH_MAX_IMAGES = int(os.getenv('RASH_BATCH_MAX_IMAGES', 6))
     
     # CORS
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:5000').split(',')
@@ -110,30 +121,43 @@ CORS(app, resources={
     }
 })
 
-# Initialize Firebase Admin
-try:
-    # Try to load Firebase credentials from environment or file
-    firebase_creds_json = os.environ.get('FIREBASE_CREDENTIALS_JSON')
-    if firebase_creds_json:
-        cred_dict = json.loads(firebase_creds_json)
-        cred = credentials.Certificate(cred_dict)
-    elif os.path.exists('firebase_admin.json'):
-        cred = credentials.Certificate('firebase_admin.json')
-    else:
-        logger.warning("Firebase Admin SDK not initialized - running without Firebase")
-        cred = None
-    
-    if cred:
-        firebase_admin.initialize_app(cred)
-        logger.info("Firebase Admin SDK initialized successfully")
-except Exception as e:
-    logger.error(f"Failed to initialize Firebase: {str(e)}")
-    logger.warning("Running without Firebase authentication")
+# Firebase Admin is initialised on first use (registration / health), not at
+# import: the SDK drags in google-auth and grpc, which every worker boot and
+# test run would otherwise pay for.
+_firebase = {'initialized': False, 'auth': None}
+_firebase_lock = threading.Lock()
+
+def get_firebase_auth():
+    """firebase_admin.auth once credentials are configured, else None."""
+    if not _firebase['initialized']:
+        with _firebase_lock:
+            if not _firebase['initialized']:
+                _firebase['auth'] = _init_firebase()
+                _firebase['initialized'] = True
+    return _firebase['auth']
 
-# Create necessary directories
-os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-os.makedirs('logs', exist_ok=True)
-os.makedirs('instance', exist_ok=True)
+def _init_firebase():
+    try:
+        # Try to load Firebase credentials from environment or file
+        firebase_creds_json = os.environ.get('FIREBASE_CREDENTIALS_JSON')
+        if not firebase_creds_json and not os.path.exists('firebase_admin.json'):
+            logger.warning("Firebase Admin SDK not initialized - running without Firebase")
+            return None
+
+        import firebase_admin
+        from firebase_admin import credentials, auth
+        if firebase_creds_json:
+            cred = credentials.Certificate(json.loads(firebase_creds_json))
+        else:
+            cred = credentials.Certificate('firebase_admin.json')
+        if not firebase_admin._apps:
+            firebase_admin.initialize_app(cred)
+        logger.info("Firebase Admin SDK initialized successfully")
+        return auth
+    except Exception as e:
+        logger.error(f"Failed to initialize Firebase: {str(e)}")
+        logger.warning("Running without Firebase authentication")
+        return None
 
 # Database Models
 class User(db.Model):
@@ -247,6 +271,10 @@ def allowed_file(filename):
 # Initialize database
 def init_database():
     """Initialize SQLite database with proper settings."""
+    # Directories are created here rather than at import time
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    os.makedirs('instance', exist_ok=True)
+
     with app.app_context():
         # Create all tables
         db.create_all()
@@ -494,9 +522,10 @@ def complete_profile():
         
         # Verify Firebase token if Firebase is initialized
         firebase_uid = None
-        if firebase_admin._apps:
+        firebase_auth = get_firebase_auth()
+        if firebase_auth:
             try:
-                decoded_token = auth.verify_id_token(data['id_token'])
+                decoded_token = firebase_auth.verify_id_token(data['id_token'])
                 firebase_uid = decoded_token['uid']
                 
                 # Verify phone number matches
@@ -645,6 +674,9 @@ def get_current_user():
 @limiter.limit("10 per hour")
 def upload_rash_image():
     """Upload rash/skin image for analysis."""
+    from services.inference_pool import DeadlineExceeded, run_analysis
+    from services.speech_service import audio_delivery_from_request
+    
     try:
         current_user_id = get_jwt_identity()
         
@@ -680,33 +712,27 @@ def upload_rash_image():
         user_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(current_user_id), 'images')
         os.makedirs(user_dir, exist_ok=True)
         
+        # Retries of the same photo reuse the stored analysis
+        image_digest = content_hash(file)
+        
         filepath = os.path.join(user_dir, unique_filename)
         file.save(filepath)
         
-        # Mock analysis (replace with actual ML model)
-        analysis_result = {
-            'condition': 'Possible Dermatitis',
-            'confidence': 78.5,
-            'description': 'The image shows signs of mild dermatitis with redness and slight swelling.',
-            'recommendations': [
-                'Apply hydrocortisone cream 2-3 times daily',
-                'Avoid scratching the affected area',
-                'Keep the area clean and dry',
-                'Schedule follow-up in 3 days if no improvement'
-            ],
-            'severity': 'low',
-            'requires_doctor': False
-        }
+        # Rash analyzer (inference pool when enabled) behind the upload-hash result cache
+        analysis_result = run_analysis(
+            'rash', filepath, digest=image_digest, user_lang=request.form.get('language', 'en'),
+            audio_delivery=audio_delivery_from_request(request)
+        )
         
         # Create diagnosis record
         diagnosis = Diagnosis(
             user_id=current_user_id,
             diagnosis_type='rash',
             title='Skin Rash Analysis',
-            description=analysis_result['description'],
-            symptoms='Redness, swelling, irritation',
-            severity=analysis_result['severity'],
-            confidence_score=analysis_result['confidence'],
+            description=analysis_result['insights'],
+            symptoms=analysis_result['metrics']['condition'].replace('_', ' ').title(),
+            severity=analysis_result['risk_level'],
+            confidence_score=round(analysis_result['confidence'] * 100, 1),
             recommendations='\n'.join(analysis_result['recommendations'])
         )
         
@@ -717,10 +743,19 @@ def upload_rash_image():
             'success': True,
             'message': 'Image uploaded and analyzed successfully',
             'analysis': analysis_result,
+            'cached': analysis_result['cached'],
             'diagnosis_id': diagnosis.id,
             'file_url': f'/uploads/{current_user_id}/images/{unique_filename}'
         }), 200
         
+    except DeadlineExceeded as e:
+        db.session.rollback()
+        logger.warning(f"Rash upload timed out: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Analysis is taking too long, please try again',
+            'error': 'INFERENCE_TIMEOUT'
+        }), 503
     except Exception as e:
         db.session.rollback()
         logger.error(f"Rash upload error: {str(e)}")
@@ -730,6 +765,212 @@ def upload_rash_image():
             'error': 'PROCESSING_ERROR'
         }), 500
 
+@app.route('/api/diagnosis/rash/batch', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per hour")
+def upload_rash_batch():
+    """Upload several images of one rash (form field `images`, repeated):
+    decoded in parallel, classified in one batched model pass, stored as one
+    Diagnosis per image in a single transaction."""
+    from services.inference_pool import DeadlineExceeded, run_batch_analysis
+    from services.speech_service import audio_delivery_from_request
+    
+    try:
+        current_user_id = get_jwt_identity()
+        files = [file for file in request.files.getlist('images') if file.filename]
+        
+        if not files:
+            return jsonify({
+                'success': False,
+                'message': 'No image files provided',
+                'error': 'NO_FILE'
+            }), 400
+        
+        max_images = app.config['RASH_BATCH_MAX_IMAGES']
+        if len(files) > max_images:
+            return jsonify({
+                'success': False,
+                'message': f'Too many images (max {max_images})',
+                'error': 'TOO_MANY_FILES'
+            }), 400
+        
+        for file in files:
+            if not allowed_file(file.filename) or \
+                    file.filename.rsplit('.', 1)[1].lower() not in app.config['IMAGE_EXTENSIONS']:
+                return jsonify({
+                    'success': False,
+                    'message': f'Invalid file type: {file.filename}. Allowed: PNG, JPG, JPEG, GIF',
+                    'error': 'INVALID_FILE_TYPE'
+                }), 400
+        
+        user_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(current_user_id), 'images')
+        os.makedirs(user_dir, exist_ok=True)
+        
+        filenames, filepaths, digests = [], [], []
+        for file in files:
+            original_ext = file.filename.rsplit('.', 1)[1].lower()
+            secure_filename_base = secure_filename(file.filename.rsplit('.', 1)[0])
+            unique_filename = f"{uuid.uuid4().hex}_{secure_filename_base}.{original_ext}"
+            # Same photo again: the analyzer reuses its stored embedding
+            digests.append(content_hash(file))
+            filepath = os.path.join(user_dir, unique_filename)
+            file.save(filepath)
+            filenames.append(unique_filename)
+            filepaths.append(filepath)
+        
+        # One pool job (one batched model pass), answered from the result
+        # cache when the same photos are sent again
+        analysis_result = run_batch_analysis(
+            'rash', filepaths, digests=digests,
+            user_lang=request.form.get('language', 'en'),
+            audio_delivery=audio_delivery_from_request(request)
+        )
+        
+        # One transaction for every image of the batch
+        diagnoses = [
+            Diagnosis(
+                user_id=current_user_id,
+                diagnosis_type='rash',
+                title=f'Skin Rash Analysis ({index} of {len(files)})',
+                description=image['insights'],
+                symptoms=image['metrics']['condition'].replace('_', ' ').title(),
+                severity=image['risk_level'],
+                confidence_score=round(image['confidence'] * 100, 1)
+            )
+            for index, image in enumerate(analysis_result['images'], start=1)
+        ]
+        db.session.add_all(diagnoses)
+        db.session.commit()
+        
+        for image, diagnosis, unique_filename in zip(analysis_result['images'], diagnoses, filenames):
+            image['diagnosis_id'] = diagnosis.id
+            image['file_url'] = f'/uploads/{current_user_id}/images/{unique_filename}'
+        
+        return jsonify({
+            'success': True,
+            'message': f'{len(files)} images uploaded and analyzed successfully',
+            'analysis': analysis_result,
+            'cached': analysis_result['cached'],
+            'diagnosis_ids': [diagnosis.id for diagnosis in diagnoses]
+        }), 200
+        
+    except DeadlineExceeded as e:
+        db.session.rollback()
+        logger.warning(f"Rash batch upload timed out: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Analysis is taking too long, please try again',
+            'error': 'INFERENCE_TIMEOUT'
+        }), 503
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Rash batch upload error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Failed to process images',
+            'error': 'PROCESSING_ERROR'
+        }), 500
+
+@app.route('/api/diagnosis/respiratory', methods=['POST'])
+@jwt_required()
+@limiter.limit("10 per hour")
+def respiratory_session():
+    """Cough + breath recordings of one session (form fields `cough` and
+    `breath`): both analyzers run concurrently on the inference pool and
+    one combined Diagnosis is stored."""
+    from services.inference_pool import DeadlineExceeded, run_analyses
+    from services.speech_service import audio_delivery_from_request
+    
+    try:
+        current_user_id = get_jwt_identity()
+        
+        recordings = {}
+        for field in ('cough', 'breath'):
+            file = request.files.get(field)
+            if file is None or file.filename == '':
+                return jsonify({
+                    'success': False,
+                    'message': f'No {field} recording provided',
+                    'error': 'NO_FILE'
+                }), 400
+            if not allowed_file(file.filename) or \
+                    file.filename.rsplit('.', 1)[1].lower() not in app.config['AUDIO_EXTENSIONS']:
+                return jsonify({
+                    'success': False,
+                    'message': f'Invalid {field} file type. Allowed: MP3, WAV, M4A',
+                    'error': 'INVALID_FILE_TYPE'
+                }), 400
+            recordings[field] = file
+        
+        user_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(current_user_id), 'audio')
+        os.makedirs(user_dir, exist_ok=True)
+        
+        jobs, file_urls = {}, {}
+        for field, file in recordings.items():
+            original_ext = file.filename.rsplit('.', 1)[1].lower()
+            unique_filename = f"{uuid.uuid4().hex}_{field}.{original_ext}"
+            # Retries of the same recording reuse the stored analysis
+            digest = content_hash(file)
+            filepath = os.path.join(user_dir, unique_filename)
+            file.save(filepath)
+            jobs[field] = (field, filepath, digest)
+            file_urls[field] = f'/uploads/{current_user_id}/audio/{unique_filename}'
+        
+        # Latency is max(cough, breath), not the sum
+        results = run_analyses(jobs, user_lang=request.form.get('language', 'en'),
+                               audio_delivery=audio_delivery_from_request(request))
+        cough, breath = results['cough'], results['breath']
+        
+        # The more severe finding decides; its analyzer's confidence goes with it
+        # (cough 'confidence' is a severity score, 0.0 for a clean recording, so
+        # it is never averaged with breath's classifier confidence). Ties go to breath.
+        risk_levels = ['low', 'medium', 'high']
+        decided_by = max((breath, cough), key=lambda result: risk_levels.index(result['risk_level']))
+        risk_level, confidence = decided_by['risk_level'], decided_by['confidence']
+        
+        diagnosis = Diagnosis(
+            user_id=current_user_id,
+            diagnosis_type='respiratory',
+            title='Respiratory Session Analysis',
+            description=f"Cough: {cough['insights']}\nBreath: {breath['insights']}",
+            symptoms=f"Coughs detected: {cough['metrics'].get('cough_count', 0)}",
+            severity=risk_level,
+            confidence_score=round(confidence * 100, 1)
+        )
+        db.session.add(diagnosis)
+        db.session.commit()
+        
+        return jsonify({
+            'success': True,
+            'message': 'Respiratory session analyzed successfully',
+            'analysis': {
+                'risk_level': risk_level,
+                'confidence': confidence,
+                'decided_by': decided_by['type'],
+                'cough': cough,
+                'breath': breath
+            },
+            'diagnosis_id': diagnosis.id,
+            'file_urls': file_urls
+        }), 200
+        
+    except DeadlineExceeded as e:
+        db.session.rollback()
+        logger.warning(f"Respiratory session timed out: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Analysis is taking too long, please try again',
+            'error': 'INFERENCE_TIMEOUT'
+        }), 503
+    except Exception as e:
+        db.session.rollback()
+        logger.error(f"Respiratory session error: {str(e)}")
+        return jsonify({
+            'success': False,
+            'message': 'Failed to process recordings',
+            'error': 'PROCESSING_ERROR'
+        }), 500
+
 @app.route('/api/diagnosis/history', methods=['GET'])
 @jwt_required()
 def get_diagnosis_history():
@@ -846,7 +1087,7 @@ def health_check():
             'services': {
                 'database': 'connected',
                 'storage': 'writable',
-                'firebase': 'initialized' if firebase_admin._apps else 'not_initialized'
+                'firebase': 'initialized' if get_firebase_auth() else 'not_initialized'
             }
         }), 200
     except Exception as e:
@@ -857,6 +1098,115 @@ def health_check():
             'timestamp': datetime.utcnow().isoformat()
         }), 500
 
+@app.route('/api/metrics', methods=['GET'])
+@limiter.exempt
+def metrics():
+    """Per-worker inference metrics."""
+    # Only report analyzers this worker has already imported; never pull
+    # torch/librosa in just to answer a metrics scrape
+    analyzers_module = sys.modules.get('analyzers')
+    return jsonify({
+        'pid': os.getpid(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'analyzers': analyzers_module.analyzer_stats() if analyzers_module else {},
+        'batching': analyzers_module.batching_stats() if analyzers_module else {},
+        'tts_cache': analyzers_module.tts_cache_stats() if analyzers_module else {},
+        'feature_store': analyzers_module.feature_store_stats() if analyzers_module else {},
+        'lazy_imports': import_stats(),
+        'models': model_stats(),
+        'backends': backend_stats(),
+        'memory': memory_usage(),  # private_mb = this worker's own cost; shared_mb = pages shared with the master
+        'inference_pool': pool_stats(),
+        'result_cache': get_result_cache().stats()
+    }), 200
+
+SPEECH_MAX_AGE = 365 * 24 * 3600
+
+@app.route('/api/speech/<speech_id>', methods=['GET'])
+@limiter.exempt  # clients poll this while synthesis runs
+def get_speech(speech_id):
+    """Stream a deferred speech clip, or 202 while it is being synthesised."""
+    from utils.tts_cache import is_valid_key, get_default_cache, PENDING, FAILED
+    from services.speech_service import speech_status
+
+    if not is_valid_key(speech_id):
+        return jsonify({
+            'success': False,
+            'message': 'Speech not found',
+            'error': 'NOT_FOUND'
+        }), 404
+
+    status = speech_status(speech_id)
+    if status == PENDING:
+        response = jsonify({'success': True, 'status': PENDING, 'speech_id': speech_id})
+        response.headers['Retry-After'] = '1'
+        response.cache_control.no_store = True
+        return response, 202
+    if status == FAILED:
+        return jsonify({
+            'success': False,
+            'message': 'Speech synthesis failed',
+            'error': 'SPEECH_FAILED'
+        }), 500
+
+    # Clips are content-addressed: the id doubles as a strong ETag and the
+    # bytes never change, so clients and proxies may cache them indefinitely.
+    # conditional=True answers If-None-Match with 304 and Range with 206.
+    cache = get_default_cache()
+    source = cache.path_for(speech_id)
+    if source is None:
+        audio_bytes = cache.get(speech_id)
+        if audio_bytes is None:
+            return jsonify({
+                'success': False,
+                'message': 'Speech not found',
+                'error': 'NOT_FOUND'
+            }), 404
+        source = io.BytesIO(audio_bytes)
+    response = send_file(source, mimetype='audio/mpeg', conditional=True,
+                         etag=speech_id, max_age=SPEECH_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+def sse_event(event, data):
+    """One text/event-stream frame"""
+    payload = json.dumps(data, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value))
+    return f"event: {event}\ndata: {payload}\n\n"
+
+@app.route('/api/chat/stream', methods=['POST'])
+@jwt_required()
+@limiter.limit("30 per minute")
+def chat_stream():
+    """Chat reply as server-sent events: the text immediately, then one
+    speech clip per sentence as it is synthesised."""
+    from analyzers import get_analyzer
+    from services.speech_service import audio_delivery_from_request
+
+    data = request.get_json(silent=True) or {}
+    message = (data.get('message') or '').strip()
+    if not message:
+        return jsonify({
+            'success': False,
+            'message': 'Message is required',
+            'error': 'NO_MESSAGE'
+        }), 400
+    language = data.get('language') or 'en'
+    delivery = audio_delivery_from_request(request)
+
+    def events():
+        try:
+            for event, payload in get_analyzer('chat').stream(message, language, audio_delivery=delivery):
+                yield sse_event(event, payload)
+        except Exception as e:
+            logger.error(f"Chat stream error: {str(e)}")
+            yield sse_event('error', {'message': 'Chat failed', 'error': 'PROCESSING_ERROR'})
+
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # nginx: flush each event
+    return response
+
 # Serve uploaded files
 @app.route('/uploads/<path:filename>')
 def serve_upload(filename):
@@ -996,7 +1346,7 @@ if __name__ == '__main__':
     - Init Check: http://{host}:{port}/api/init
     - Firebase Config: http://{host}:{port}/api/config/firebase
     
-    🔑 Firebase: {'Configured' if firebase_admin._apps else 'Not configured'}
+    🔑 Firebase: {'Configured' if get_firebase_auth() else 'Not configured'}
     💾 Uploads: {app.config['UPLOAD_FOLDER']}
     📊 Database: {app.config['SQLALCHEMY_DATABASE_URI']}
     """)
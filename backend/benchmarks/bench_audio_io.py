@@ -0,0 +1,73 @@
+# benchmarks/bench_audio_io.py
+"""
+Decode latency of the unified audio_io loader vs the per-analyzer loaders
+it replaced (torchaudio.load + Resample for breath, librosa.load for cough).
+
+Run from backend/:  python -m benchmarks.bench_audio_io
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import wave
+
+import numpy as np
+
+from utils import audio_io
+
+
+def write_wav(path, seconds, rate, channels):
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal((int(seconds * rate), channels)) * 3000).astype('<i2')
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes(samples.tobytes())
+
+
+def torchaudio_loader(path):
+    import torchaudio
+    waveform, sr = torchaudio.load(path)
+    if sr != audio_io.TARGET_RATE:
+        waveform = torchaudio.transforms.Resample(sr, audio_io.TARGET_RATE)(waveform)
+    return waveform.mean(dim=0)
+
+
+def librosa_loader(path):
+    import librosa
+    return librosa.load(path, sr=audio_io.TARGET_RATE)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, nargs='+', default=[5, 30, 120])
+    parser.add_argument('--rates', type=int, nargs='+', default=[16000, 44100])
+    parser.add_argument('--channels', type=int, default=1)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    loaders = {
+        'audio_io': audio_io.load_audio,
+        'torchaudio': torchaudio_loader,
+        'librosa': librosa_loader,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for rate in args.rates:
+            for seconds in args.seconds:
+                path = os.path.join(tmp, f'clip_{rate}_{seconds}.wav')
+                write_wav(path, seconds, rate, args.channels)
+                for name, loader in loaders.items():
+                    loader(path)  # first call builds resampler caches
+                    timings = []
+                    for _ in range(args.repeats):
+                        start = time.perf_counter()
+                        loader(path)
+                        timings.append((time.perf_counter() - start) * 1000)
+                    print(f"{rate:>6} Hz {seconds:>6.0f}s {name:>10}: "
+                          f"median {statistics.median(timings):8.2f} ms  min {min(timings):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/bench_backends.py
+"""
+Latency and memory of the eager / torchscript / int8 inference backends for
+the breath, cough and rash models on synthetic inputs, plus the parity
+report (max |Δ probability| and top-1 agreement vs eager). Deployed weights
+are used when present, otherwise a seeded random init - latency and size do
+not depend on the weight values.
+
+Run from backend/:  python -m benchmarks.bench_backends [--models rash]
+"""
+import argparse
+import io
+import statistics
+import time
+
+import torch
+
+from utils.inference_backends import BACKENDS, MODEL_SPECS, build_eager, convert, parity_check
+from utils.proc_memory import memory_usage
+
+
+def serialized_mb(model):
+    buffer = io.BytesIO()
+    if isinstance(model, torch.jit.ScriptModule):
+        torch.jit.save(model, buffer)
+    else:
+        torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def time_forward(model, inputs, repeats):
+    with torch.inference_mode():
+        for _ in range(3):
+            model(inputs)  # warm-up (allocator, JIT profiling runs)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            model(inputs)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[min(len(timings) - 1, int(0.99 * len(timings)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--models', nargs='+', default=list(MODEL_SPECS))
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS))
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 8])
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--threads', type=int, default=1)
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    torch.manual_seed(0)
+    for name in args.models:
+        spec = MODEL_SPECS[name]
+        eager = build_eager(spec, allow_random_init=True)
+        print(f"\n{name} ({spec.network}, input {spec.example_shape[1:]}, {args.threads} thread(s))")
+        for backend in args.backends:
+            rss_before = memory_usage().get('rss_mb', 0.0)
+            model = convert(eager, spec, backend)
+            rss_delta = memory_usage().get('rss_mb', 0.0) - rss_before
+            for batch_size in args.batch_sizes:
+                inputs = torch.randn((batch_size,) + spec.example_shape[1:])
+                p50, p99 = time_forward(model, inputs, args.repeats)
+                print(f"  {backend:>11} batch {batch_size:>2}: p50 {p50:8.2f} ms  p99 {p99:8.2f} ms  "
+                      f"weights {serialized_mb(model):6.2f} MB  rss +{rss_delta:6.1f} MB")
+
+        for backend, report in parity_check(name, args.backends).items():
+            print(f"  parity {backend:>11}: max |Δp| {report['max_abs_diff']:.6f}  "
+                  f"top-1 agreement {report['top1_agreement']:.2%}  {'ok' if report['ok'] else 'MISMATCH'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+# benchmarks/bench_mel_pipeline.py
+"""
+Per-call latency of breath feature extraction: legacy (transforms rebuilt
+every call, mel per channel) vs the cached MelFeaturePipeline.
+
+Run from backend/:  python -m benchmarks.bench_mel_pipeline
+"""
+import argparse
+import statistics
+import time
+
+import torch
+import torchaudio
+
+from utils.audio_features import MelFeaturePipeline
+
+
+def legacy_log_mel(waveform, sr, target_rate=16000, n_mels=128):
+    """Feature extraction as BreathCNNAnalyzer.analyze() used to do it"""
+    if sr != target_rate:
+        waveform = torchaudio.transforms.Resample(sr, target_rate)(waveform)
+    mel_spec = torchaudio.transforms.MelSpectrogram(sample_rate=target_rate, n_mels=n_mels)(waveform)
+    return torch.log10(mel_spec + 1e-9)
+
+
+def time_calls(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=10.0)
+    parser.add_argument('--rate', type=int, default=44100)
+    parser.add_argument('--channels', type=int, default=2)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    torch.manual_seed(0)
+    waveform = torch.randn(args.channels, int(args.seconds * args.rate)) * 0.1
+    pipeline = MelFeaturePipeline()
+    pipeline(waveform, args.rate)  # build the cache once, as warm_up() would
+
+    for name, fn in (('legacy', lambda: legacy_log_mel(waveform, args.rate)),
+                     ('pipeline', lambda: pipeline(waveform, args.rate))):
+        timings = time_calls(fn, args.repeats)
+        print(f"{name:>9}: median {statistics.median(timings):8.2f} ms  "
+              f"min {min(timings):8.2f} ms  ({args.channels}ch {args.rate} Hz, {args.seconds:.0f}s clip)")
+
+
+if __name__ == '__main__':
+    main()
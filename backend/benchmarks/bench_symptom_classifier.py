@@ -0,0 +1,106 @@
+# benchmarks/bench_symptom_classifier.py
+"""
+Throughput (messages/second) of the compiled multilingual symptom
+classifier vs the old English-only chain of substring checks, and vs the
+same substring approach extended to every lexicon in data/symptom_lexicon
+(one scan of the message per keyword).
+
+Run from backend/:  python -m benchmarks.bench_symptom_classifier
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from utils.symptom_classifier import LEXICON_DIR, SymptomClassifier
+
+MESSAGES = [
+    'I have had a dry cough for three days and a slight temperature in the evenings.',
+    'My son has a rash on his arms and the skin is very itchy after playing outside.',
+    'Severe chest pain since this morning and shortness of breath when climbing stairs.',
+    'Feeling tired, mild headache, nothing else really. Should I be worried about it?',
+    'मुझे तीन दिन से खांसी और बुखार है, रात में सांस फूलती है।',
+    'எனக்கு இருமல் மற்றும் காய்ச்சல் இருக்கிறது.',
+    'Tengo tos y fiebre desde ayer, y un poco de dificultad para respirar.',
+    'J\'ai de la fièvre et une éruption sur la peau depuis hier soir.',
+    '我咳嗽三天了，昨天晚上开始发烧。',
+    'Ich habe seit gestern Husten und starkes Fieber.',
+]
+
+
+def legacy_classify(text):
+    """safe_text_classify before the compiled lexicons"""
+    t = text.lower()
+    tags = []
+    if "cough" in t: tags.append("cough")
+    if "fever" in t or "temperature" in t: tags.append("fever")
+    if "rash" in t or "skin" in t: tags.append("rash")
+    if any(w in t for w in ["severe", "difficulty", "bleeding", "chest pain", "shortness"]):
+        severity = "high"
+    else:
+        severity = "low"
+    return {"tags": tags or ["general"], "severity": severity, "raw": text[:400]}
+
+
+def substring_classifier(lexicon_dir=LEXICON_DIR):
+    """The legacy approach over all lexicons: one `in` scan per keyword"""
+    keywords = []
+    for name in sorted(os.listdir(lexicon_dir)):
+        with open(os.path.join(lexicon_dir, name), encoding='utf-8') as fp:
+            lexicon = json.load(fp)
+        for kind in ('tags', 'severity'):
+            for label, words in lexicon.get(kind, {}).items():
+                keywords.extend((word.casefold(), kind, label) for word in words)
+
+    def classify(text):
+        t = text.casefold()
+        tags, hits = set(), 0
+        for word, kind, label in keywords:
+            if word in t:
+                if kind == 'tags':
+                    tags.add(label)
+                else:
+                    hits += 1
+        return {"tags": sorted(tags) or ["general"], "severity": "high" if hits else "low"}
+    return classify, len(keywords)
+
+
+def throughput(classify, messages, seconds):
+    count, deadline = 0, time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for message in messages:
+            classify(message)
+        count += len(messages)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    corpus = [rng.choice(MESSAGES) for _ in range(args.messages)]
+
+    start = time.perf_counter()
+    classifier = SymptomClassifier.from_directory()
+    compile_ms = (time.perf_counter() - start) * 1000
+    print(f"Compiled {len(classifier.languages)} lexicons in {compile_ms:.1f} ms")
+
+    scan_all, keyword_count = substring_classifier()
+    legacy = throughput(legacy_classify, corpus, args.seconds)
+    scanned = throughput(scan_all, corpus, args.seconds)
+    compiled = throughput(classifier.classify, corpus, args.seconds)
+    print(f"  legacy, English only (8 substring scans): {legacy:12,.0f} msg/s")
+    print(f"  substring scans, all lexicons ({keyword_count} kw): {scanned:12,.0f} msg/s")
+    print(f"  compiled single pass, all lexicons:      {compiled:12,.0f} msg/s")
+    tagged = sum(legacy_classify(m)['tags'] != ['general'] for m in corpus)
+    print(f"  messages tagged: legacy {tagged}/{len(corpus)}, "
+          f"compiled {sum(classifier.classify(m)['tags'] != ['general'] for m in corpus)}/{len(corpus)}")
+
+
+if __name__ == '__main__':
+    main()
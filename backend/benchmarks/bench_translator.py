@@ -0,0 +1,71 @@
+# benchmarks/bench_translator.py
+"""
+Translation time of the compiled phrase matcher vs the old
+rebuild-dict-and-str.replace-per-phrase loop, on long insight texts.
+--extra-phrases pads the table with synthetic entries to show how each
+approach scales with table size (the loop rescans the text per phrase).
+
+Run from backend/:  python -m benchmarks.bench_translator
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from utils.medical_translator import PHRASE_DIR, MedicalTranslator
+
+INSIGHTS = [
+    'Normal respiratory patterns detected. No acute concerns.',
+    'Mild respiratory irregularity observed. Monitor symptoms.',
+    'Significant respiratory abnormality. Immediate medical attention required.',
+    'Normal cough pattern detected. No concerning respiratory indicators.',
+]
+
+
+def load_table(lang, extra_phrases):
+    with open(os.path.join(PHRASE_DIR, f'{lang}.json'), encoding='utf-8') as fp:
+        table = json.load(fp)
+    table.update({f'synthetic phrase {i}': f'<{i}>' for i in range(extra_phrases)})
+    return table
+
+
+def legacy_translate(english_text, table):
+    """_translate_medical before the compiled tables"""
+    translations = dict(table)  # the dict literal was rebuilt on every call
+    for eng, trans in translations.items():
+        english_text = english_text.replace(eng, trans)
+    return english_text
+
+
+def median_us(fn, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lang', default='hi')
+    parser.add_argument('--sentences', type=int, nargs='+', default=[2, 50, 500])
+    parser.add_argument('--extra-phrases', type=int, nargs='+', default=[0, 50, 500])
+    parser.add_argument('--repeats', type=int, default=100)
+    args = parser.parse_args()
+
+    for extra in args.extra_phrases:
+        table = load_table(args.lang, extra)
+        translator = MedicalTranslator({args.lang: table})
+        for count in args.sentences:
+            text = ' '.join(INSIGHTS[i % len(INSIGHTS)] for i in range(count))
+            assert translator.translate(text, args.lang) == legacy_translate(text, table)
+            legacy = median_us(lambda: legacy_translate(text, table), args.repeats)
+            compiled = median_us(lambda: translator.translate(text, args.lang), args.repeats)
+            print(f"{len(table):>4} phrases {len(text):>7} chars: "
+                  f"legacy {legacy:9.1f} us  compiled {compiled:9.1f} us")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# benchmarks/bench_vad.py
+"""
+Compute saved by the silence-trimming stage: decode + resample + log-mel
+of phone-style recordings (room noise before and after the breathing /
+coughing) with load_audio vs load_audio_trimmed, plus how many seconds the
+trim removed.
+
+Run from backend/:  python -m benchmarks.bench_vad
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+import wave
+
+import numpy as np
+import torch
+
+from utils import audio_io
+from utils.audio_features import MelFeaturePipeline
+
+# (leading silence, signal, trailing silence) in seconds
+RECORDINGS = [(2.0, 8.0, 3.0), (3.5, 15.0, 4.0), (1.5, 25.0, 5.0)]
+
+
+def write_recording(path, lead, body, tail, rate, noise_level=0.002):
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal(int((lead + body + tail) * rate)) * noise_level
+    start, length = int(lead * rate), int(body * rate)
+    t = np.arange(length) / rate
+    # Breathing-like: broadband noise with a ~0.3 Hz amplitude cycle
+    y[start:start + length] += 0.2 * rng.standard_normal(length) * (0.55 + 0.45 * np.sin(2 * np.pi * 0.3 * t))
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes((np.clip(y, -1, 1) * 32767).astype('<i2').tobytes())
+
+
+def time_pipeline(path, pipeline, trimmed, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        if trimmed:
+            y, _ = audio_io.load_audio_trimmed(path, pipeline.target_rate)
+        else:
+            y = audio_io.load_audio(path, pipeline.target_rate)
+        pipeline(torch.from_numpy(y), pipeline.target_rate)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rates', type=int, nargs='+', default=[44100, 48000])
+    parser.add_argument('--n-mels', type=int, default=128)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args()
+
+    pipeline = MelFeaturePipeline(n_mels=args.n_mels)
+    pipeline.warm_up(source_rates=args.rates)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rate in args.rates:
+            for lead, body, tail in RECORDINGS:
+                path = os.path.join(tmp, f'rec_{rate}_{body}.wav')
+                write_recording(path, lead, body, tail, rate)
+                bounds = audio_io.silence_bounds(path)
+                full_ms = time_pipeline(path, pipeline, False, args.repeats)
+                trimmed_ms = time_pipeline(path, pipeline, True, args.repeats)
+                print(f"{rate:>5} Hz {lead + body + tail:5.1f} s clip: removed {bounds.removed_seconds:4.1f} s  "
+                      f"full {full_ms:7.2f} ms  trimmed {trimmed_ms:7.2f} ms  "
+                      f"saved {full_ms - trimmed_ms:6.2f} ms ({1 - trimmed_ms / full_ms:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+# benchmarks/import_profile.py
+"""
+Cold-import profile of the backend entry point.
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter,
+prints the slowest imports (cumulative and self time), then times several
+more cold imports and exits non-zero if the median exceeds the budget
+(--budget-ms, default CUREVOX_IMPORT_BUDGET_MS), so it can gate CI.
+
+Run from backend/:  python -m benchmarks.import_profile [--module app]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = float(os.getenv('CUREVOX_IMPORT_BUDGET_MS', 1500))
+
+# import time:       self [us] |  cumulative | imported package
+_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def child_env():
+    env = dict(os.environ)
+    # app.py refuses to import without these; the values are irrelevant here
+    env.setdefault('SECRET_KEY', 'import-profile')
+    env.setdefault('JWT_SECRET_KEY', 'import-profile')
+    return env
+
+
+def import_times(module):
+    """[(name, depth, self_ms, cumulative_ms)] from one -X importtime run"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, env=child_env(), capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, (len(indent) - 1) // 2, int(self_us) / 1000, int(cumulative_us) / 1000))
+    return rows
+
+
+def cold_import_ms(module):
+    """Wall time of `import <module>` in a fresh interpreter"""
+    code = ('import time; start = time.perf_counter(); '
+            f'import {module}; print((time.perf_counter() - start) * 1000)')
+    result = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=child_env(),
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=25)
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS)
+    args = parser.parse_args()
+
+    rows = import_times(args.module)
+    top_level = sorted((row for row in rows if row[1] <= 1), key=lambda row: -row[3])
+    print(f"Slowest top-level imports under `import {args.module}` (cumulative ms):")
+    for name, _, _, cumulative_ms in top_level[:args.top]:
+        print(f"  {cumulative_ms:9.1f}  {name}")
+    print("\nSlowest modules by self time (ms):")
+    for name, _, self_ms, _ in sorted(rows, key=lambda row: -row[2])[:args.top]:
+        print(f"  {self_ms:9.1f}  {name}")
+
+    timings = [cold_import_ms(args.module) for _ in range(args.repeats)]
+    median = statistics.median(timings)
+    print(f"\nCold import {args.module}: median {median:.1f} ms  min {min(timings):.1f} ms  "
+          f"(budget {args.budget_ms:.0f} ms)")
+    if median > args.budget_ms:
+        print(f"FAIL: import {args.module} is over budget by {median - args.budget_ms:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,415 @@
+# benchmarks/suite.py
+"""
+Analyzer benchmark suite on a deterministic synthetic corpus.
+Generates WAV/MP3 recordings (noise floor, breathing, cough bursts) and
+JPEG/PNG skin photos at several sizes, then runs every analyzer in
+analyzers.py plus services/rash_service.py and services/predict_service.py
+over them. Per stage (decode, trim, resample, mel, segment, inference,
+TTS, end to end) it reports the median latency, the sampled peak RSS growth
+and the peak traced Python allocation, and writes everything to JSON so
+runs can be compared.
+
+The result cache and the feature store are disabled and speech goes to a
+temporary TTS cache, so every run measures the computation itself. The
+TTS stage uses a TTS engine with no cache at all, so every repeat calls
+gTTS (network); failures are recorded, not fatal. The inference stage
+includes the micro-batcher hand-off (and its max_wait, if configured).
+These caveats are repeated in the report's "notes".
+
+Run from backend/:  python -m benchmarks.suite [--quick] [--compare benchmarks/results/<old>.json]
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+
+AUDIO_SECONDS = (5.0, 15.0, 45.0)  # 45 s takes the windowed / chunked path
+AUDIO_RATES = (16000, 44100)
+IMAGE_SIZES = ((640, 480), (1920, 1080), (4032, 3024))
+QUICK_AUDIO_SECONDS = (5.0,)
+QUICK_IMAGE_SIZES = ((640, 480),)
+CHAT_MESSAGES = [
+    'I have had a dry cough for three days and a slight temperature in the evenings.',
+    'मुझे तीन दिन से खांसी और बुखार है, रात में सांस फूलती है।',
+    'Tengo tos y fiebre desde ayer, y un poco de dificultad para respirar.',
+]
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+
+# ---------------------------------------------------------------------------
+# Synthetic corpus
+# ---------------------------------------------------------------------------
+
+def synth_recording(seconds, rate, seed=0):
+    """Room noise, ~1 s of silence at both ends, breathing with a 0.3 Hz
+    cycle and a cough burst every ~3 s"""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * rate)
+    y = rng.standard_normal(n) * 0.002
+    edge = int(min(1.0, seconds / 5) * rate)
+    t = np.arange(n - 2 * edge) / rate
+    y[edge:n - edge] += 0.05 * rng.standard_normal(len(t)) * (0.55 + 0.45 * np.sin(2 * np.pi * 0.3 * t))
+    burst = int(0.35 * rate)
+    envelope = np.minimum(np.arange(burst) / (0.005 * rate), 1) * np.exp(-np.arange(burst) / (0.08 * rate))
+    for start in np.arange(edge + rate // 2, n - edge - burst, 3 * rate):
+        y[start:start + burst] += rng.uniform(0.3, 0.7) * rng.standard_normal(burst) * envelope
+    return np.clip(y, -1, 1).astype(np.float32)
+
+
+def write_wav(path, y, rate):
+    import wave
+    with wave.open(path, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        wav.writeframes((y * 32767).astype('<i2').tobytes())
+
+
+def write_mp3(path, y, rate):
+    """None on success, otherwise why MP3 encoding is unavailable"""
+    try:
+        import torch
+        import torchaudio
+        torchaudio.save(path, torch.from_numpy(y).unsqueeze(0), rate, format='mp3')
+        return None
+    except Exception as e:
+        return f'{type(e).__name__}: {e}'
+
+
+def synth_skin(width, height, seed=0):
+    """Skin-tone gradient with red blotches (uint8 RGB)"""
+    rng = np.random.default_rng(seed)
+    yy, xx = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = np.array([224, 172, 140], dtype=np.float32)
+    pixels = base + (yy / height)[..., None] * np.array([-30, -25, -20], dtype=np.float32)
+    for _ in range(6):
+        cx, cy, radius = rng.uniform(0, width), rng.uniform(0, height), rng.uniform(0.03, 0.12) * width
+        mask = np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * radius ** 2))[..., None]
+        pixels += mask * np.array([20, -60, -50], dtype=np.float32)
+    pixels += rng.normal(0, 4, pixels.shape)
+    return np.clip(pixels, 0, 255).astype(np.uint8)
+
+
+def build_corpus(directory, quick=False):
+    from PIL import Image
+    corpus, skipped = [], []
+    for rate in AUDIO_RATES[:1] if quick else AUDIO_RATES:
+        for seconds in QUICK_AUDIO_SECONDS if quick else AUDIO_SECONDS:
+            y = synth_recording(seconds, rate)
+            label = f'{seconds:g}s {rate}Hz'
+            path = os.path.join(directory, f'rec_{rate}_{seconds:g}.wav')
+            write_wav(path, y, rate)
+            corpus.append({'kind': 'audio', 'format': 'wav', 'label': f'wav {label}', 'path': path})
+            path = os.path.join(directory, f'rec_{rate}_{seconds:g}.mp3')
+            error = write_mp3(path, y, rate)
+            if error is None:
+                corpus.append({'kind': 'audio', 'format': 'mp3', 'label': f'mp3 {label}', 'path': path})
+            else:
+                skipped.append({'label': f'mp3 {label}', 'reason': error})
+    for width, height in QUICK_IMAGE_SIZES if quick else IMAGE_SIZES:
+        image = Image.fromarray(synth_skin(width, height))
+        for ext, options in (('jpg', {'format': 'JPEG', 'quality': 90}), ('png', {'format': 'PNG'})):
+            path = os.path.join(directory, f'skin_{width}x{height}.{ext}')
+            image.save(path, **options)
+            corpus.append({'kind': 'image', 'format': ext, 'label': f'{ext} {width}x{height}', 'path': path})
+    return corpus, skipped
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+class Upload:
+    """The parts of werkzeug's FileStorage the services use"""
+
+    def __init__(self, path):
+        self.filename = os.path.basename(path)
+        with open(path, 'rb') as fp:
+            self.stream = io.BytesIO(fp.read())
+
+
+class RSSSampler:
+    """Peak RSS above the starting level while the block runs, polled from a
+    thread every `interval_s` (torch / Pillow / numpy buffers included)"""
+
+    def __init__(self, interval_s=0.001):
+        from utils.proc_memory import rss_bytes
+        self.rss_bytes = rss_bytes
+        self.interval_s = interval_s
+        self.peak_delta = None
+
+    def _poll(self, start, stop):
+        peak = start
+        while not stop.wait(self.interval_s):
+            peak = max(peak, self.rss_bytes() or 0)
+        self.peak_delta = max(peak, self.rss_bytes() or 0) - start
+
+    def __enter__(self):
+        start = self.rss_bytes()
+        self._stop = threading.Event()
+        self._thread = None
+        if start is not None:
+            self._thread = threading.Thread(target=self._poll, args=(start, self._stop), daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+
+
+class StageRecorder:
+    """Median latency over `repeats` untraced calls, then one more call with
+    RSS sampled and Python allocations traced"""
+
+    def __init__(self, repeats):
+        self.repeats = repeats
+        self.stages = {}
+
+    def run(self, name, fn):
+        """Measure fn(); returns its last result (feeds the next stage)"""
+        try:
+            timings = []
+            for _ in range(self.repeats):
+                start = time.perf_counter()
+                value = fn()
+                timings.append((time.perf_counter() - start) * 1000)
+            rss = RSSSampler()
+            with rss:
+                tracemalloc.start()
+                fn()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+        except Exception as e:
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
+            self.stages[name] = {'error': f'{type(e).__name__}: {e}'}
+            return None
+        self.stages[name] = {
+            'ms': round(statistics.median(timings), 3),
+            'min_ms': round(min(timings), 3),
+            'rss_peak_mb': None if rss.peak_delta is None else round(rss.peak_delta / (1024 * 1024), 3),
+            'py_alloc_peak_mb': round(peak / (1024 * 1024), 3)
+        }
+        return value
+
+
+def uncached_tts(analyzers):
+    """A TTS engine whose cache never hits: the tts stage times synthesis,
+    not the memory LRU every repeat after the first would otherwise hit"""
+    from utils.tts_cache import TTSCache
+    tts = analyzers.MultiLingualTTS()
+    tts.cache = TTSCache(cache_dir=None, memory_budget_bytes=0)
+    return tts
+
+
+def measurement_notes():
+    """Caveats printed with and stored in every report"""
+    from services.batching import DEFAULT_MAX_WAIT_MS
+    return [
+        'tts: uncached engine, every repeat synthesises through gTTS (network round trip included)',
+        f'inference: includes the micro-batcher queue hand-off (max_wait_ms={DEFAULT_MAX_WAIT_MS:g})',
+        'rss_peak_mb: RSS growth over the stage start, polled every 1 ms; buffers freed between polls and '
+        'pages reused from earlier stages are not seen (Linux /proc only, null elsewhere)',
+        'py_alloc_peak_mb: tracemalloc sees Python-heap allocations only, not torch tensors or Pillow '
+        'images; it is not the stage\'s memory peak',
+    ]
+
+
+def decode(path, rate):
+    """Upload → (float mono at the source rate, rate), as audio_io decodes it"""
+    from utils import audio_io
+    view = audio_io.wav_view(path)
+    if view is not None:
+        samples, sr = view
+        return audio_io.to_float_mono(samples), sr
+    return audio_io.decode_native(path, rate)
+
+
+def bench_audio(analyzers, analyzer_type, item, repeats):
+    import torch
+    from utils import audio_io, vad
+    from utils.cough_segments import CoughSegmenter
+
+    analyzer = analyzers.get_analyzer(analyzer_type)
+    rate = analyzer.sample_rate
+    rec = StageRecorder(repeats)
+    decoded = rec.run('decode', lambda: decode(item['path'], rate))
+    if decoded is not None:
+        mono, sr = decoded
+        trimmed = rec.run('trim', lambda: vad.trim_silence(mono, sr)[0])
+        y = rec.run('resample', lambda: audio_io.resample(trimmed, sr, rate))
+        if analyzer_type == 'breath':
+            log_mel = rec.run('mel', lambda: analyzer.features(torch.from_numpy(y), rate))
+            rec.run('inference', lambda: analyzer.batcher.infer(log_mel))
+        else:
+            events = rec.run('segment', lambda: list(CoughSegmenter(rate).events([y]))) or []
+            rec.stages['segment']['events'] = len(events)
+            log_mels = rec.run('mel', lambda: [analyzer.features(torch.from_numpy(e.samples), rate) for e in events])
+            # Events go through the batcher together, as in analyze()
+            rec.run('inference', lambda: [f.result() for f in [analyzer.batcher.submit(m) for m in log_mels]])
+    result = rec.run('end_to_end', lambda: analyzer.analyze(item['path'], 'en', defer_speech=True))
+    if result is not None:
+        tts = uncached_tts(analyzers)
+        rec.run('tts', lambda: tts.speak_analysis(result, 'hi', deferred=False, delivery='url'))
+    return rec.stages
+
+
+def bench_rash(analyzers, item, repeats):
+    from utils.color_stats import compute_color_stats
+    from utils.image_io import load_rgb
+
+    analyzer = analyzers.get_analyzer('rash')
+    rec = StageRecorder(repeats)
+    decoded = rec.run('decode', lambda: load_rgb(item['path']))
+    if decoded is not None:
+        rec.run('color_stats', lambda: compute_color_stats(decoded.pixels))
+        rec.run('inference', lambda: analyzer._classify(decoded.pixels))
+    rec.run('end_to_end', lambda: analyzer.analyze(item['path'], 'en', defer_speech=True))
+    return rec.stages
+
+
+def bench_services(item, repeats):
+    from services import predict_service, rash_service
+
+    rec = StageRecorder(repeats)
+    if item['kind'] == 'image':
+        rec.run('rash_service', lambda: rash_service.analyze_rash_image(Upload(item['path'])))
+    else:
+        rec.run('predict_cough', lambda: predict_service.analyze_cough(Upload(item['path'])))
+        rec.run('predict_breath', lambda: predict_service.analyze_breath(Upload(item['path'])))
+    return rec.stages
+
+
+def bench_chat(analyzers, repeats):
+    from services import predict_service
+
+    analyzer = analyzers.get_analyzer('chat')
+    tts = uncached_tts(analyzers)
+    rows = []
+    for message in CHAT_MESSAGES:
+        rec = StageRecorder(repeats)
+        reply = rec.run('reply', lambda: analyzer.reply(message, 'en'))
+        rec.run('symptoms', lambda: predict_service.analyze_symptoms(message))
+        if reply is not None:
+            rec.run('tts', lambda: tts.speak_analysis({'insights': reply['bot_response']}, 'en',
+                                                      deferred=False, delivery='url'))
+        rows.append({'target': 'chat', 'input': message[:40], 'stages': rec.stages})
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Report
+# ---------------------------------------------------------------------------
+
+def environment():
+    info = {'python': platform.python_version(), 'platform': platform.platform(), 'numpy': np.__version__}
+    try:
+        import torch
+        info['torch'] = torch.__version__
+        info['torch_threads'] = torch.get_num_threads()
+    except ImportError:
+        pass
+    try:
+        info['git_commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                            text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        pass
+    return info
+
+
+def print_rows(rows, baseline=None):
+    previous = {(row['target'], row['input']): row['stages'] for row in (baseline or {}).get('results', [])}
+    for row in rows:
+        print(f"\n{row['target']:<8} {row['input']}")
+        old_stages = previous.get((row['target'], row['input']), {})
+        for stage, values in row['stages'].items():
+            if 'error' in values:
+                print(f"  {stage:<15} error: {values['error'][:80]}")
+                continue
+            rss = values.get('rss_peak_mb')
+            line = (f"  {stage:<15} {values['ms']:10.2f} ms  rss +{'n/a' if rss is None else f'{rss:.2f}':>8} MB"
+                    f"  py alloc {values['py_alloc_peak_mb']:8.2f} MB")
+            old = old_stages.get(stage, {})
+            if 'ms' in old and old['ms']:
+                line += f"  ({(values['ms'] - old['ms']) / old['ms']:+.0%} vs baseline)"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='one clip and one image size')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--targets', nargs='+', default=['breath', 'cough', 'rash', 'chat', 'services'])
+    parser.add_argument('--output', help='JSON path (default benchmarks/results/<UTC timestamp>.json)')
+    parser.add_argument('--compare', help='earlier JSON result to diff against')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='curevox-bench-') as workdir:
+        # Must be set before analyzers (and the modules they import) load
+        os.environ['CUREVOX_RESULT_CACHE'] = 'false'
+        os.environ['CUREVOX_FEATURE_STORE'] = 'false'
+        os.environ['CUREVOX_TTS_CACHE_DIR'] = os.path.join(workdir, 'tts')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')  # pygame mixer without a sound card
+        import analyzers
+
+        corpus, skipped = build_corpus(workdir, args.quick)
+        rows = []
+        for item in corpus:
+            if item['kind'] == 'audio':
+                for analyzer_type in ('breath', 'cough'):
+                    if analyzer_type in args.targets:
+                        rows.append({'target': analyzer_type, 'input': item['label'],
+                                     'stages': bench_audio(analyzers, analyzer_type, item, args.repeats)})
+            elif 'rash' in args.targets:
+                rows.append({'target': 'rash', 'input': item['label'],
+                             'stages': bench_rash(analyzers, item, args.repeats)})
+            if 'services' in args.targets:
+                rows.append({'target': 'services', 'input': item['label'],
+                             'stages': bench_services(item, args.repeats)})
+        if 'chat' in args.targets:
+            rows.extend(bench_chat(analyzers, args.repeats))
+
+        from utils.proc_memory import memory_usage
+        report = {
+            'created_at': datetime.utcnow().isoformat(),
+            'environment': environment(),
+            'options': {'quick': args.quick, 'repeats': args.repeats},
+            'skipped': skipped,
+            'notes': measurement_notes(),
+            'results': rows,
+            'memory': memory_usage()
+        }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fp:
+            baseline = json.load(fp)
+    print_rows(rows, baseline)
+    for item in skipped:
+        print(f"\nskipped {item['label']}: {item['reason'][:100]}")
+    for note in report['notes']:
+        print(f"\nnote: {note}")
+
+    output = args.output or os.path.join(RESULTS_DIR, datetime.utcnow().strftime('%Y%m%dT%H%M%SZ') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as fp:
+        json.dump(report, fp, indent=2, default=str)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,3 +21,8 @@ def generate_report_task(self, user_id, report_data):
     from services.report_service import generate_pdf_report
     pdf_path = generate_pdf_report(user_id, report_data)
     return {"pdf": pdf_path}
+
+@celery.task(bind=True)
+def synthesize_speech_task(self, text, lang, fmt='mp3'):
+    from services.speech_service import run_synthesis
+    return {"speech_id": run_synthesis(text, lang, fmt)}
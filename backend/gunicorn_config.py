@@ -12,6 +12,28 @@ worker_connections = 1000
 timeout = 30
 keepalive = 2
 
+# Build analyzers (and load model weights) once in the master and share them
+# copy-on-write with forked workers (CUREVOX_PRELOAD_ANALYZERS=true).
+# /api/metrics reports each worker's private vs shared memory.
+preload_analyzers = os.getenv('CUREVOX_PRELOAD_ANALYZERS', 'false').lower() == 'true'
+preload_app = preload_analyzers
+
+# CPU-heavy inference runs in a separate fixed-size process pool started by
+# the master (CUREVOX_INFERENCE_POOL=true, see services/inference_pool.py).
+# Inline inference in the HTTP workers gets CUREVOX_TORCH_THREADS threads
+# each: 2N+1 workers all using every core would oversubscribe the CPU.
+inference_pool = os.getenv('CUREVOX_INFERENCE_POOL', 'false').lower() == 'true'
+torch_threads = int(os.getenv('CUREVOX_TORCH_THREADS', 1))
+os.environ.setdefault('OMP_NUM_THREADS', str(torch_threads))
+
+# Each freshly forked worker (including replacements after max_requests
+# recycling) runs every analyzer once on a tiny built-in sample in post_fork,
+# before it starts accepting connections, so no user request pays for torch
+# initialisation and first-inference costs (CUREVOX_WORKER_WARM_UP=false to
+# skip). With the inference pool the HTTP workers run no models; the pool
+# processes warm up instead.
+warm_up_workers = os.getenv('CUREVOX_WORKER_WARM_UP', 'true').lower() == 'true'
+
 # Logging
 accesslog = "-"
 errorlog = "-"
@@ -28,6 +50,56 @@ user = None
 group = None
 tmp_upload_dir = None
 
+
+def on_starting(server):
+    if inference_pool:
+        from services.inference_pool import start_server_process
+        server.inference_process = start_server_process()
+        server.log.info(f"Inference pool server started (pid {server.inference_process.pid})")
+
+
+def on_exit(server):
+    process = getattr(server, 'inference_process', None)
+    if process is not None:
+        process.terminate()
+        process.join(10)
+
+
+def when_ready(server):
+    if preload_analyzers:
+        import gc
+        from analyzers import preload_analyzers as preload
+        from utils.proc_memory import memory_usage
+        for name, stats in preload().items():
+            server.log.info(f"Preloaded analyzer {name}: {stats}")
+        # Move everything allocated so far out of the collector's reach: GC
+        # passes in the workers would otherwise write to (and un-share) the
+        # pages holding the preloaded models
+        gc.freeze()
+        server.log.info(f"Master memory after preload: {memory_usage()}")
+
+
+def post_fork(server, worker):
+    if preload_analyzers:
+        import sys
+        from analyzers import reset_after_fork
+        reset_after_fork()
+        if 'torch' in sys.modules:  # preloaded in the master: pin intra-op threads per worker
+            sys.modules['torch'].set_num_threads(torch_threads)
+    if warm_up_workers and not inference_pool:
+        import time
+        from analyzers import ANALYZER_CLASSES, analyzer_stats, warm_up_worker
+        start = time.perf_counter()
+        for name in ANALYZER_CLASSES:
+            sample_ms = warm_up_worker([name]).get(name)
+            worker.notify()  # model loads can be slow: keep the heartbeat alive between analyzers
+            if sample_ms is None:
+                continue
+            stats = analyzer_stats()[name]
+            built = f"construct {stats['construct_ms']:.1f} ms" if stats['pid'] == worker.pid else 'preloaded'
+            server.log.info(f"Worker {worker.pid} warm-up {name}: {built}, sample {sample_ms:.1f} ms")
+        server.log.info(f"Worker {worker.pid} ready after {(time.perf_counter() - start) * 1000:.1f} ms warm-up")
+
 # SSL (if using HTTPS)
 # keyfile = "/path/to/key.pem"
 # certfile = "/path/to/cert.pem"
\ No newline at end of file
@@ -0,0 +1,203 @@
+# services/batching.py
+"""
+Dynamic micro-batching for the audio models.
+Requests hand in log-mel tensors; a single scheduler thread drains
+whatever is queued (up to `max_batch_size`), groups the items by frame
+count and runs one forward pass per group, so no row is ever padded and a
+clip's score never depends on what it was batched with.
+
+Under gunicorn's sync workers a process has one request in flight, so the
+default `max_wait_ms` is 0: the scheduler never sits on a lone item. The
+batches that do form come from one request submitting many windows/events;
+infer_many() runs such a set in the calling thread, so it is batched
+whatever the scheduler is doing.
+"""
+from __future__ import annotations  # torch annotations must not trigger the lazy import
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from utils.lazy_imports import lazy_import
+
+torch = lazy_import('torch')
+
+# log10(1e-9): what a silent frame looks like after MelFeaturePipeline
+LOG_MEL_FLOOR = -9.0
+
+DEFAULT_MAX_BATCH_SIZE = int(os.getenv('CUREVOX_BATCH_MAX_SIZE', 8))
+DEFAULT_MAX_WAIT_MS = float(os.getenv('CUREVOX_BATCH_MAX_WAIT_MS', 0))
+
+
+def pad_log_mels(log_mels: Sequence[torch.Tensor], pad_value: float = LOG_MEL_FLOOR):
+    """List of (n_mels, T_i) or (1, n_mels, T_i) → (B, 1, n_mels, T_max), lengths"""
+    items = [m.reshape(m.shape[-2], m.shape[-1]) for m in log_mels]
+    lengths = torch.tensor([m.shape[-1] for m in items], dtype=torch.long)
+    n_mels = items[0].shape[0]
+    batch = torch.full((len(items), 1, n_mels, int(lengths.max())), pad_value, dtype=items[0].dtype)
+    for i, m in enumerate(items):
+        batch[i, 0, :, :m.shape[-1]] = m
+    return batch, lengths
+
+
+def fit_frames(log_mel: torch.Tensor, frames: int, pad_value: float = LOG_MEL_FLOOR) -> torch.Tensor:
+    """Crop or silence-pad (..., T) to exactly `frames` frames"""
+    if log_mel.shape[-1] >= frames:
+        return log_mel[..., :frames]
+    padding = torch.full((*log_mel.shape[:-1], frames - log_mel.shape[-1]), pad_value, dtype=log_mel.dtype)
+    return torch.cat((log_mel, padding), dim=-1)
+
+
+class _Request:
+    __slots__ = ('log_mel', 'future', 'enqueued_at')
+
+    def __init__(self, log_mel: torch.Tensor):
+        self.log_mel = log_mel
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Collects single-sample requests into batched forward passes.
+
+    `forward_fn(batch, lengths)` must return one result per batch row; every
+    row of a batch it receives has the same number of frames.
+    """
+
+    def __init__(self, forward_fn: Callable[[torch.Tensor, torch.Tensor], List[Any]],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 name: str = 'batcher', history: int = 2048):
+        self.forward_fn = forward_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self.name = name
+
+        self._queue_waits_ms = deque(maxlen=history)
+        self._batch_sizes = deque(maxlen=history)
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._reset_worker()
+
+    def _reset_worker(self):
+        # Threads do not survive fork; a child starts its own scheduler
+        self._pid = os.getpid()
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_worker(self):
+        if self._pid != os.getpid():
+            self._reset_worker()
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name=f'curevox-{self.name}', daemon=True
+                    )
+                    self._thread.start()
+
+    def submit(self, log_mel: torch.Tensor) -> Future:
+        """Queue one (n_mels, T) log-mel; the future resolves to its result"""
+        request = _Request(log_mel)
+        if self.max_batch_size == 1:
+            # Batching disabled: run inline, no scheduler thread
+            self._process([request])
+            return request.future
+        self._ensure_worker()
+        self._queue.put(request)
+        return request.future
+
+    def infer(self, log_mel: torch.Tensor, timeout: Optional[float] = None) -> Any:
+        return self.submit(log_mel).result(timeout=timeout)
+
+    def infer_many(self, log_mels: Sequence[torch.Tensor]) -> List[Any]:
+        """Results for several log-mels of one request, forwarded in the
+        calling thread in chunks of up to max_batch_size"""
+        requests = [_Request(log_mel) for log_mel in log_mels]
+        for i in range(0, len(requests), self.max_batch_size):
+            self._process(requests[i:i + self.max_batch_size])
+        return [request.future.result() for request in requests]
+
+    def _collect(self) -> List[_Request]:
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                # Take what is already queued; only block while max_wait allows
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            self._process(self._collect())
+
+    def _process(self, requests: List[_Request]):
+        started = time.perf_counter()
+        # Equal-length groups: padding would leak into AdaptiveAvgPool and
+        # make a row's score depend on its batch neighbours
+        groups: Dict[int, List[_Request]] = {}
+        for request in requests:
+            groups.setdefault(int(request.log_mel.shape[-1]), []).append(request)
+        for group in groups.values():
+            self._forward_group(group)
+
+        with self._stats_lock:
+            self._batches += len(groups)
+            self._items += len(requests)
+            self._batch_sizes.extend(len(group) for group in groups.values())
+            self._queue_waits_ms.extend((started - r.enqueued_at) * 1000 for r in requests)
+
+    def _forward_group(self, requests: List[_Request]):
+        try:
+            batch, lengths = pad_log_mels([r.log_mel for r in requests])
+            with torch.inference_mode():
+                results = list(self.forward_fn(batch, lengths))
+            if len(results) != len(requests):
+                raise RuntimeError(
+                    f"{self.name}: forward_fn returned {len(results)} rows for a batch of {len(requests)}"
+                )
+            for request, result in zip(requests, results):
+                request.future.set_result(result)
+        except Exception as e:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Batch sizes and queueing latency (time from submit to forward pass)"""
+        with self._stats_lock:
+            waits = sorted(self._queue_waits_ms)
+            sizes = list(self._batch_sizes)
+            batches, items = self._batches, self._items
+
+        def percentile(p):
+            if not waits:
+                return 0.0
+            return round(waits[min(len(waits) - 1, int(p / 100 * len(waits)))], 3)
+
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': batches,
+            'items': items,
+            'avg_batch_size': round(sum(sizes) / len(sizes), 2) if sizes else 0.0,
+            'queue_depth': self._queue.qsize(),
+            'queue_wait_p50_ms': percentile(50),
+            'queue_wait_p99_ms': percentile(99)
+        }
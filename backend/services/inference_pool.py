@@ -0,0 +1,317 @@
+# services/inference_pool.py
+"""
+Dedicated inference processes, separate from the HTTP workers.
+With CUREVOX_INFERENCE_POOL=true the gunicorn master starts one pool server
+that owns a fixed number of spawned processes, each pinned to
+CUREVOX_INFERENCE_THREADS torch intra-op threads. HTTP workers hand jobs to
+it over a Unix socket and wait with a deadline; jobs that expire while still
+queued are dropped without running. Pool jobs only run the analysis: speech
+(a gTTS network round trip) is added by the HTTP worker once the result is
+back, so the CPU-inference processes never wait on the network. Without the
+pool, run_analysis() runs the analyzer inline in the calling worker.
+run_analyses() submits several jobs at once (e.g. the cough + breath
+recordings of one session); run_batch_analysis() sends several uploads as
+one analyze_batch job (the photos of one rash).
+"""
+import hashlib
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from multiprocessing.managers import BaseManager
+from typing import Any, Dict, Optional, Tuple
+
+POOL_ENABLED = os.getenv('CUREVOX_INFERENCE_POOL', 'false').lower() == 'true'
+POOL_PROCESSES = int(os.getenv('CUREVOX_INFERENCE_PROCESSES', 2))
+POOL_THREADS = int(os.getenv('CUREVOX_INFERENCE_THREADS', 1))
+POOL_SOCKET = os.getenv('CUREVOX_INFERENCE_SOCKET', '/tmp/curevox-inference.sock')
+# Stay below gunicorn's 30 s worker timeout
+DEFAULT_DEADLINE_S = float(os.getenv('CUREVOX_INFERENCE_DEADLINE_S', 25))
+CONNECT_TIMEOUT_S = 10.0
+# analyze() arguments that only shape the speech payload, applied in the HTTP worker
+SPEECH_KWARGS = ('defer_speech', 'audio_delivery')
+# Analyzer methods a job may call: analyze(path) or analyze_batch([paths])
+JOB_METHODS = ('analyze', 'analyze_batch')
+
+
+class DeadlineExceeded(Exception):
+    """The job did not finish (or start) before its deadline"""
+
+
+def _authkey() -> bytes:
+    secret = os.getenv('CUREVOX_INFERENCE_AUTHKEY') or os.getenv('SECRET_KEY') or 'curevox-inference'
+    return hashlib.sha256(secret.encode('utf-8')).digest()
+
+
+# ---------------------------------------------------------------------------
+# Pool processes
+# ---------------------------------------------------------------------------
+
+def _init_process(threads: int):
+    """Pin BLAS/OpenMP + torch thread counts, then build and warm up the analyzers"""
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # already set (interop pool started)
+    from analyzers import preload_analyzers, warm_up_worker
+    from utils.warm_up import WARM_UP_ENABLED
+    preload_analyzers()
+    if WARM_UP_ENABLED:
+        warm_up_worker()
+
+
+def _run_job(analysis_type: str, path, kwargs: Dict[str, Any], deadline: float, method: str = 'analyze'):
+    """Runs in a pool process → (result without speech, service_ms)"""
+    if time.time() > deadline:
+        raise DeadlineExceeded(f"{analysis_type} job expired in the queue")
+    if method not in JOB_METHODS:
+        raise ValueError(f"Unknown job method: {method}")
+    start = time.perf_counter()
+    from analyzers import get_analyzer
+    analyzer = get_analyzer(analysis_type)
+    if analyzer is None:
+        raise ValueError(f"Unknown analysis type: {analysis_type}")
+    result = getattr(analyzer, method)(path, speak=False, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+class InferencePool:
+    """Fixed-size process pool with queue / service-time accounting"""
+
+    def __init__(self, processes: int = POOL_PROCESSES, threads: int = POOL_THREADS, history: int = 2048):
+        self.processes = max(1, int(processes))
+        self.threads = max(1, int(threads))
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context('spawn'),  # never fork a process holding torch threads
+            initializer=_init_process,
+            initargs=(self.threads,)
+        )
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._counters = {'submitted': 0, 'completed': 0, 'failed': 0, 'expired': 0}
+        self._service_ms = deque(maxlen=history)
+        self._queue_wait_ms = deque(maxlen=history)
+
+    def _finished(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+
+    def run(self, analysis_type: str, path, kwargs: Dict[str, Any], deadline: float, method: str = 'analyze'):
+        """Submit one job and wait until `deadline` (epoch seconds)"""
+        submitted = time.perf_counter()
+        with self._lock:
+            self._in_flight += 1
+            self._counters['submitted'] += 1
+        future = self._executor.submit(_run_job, analysis_type, path, kwargs, deadline, method)
+        future.add_done_callback(self._finished)
+        try:
+            result, service_ms = future.result(timeout=max(0.0, deadline - time.time()))
+        except (FutureTimeout, DeadlineExceeded):
+            future.cancel()  # no-op if a process already picked it up
+            with self._lock:
+                self._counters['expired'] += 1
+            raise DeadlineExceeded(f"{analysis_type} inference missed its deadline")
+        except Exception:
+            with self._lock:
+                self._counters['failed'] += 1
+            raise
+
+        total_ms = (time.perf_counter() - submitted) * 1000
+        with self._lock:
+            self._counters['completed'] += 1
+            self._service_ms.append(service_ms)
+            self._queue_wait_ms.append(max(0.0, total_ms - service_ms))
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            service = sorted(self._service_ms)
+            waits = sorted(self._queue_wait_ms)
+            in_flight = self._in_flight
+            counters = dict(self._counters)
+
+        def percentile(values, p):
+            if not values:
+                return 0.0
+            return round(values[min(len(values) - 1, int(p / 100 * len(values)))], 3)
+
+        return dict(
+            counters,
+            processes=self.processes,
+            threads_per_process=self.threads,
+            in_flight=in_flight,
+            queue_depth=max(0, in_flight - self.processes),
+            service_p50_ms=percentile(service, 50),
+            service_p99_ms=percentile(service, 99),
+            queue_wait_p50_ms=percentile(waits, 50),
+            queue_wait_p99_ms=percentile(waits, 99)
+        )
+
+    def shutdown(self):
+        # wait=True: the sentinels must reach the processes before the
+        # multiprocessing exit handlers close the call queue
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+# ---------------------------------------------------------------------------
+# Unix-socket server (gunicorn master) and client (HTTP workers)
+# ---------------------------------------------------------------------------
+
+class _PoolServerManager(BaseManager):
+    pass
+
+
+class _PoolClientManager(BaseManager):
+    pass
+
+
+_PoolClientManager.register('get_pool')
+
+
+def serve(address: str = POOL_SOCKET, processes: int = POOL_PROCESSES, threads: int = POOL_THREADS):
+    """Pool server entry point; blocks until the process is terminated"""
+    if os.path.exists(address):
+        os.remove(address)  # stale socket from a previous run
+    # SIGTERM from the gunicorn master → SystemExit, so the pool shuts down cleanly
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    pool = InferencePool(processes, threads)
+    _PoolServerManager.register('get_pool', callable=lambda: pool)
+    manager = _PoolServerManager(address=address, authkey=_authkey())
+    try:
+        manager.get_server().serve_forever()
+    finally:
+        pool.shutdown()
+
+
+def start_server_process(address: str = POOL_SOCKET) -> multiprocessing.Process:
+    """Start the pool server beside the gunicorn master (non-daemonic: it has children)"""
+    process = multiprocessing.get_context('spawn').Process(
+        target=serve, args=(address,), name='curevox-inference', daemon=False
+    )
+    process.start()
+    return process
+
+
+_client: Dict[str, Any] = {'pid': None, 'pool': None}
+_client_lock = threading.Lock()
+
+
+def _connect(address: str = POOL_SOCKET, wait_s: float = CONNECT_TIMEOUT_S):
+    """Proxy to the shared pool, (re)connecting once per worker process;
+    retries for up to `wait_s` while the server is still starting"""
+    if _client['pid'] == os.getpid():
+        return _client['pool']
+    with _client_lock:
+        if _client['pid'] != os.getpid():
+            give_up = time.monotonic() + wait_s
+            while True:
+                try:
+                    manager = _PoolClientManager(address=address, authkey=_authkey())
+                    manager.connect()
+                    break
+                except (FileNotFoundError, ConnectionRefusedError):
+                    if time.monotonic() > give_up:
+                        raise
+                    time.sleep(0.1)  # server still starting
+            _client['pool'] = manager.get_pool()
+            _client['pid'] = os.getpid()
+    return _client['pool']
+
+
+def run_analysis(analysis_type: str, path: str, deadline_s: Optional[float] = None,
+                 digest: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+    """analyzer.analyze(path, **kwargs) in the inference pool, or inline without
+    one; identical uploads are answered from this worker's result cache"""
+    if not POOL_ENABLED:
+        from analyzers import analyze_cached
+        return analyze_cached(analysis_type, path, digest=digest, **kwargs)
+
+    from utils.result_cache import RESULT_CACHE_ENABLED, content_hash
+    if RESULT_CACHE_ENABLED:
+        digest = digest or content_hash(path)
+    # The digest travels with the job, so the pool process never re-hashes
+    # the upload for its feature store
+    return _run_pooled(analysis_type, path, digest, 'digest', deadline_s, kwargs)
+
+
+def run_batch_analysis(analysis_type: str, paths: list, deadline_s: Optional[float] = None,
+                       digests: Optional[list] = None, **kwargs) -> Dict[str, Any]:
+    """analyzer.analyze_batch(paths, **kwargs) as one inference-pool job (one
+    batched model pass), or inline without one; result-cached per ordered batch"""
+    if not POOL_ENABLED:
+        from analyzers import analyze_batch_cached
+        return analyze_batch_cached(analysis_type, paths, digests=digests, **kwargs)
+
+    from utils.result_cache import RESULT_CACHE_ENABLED, content_hash
+    if RESULT_CACHE_ENABLED:
+        digests = [digest or content_hash(path) for path, digest in zip(paths, digests or [None] * len(paths))]
+    return _run_pooled(analysis_type, paths, digests, 'digests', deadline_s, kwargs, method='analyze_batch')
+
+
+def _run_pooled(analysis_type: str, source, digest, digest_kwarg: str, deadline_s: Optional[float],
+                kwargs: Dict[str, Any], method: str = 'analyze') -> Dict[str, Any]:
+    """One pool job behind this worker's result cache, speech added afterwards"""
+    from analyzers import get_tts, reissue
+    from utils.result_cache import RESULT_CACHE_ENABLED, analysis_key, batch_digest, get_result_cache
+    deadline = time.time() + (deadline_s if deadline_s is not None else DEFAULT_DEADLINE_S)
+    speech = {name: kwargs.pop(name) for name in SPEECH_KWARGS if name in kwargs}
+    job = dict(kwargs, **{digest_kwarg: digest})
+    if not RESULT_CACHE_ENABLED:
+        result, cached = _connect().run(analysis_type, source, job, deadline, method), False
+    else:
+        options = {name: value for name, value in kwargs.items() if name != 'user_lang'}
+        if method == 'analyze_batch':
+            digest, options['images'] = batch_digest(digest), len(source)
+        key = analysis_key(source, analysis_type, kwargs.get('user_lang', 'en'), digest, **options)
+        result, cached = get_result_cache().get_or_compute(
+            key, lambda: _connect().run(analysis_type, source, job, deadline, method)
+        )
+        if cached:
+            result = reissue(result)
+    # Speech is synthesised (or scheduled) here, off the inference processes
+    return dict(result, cached=cached, speech=get_tts().speak_analysis(
+        result, kwargs.get('user_lang', 'en'),
+        deferred=speech.get('defer_speech'), delivery=speech.get('audio_delivery')
+    ))
+
+
+_fan_out: Dict[str, Any] = {'pid': None, 'executor': None}
+
+
+def run_analyses(jobs: Dict[str, Tuple[str, str, Optional[str]]], deadline_s: Optional[float] = None,
+                 **kwargs) -> Dict[str, Dict[str, Any]]:
+    """Several run_analysis calls at once, sharing one deadline:
+    {name: (analysis_type, path, digest)} → {name: result}. Latency is the
+    slowest job's, not the sum; the first failure is re-raised."""
+    if _fan_out['pid'] != os.getpid():
+        with _client_lock:
+            if _fan_out['pid'] != os.getpid():
+                _fan_out['executor'] = ThreadPoolExecutor(max_workers=4, thread_name_prefix='curevox-fan-out')
+                _fan_out['pid'] = os.getpid()
+    deadline = time.time() + (deadline_s if deadline_s is not None else DEFAULT_DEADLINE_S)
+    futures = {
+        name: _fan_out['executor'].submit(run_analysis, analysis_type, path,
+                                          deadline_s=max(0.0, deadline - time.time()), digest=digest, **kwargs)
+        for name, (analysis_type, path, digest) in jobs.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Queue depth + service / queue-wait percentiles of the shared pool;
+    never waits for a server that is down (one connect attempt)"""
+    if not POOL_ENABLED:
+        return {'enabled': False}
+    try:
+        return dict(_connect(wait_s=0).stats(), enabled=True)
+    except Exception as e:
+        return {'enabled': True, 'error': str(e)}
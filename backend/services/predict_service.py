@@ -1,15 +1,27 @@
 # services/predict_service.py
 import json
 from utils.predict_utils import safe_text_classify, safe_audio_check
+from utils.result_cache import RESULT_CACHE_ENABLED, content_hash, get_result_cache, result_key
 
 def analyze_symptoms(symptoms_text: str):
     # Simple deterministic mock classification
     return safe_text_classify(symptoms_text)
 
+def _cached_audio_check(filestorage, mode):
+    # Retried uploads (same bytes) are answered from the result cache
+    if not RESULT_CACHE_ENABLED:
+        return safe_audio_check(filestorage, mode=mode)
+    digest = content_hash(filestorage)
+    result, _ = get_result_cache().get_or_compute(
+        result_key(digest, mode, "heuristic"),
+        lambda: safe_audio_check(filestorage, mode=mode, digest=digest)
+    )
+    return result
+
 def analyze_cough(filestorage):
     # filestorage is werkzeug FileStorage
     # Save temporarily and run quick heuristic (placeholder)
-    return safe_audio_check(filestorage, mode="cough")
+    return _cached_audio_check(filestorage, "cough")
 
 def analyze_breath(filestorage):
-    return safe_audio_check(filestorage, mode="breath")
+    return _cached_audio_check(filestorage, "breath")
@@ -1,16 +1,14 @@
 # services/rash_service.py
-from PIL import Image
-import io
+from utils.image_io import load_rgb
+from utils.color_stats import compute_color_stats
 
 def analyze_rash_image(filestorage):
     # returns a simple analysis using average redness
-    img = Image.open(filestorage.stream).convert("RGB").resize((200,200))
-    pixels = list(img.getdata())
-    avg_r = sum([p[0] for p in pixels]) / len(pixels)
-    avg_g = sum([p[1] for p in pixels]) / len(pixels)
-    avg_b = sum([p[2] for p in pixels]) / len(pixels)
+    decoded = load_rgb(filestorage.stream, max_side=200)
+    stats = compute_color_stats(decoded.pixels)
+    avg_r, avg_g, avg_b = stats.avg_r, stats.avg_g, stats.avg_b
     # heuristic: if red is significantly higher than green/blue -> inflammation
-    red_score = max(0, (avg_r - (avg_g+avg_b)/2))
+    red_score = stats.redness_score
     severity = "normal"
     if red_score > 25:
         severity = "mild redness"
@@ -18,4 +16,5 @@ def analyze_rash_image(filestorage):
         severity = "moderate redness"
     if red_score > 80:
         severity = "severe redness - recommend consult"
-    return {"avg_r": round(avg_r,1), "avg_g": round(avg_g,1), "avg_b": round(avg_b,1), "severity": severity}
+    return {"avg_r": round(avg_r,1), "avg_g": round(avg_g,1), "avg_b": round(avg_b,1), "severity": severity,
+            "skin_ratio": round(stats.skin_ratio, 4), "decode_ms": round(decoded.decode_ms, 3), "decode_peak_mb": decoded.decode_peak_mb}
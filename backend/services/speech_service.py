@@ -0,0 +1,106 @@
+# services/speech_service.py
+"""
+Deferred speech synthesis.
+Analyses return a speech id (the clip's TTS cache key) straight away and
+the clip is produced in a background thread pool, or by a Celery worker
+when CUREVOX_SPEECH_BACKEND=celery. Progress lives in the shared disk
+cache, so any gunicorn worker can answer /api/speech/<id>.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+
+from utils.tts_cache import PENDING, READY, TTSCache, get_default_cache, speech_key
+
+logger = logging.getLogger(__name__)
+
+SPEECH_BACKEND = os.getenv('CUREVOX_SPEECH_BACKEND', 'threads')  # threads | celery
+SPEECH_WORKERS = int(os.getenv('CUREVOX_SPEECH_WORKERS', 2))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+_in_flight: Dict[str, object] = {}
+
+
+def synthesize_mp3(text: str, lang: str) -> bytes:
+    """One gTTS round-trip → MP3 bytes"""
+    from gtts import gTTS
+    tts = gTTS(text=text, lang=lang, slow=False)
+    audio_buffer = io.BytesIO()
+    tts.write_to_fp(audio_buffer)
+    return audio_buffer.getvalue()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=SPEECH_WORKERS, thread_name_prefix='curevox-speech')
+                _executor_pid = os.getpid()
+                _in_flight.clear()
+    return _executor
+
+
+def run_synthesis(text: str, lang: str, fmt: str = 'mp3', cache: Optional[TTSCache] = None) -> str:
+    """Synthesise into the cache (worker side of a deferred job)"""
+    cache = cache or get_default_cache()
+    key = speech_key(text, lang, fmt)
+    try:
+        cache.get_or_create(text, lang, fmt, lambda: synthesize_mp3(text, lang))
+    except Exception as e:
+        logger.error(f"Speech synthesis failed for {key[:12]}: {str(e)}")
+        cache.mark_failed(key, str(e))
+        raise
+    return key
+
+
+def schedule_speech(text: str, lang: str, fmt: str = 'mp3', cache: Optional[TTSCache] = None) -> Dict[str, str]:
+    """Queue synthesis unless the clip already exists → {'speech_id', 'status'}"""
+    cache = cache or get_default_cache()
+    key = speech_key(text, lang, fmt)
+    if cache.status(key, fmt) == READY:
+        return {'speech_id': key, 'status': READY}
+
+    executor = _get_executor()  # also resets in-flight bookkeeping after a fork
+    with _executor_lock:
+        if key in _in_flight:
+            return {'speech_id': key, 'status': PENDING}
+        cache.mark_pending(key)
+        if SPEECH_BACKEND != 'celery':
+            future = executor.submit(run_synthesis, text, lang, fmt, cache)
+            _in_flight[key] = future
+            future.add_done_callback(lambda _: _in_flight.pop(key, None))
+            return {'speech_id': key, 'status': PENDING}
+
+    # Outside the lock: an unreachable broker must not stall every scheduler.
+    # The disk markers carry the job state from here on.
+    from celery_worker import synthesize_speech_task
+    try:
+        synthesize_speech_task.delay(text, lang, fmt)
+    except Exception as e:
+        cache.mark_failed(key, str(e))
+        raise
+    return {'speech_id': key, 'status': PENDING}
+
+
+def speech_status(speech_id: str, fmt: str = 'mp3') -> str:
+    cache = get_default_cache()
+    status = cache.status(speech_id, fmt)
+    if status != READY and speech_id in _in_flight:
+        return PENDING
+    return status
+
+
+DELIVERY_MODES = ('base64', 'url')
+
+
+def audio_delivery_from_request(req) -> Optional[str]:
+    """Per-request opt-in: ?audio_delivery=url (query or form) or an
+    X-Audio-Delivery header; None falls back to CUREVOX_AUDIO_DELIVERY"""
+    value = (req.values.get('audio_delivery') or req.headers.get('X-Audio-Delivery') or '').strip().lower()
+    return value if value in DELIVERY_MODES else None
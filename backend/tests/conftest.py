@@ -0,0 +1,6 @@
+# tests/conftest.py
+import os
+import sys
+
+# Tests import backend modules the way app.py does (from utils..., services...)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
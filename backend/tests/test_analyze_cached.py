@@ -0,0 +1,93 @@
+# tests/test_analyze_cached.py
+import pytest
+
+pytest.importorskip('numpy')
+
+import analyzers  # noqa: E402
+from services import inference_pool  # noqa: E402
+
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.calls = 0
+
+    def analyze(self, path, user_lang='en', digest=None, **kwargs):
+        self.calls += 1
+        return {'analysis_id': 'RASH_0000abcd', 'type': 'rash', 'risk_level': 'low', 'confidence': 0.9}
+
+    def analyze_batch(self, paths, user_lang='en', digests=None, **kwargs):
+        self.calls += 1
+        images = [{'analysis_id': f'RASH_{index:08d}', 'type': 'rash'} for index, _ in enumerate(paths)]
+        return {'analysis_id': 'RASH_0000abcd', 'type': 'rash', 'images': images}
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    analyzer = FakeAnalyzer()
+    monkeypatch.setattr(analyzers, 'get_analyzer', lambda analysis_type: analyzer)
+    return analyzer
+
+
+def test_cache_off_result_still_says_not_cached(monkeypatch, fake, tmp_path):
+    monkeypatch.setattr(analyzers, 'RESULT_CACHE_ENABLED', False)
+    monkeypatch.setattr(inference_pool, 'POOL_ENABLED', False)
+    upload = tmp_path / 'rash.jpg'
+    upload.write_bytes(b'jpeg')
+    for _ in range(2):
+        result = inference_pool.run_analysis('rash', str(upload), digest='ab' * 20)
+        assert result['cached'] is False
+    assert fake.calls == 2
+
+
+def test_cache_hit_gets_a_fresh_analysis_id(monkeypatch, fake, tmp_path):
+    monkeypatch.setattr(analyzers, 'RESULT_CACHE_ENABLED', True)
+    monkeypatch.setattr(analyzers, 'analysis_key', lambda path, analysis_type, lang, digest: (digest, analysis_type))
+    analyzers.get_result_cache().clear()
+    upload = tmp_path / 'rash.jpg'
+    upload.write_bytes(b'jpeg')
+    first = analyzers.analyze_cached('rash', str(upload), digest='cd' * 20)
+    second = analyzers.analyze_cached('rash', str(upload), digest='cd' * 20)
+    assert (first['cached'], second['cached']) == (False, True)
+    assert fake.calls == 1
+    assert second['analysis_id'].startswith('RASH_') and second['analysis_id'] != first['analysis_id']
+
+
+def test_batch_cache_hit_reissues_every_image(monkeypatch, fake, tmp_path):
+    monkeypatch.setattr(analyzers, 'RESULT_CACHE_ENABLED', True)
+    monkeypatch.setattr(analyzers, 'analysis_key',
+                        lambda paths, analysis_type, lang, digest, **options: (digest, analysis_type, options['images']))
+    analyzers.get_result_cache().clear()
+    paths = [str(tmp_path / name) for name in ('a.jpg', 'b.jpg')]
+    first = analyzers.analyze_batch_cached('rash', paths, digests=['ab' * 20, 'cd' * 20])
+    second = analyzers.analyze_batch_cached('rash', paths, digests=['ab' * 20, 'cd' * 20])
+    swapped = analyzers.analyze_batch_cached('rash', paths[::-1], digests=['cd' * 20, 'ab' * 20])
+    assert (first['cached'], second['cached'], swapped['cached']) == (False, True, False)
+    assert fake.calls == 2
+    old_ids = {image['analysis_id'] for image in first['images']}
+    assert not old_ids & {image['analysis_id'] for image in second['images']}
+
+
+class FakePool:
+    def __init__(self):
+        self.jobs = []
+
+    def run(self, analysis_type, source, kwargs, deadline, method='analyze'):
+        self.jobs.append((method, source, kwargs))
+        return {'analysis_id': 'RASH_0000abcd', 'type': 'rash', 'images': [{}] * len(source)}
+
+
+class FakeTTS:
+    def speak_analysis(self, result, user_lang, deferred=None, delivery=None):
+        return {'delivery': delivery}
+
+
+def test_pooled_batch_is_one_job_with_speech_added_here(monkeypatch):
+    pool = FakePool()
+    monkeypatch.setattr(inference_pool, 'POOL_ENABLED', True)
+    monkeypatch.setattr(inference_pool, '_connect', lambda: pool)
+    monkeypatch.setattr(analyzers, 'get_tts', lambda: FakeTTS())
+    monkeypatch.setattr('utils.result_cache.RESULT_CACHE_ENABLED', False)
+    result = inference_pool.run_batch_analysis('rash', ['a.jpg', 'b.jpg'], digests=['ab' * 20, 'cd' * 20],
+                                               user_lang='en', audio_delivery='url')
+    assert pool.jobs == [('analyze_batch', ['a.jpg', 'b.jpg'], {'user_lang': 'en', 'digests': ['ab' * 20, 'cd' * 20]})]
+    assert result['cached'] is False and result['speech'] == {'delivery': 'url'}
@@ -0,0 +1,78 @@
+# tests/test_audio_io.py
+import io
+import struct
+
+import pytest
+
+pytest.importorskip('numpy')
+
+from utils import audio_io  # noqa: E402
+
+
+def riff(*chunks, declared=None):
+    body = b'WAVE' + b''.join(chunks)
+    return b'RIFF' + struct.pack('<I', declared if declared is not None else len(body)) + body
+
+
+def chunk(chunk_id, payload, declared=None):
+    size = declared if declared is not None else len(payload)
+    return chunk_id + struct.pack('<I', size) + payload + (b'\0' if len(payload) & 1 else b'')
+
+
+def fmt_chunk(tag=1, channels=1, rate=16000, bits=16, extensible_tag=None):
+    block_align = channels * bits // 8
+    payload = struct.pack('<HHIIHH', tag, channels, rate, rate * block_align, block_align, bits)
+    if extensible_tag is not None:
+        payload += struct.pack('<HHI', 22, bits, 0) + struct.pack('<H', extensible_tag) + b'\0' * 14
+    return chunk(b'fmt ', payload)
+
+
+def test_pcm16_layout():
+    samples = struct.pack('<4h', 0, 1000, -1000, 32767)
+    layout = audio_io.parse_wav_header(io.BytesIO(riff(fmt_chunk(), chunk(b'data', samples))))
+    assert layout.sample_rate == 16000 and layout.channels == 1 and layout.frames == 4
+    assert layout.dtype.itemsize == 2 and layout.data_offset == 44
+
+
+def test_skips_unknown_chunks_and_odd_padding():
+    data = riff(fmt_chunk(channels=2), chunk(b'LIST', b'abc'), chunk(b'data', b'\0' * 8))
+    layout = audio_io.parse_wav_header(io.BytesIO(data))
+    assert layout.channels == 2 and layout.frames == 2
+
+
+def test_extensible_float():
+    data = riff(fmt_chunk(tag=0xFFFE, bits=32, extensible_tag=3), chunk(b'data', b'\0' * 16))
+    layout = audio_io.parse_wav_header(io.BytesIO(data))
+    assert layout.dtype.kind == 'f' and layout.frames == 4
+
+
+def test_truncated_data_size_trusts_file_length():
+    data = riff(fmt_chunk(), chunk(b'data', b'\0' * 6, declared=0xFFFFFFFF))
+    assert audio_io.parse_wav_header(io.BytesIO(data)).frames == 3
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    b'RIFF\0\0\0\0WAVX',
+    riff(chunk(b'data', b'\0' * 4)),                     # data before fmt
+    riff(chunk(b'fmt ', b'\x01\0\x01\0')),               # truncated fmt chunk
+    riff(chunk(b'fmt ', b'\x01\0\x01\0'), chunk(b'data', b'\0' * 4)),
+    riff(fmt_chunk(bits=24), chunk(b'data', b'\0' * 6)),  # 24-bit → decoder fallback
+    riff(fmt_chunk()),                                   # no data chunk
+])
+def test_unmappable_headers_return_none(data):
+    assert audio_io.parse_wav_header(io.BytesIO(data)) is None
+
+
+def test_wav_view_and_probe_of_truncated_fmt_fall_back():
+    data = riff(chunk(b'fmt ', b'\x01\0\x01\0'), chunk(b'data', b'\0' * 4))
+    assert audio_io.wav_view(data) is None
+    assert audio_io.probe(data) is None
+
+
+def test_to_float_mono_scales_and_downmixes():
+    np = pytest.importorskip('numpy')
+    stereo = np.array([[32767, -32767], [16384, 16384]], dtype=np.int16)
+    np.testing.assert_allclose(audio_io.to_float_mono(stereo), [0.0, 16384 / 32767], atol=1e-6)
+    unsigned = np.array([[128], [255]], dtype=np.uint8)
+    np.testing.assert_allclose(audio_io.to_float_mono(unsigned), [0.0, 127 / 128], atol=1e-6)
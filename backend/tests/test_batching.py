@@ -0,0 +1,28 @@
+# tests/test_batching.py
+import pytest
+
+torch = pytest.importorskip('torch')
+
+from services.batching import LOG_MEL_FLOOR, MicroBatcher, fit_frames  # noqa: E402
+
+
+def test_fit_frames_crops_and_pads():
+    log_mel = torch.zeros(1, 4, 5)
+    assert fit_frames(log_mel, 3).shape == (1, 4, 3)
+    padded = fit_frames(log_mel, 8)
+    assert padded.shape == (1, 4, 8)
+    assert torch.all(padded[..., 5:] == LOG_MEL_FLOOR)
+
+
+def test_fitted_events_share_one_forward_pass():
+    batch_sizes = []
+
+    def forward(batch, lengths):
+        batch_sizes.append(len(lengths))
+        return batch.mean(dim=(1, 2, 3)).tolist()
+
+    batcher = MicroBatcher(forward, max_batch_size=8)
+    events = [torch.randn(1, 4, frames) for frames in (7, 12, 20, 3)]
+    scores = batcher.infer_many([fit_frames(event, 20) for event in events])
+    assert batch_sizes == [4]
+    assert len(scores) == 4
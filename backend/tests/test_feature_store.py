@@ -0,0 +1,64 @@
+# tests/test_feature_store.py
+from datetime import datetime, timedelta
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from utils.feature_store import FeatureStore, feature_config  # noqa: E402
+
+CONFIG = feature_config('log_mel', rate=16000, n_mels=4)
+
+
+def make_store(tmp_path, **bounds):
+    return FeatureStore(root=str(tmp_path / 'features'), **bounds)
+
+
+def test_index_lives_next_to_the_arrays(tmp_path):
+    store = make_store(tmp_path)
+    assert store.index_path == str(tmp_path / 'features' / 'index.sqlite')
+
+
+def test_get_or_compute_stores_once(tmp_path):
+    store = make_store(tmp_path)
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return np.ones((4, 3), np.float32), {'trimmed_seconds': 0.5}
+
+    first = store.get_or_compute('ab' * 20, 'log_mel', CONFIG, compute)
+    second = store.get_or_compute('ab' * 20, 'log_mel', CONFIG, compute)
+    assert len(calls) == 1
+    assert first[2] is False and second[2] is True
+    assert second[1] == {'trimmed_seconds': 0.5}
+    np.testing.assert_array_equal(second[0], np.ones((4, 3)))
+
+
+def test_prune_drops_expired_entries(tmp_path):
+    store = make_store(tmp_path, max_age_days=1, max_bytes=None)
+    path = store.put('cd' * 20, 'log_mel', CONFIG, np.zeros((4, 3)))
+    assert store.prune(now=datetime.utcnow() + timedelta(days=2)) == 1
+    assert store.get('cd' * 20, 'log_mel', CONFIG) is None
+    assert not (tmp_path / path).exists()
+
+
+def test_prune_keeps_newest_within_byte_budget(tmp_path):
+    # float16 (4, 3) arrays are 24 bytes each
+    store = make_store(tmp_path, max_age_days=None, max_bytes=50)
+    digests = [f'{i:02d}' * 20 for i in range(3)]
+    for digest in digests:
+        store.put(digest, 'log_mel', CONFIG, np.zeros((4, 3)))
+    store.prune()
+    assert store.get(digests[0], 'log_mel', CONFIG) is None
+    assert store.get(digests[1], 'log_mel', CONFIG) is not None
+    assert store.get(digests[2], 'log_mel', CONFIG) is not None
+
+
+def test_delete_removes_every_feature_of_an_upload(tmp_path):
+    store = make_store(tmp_path)
+    other = feature_config('cough_log_mel', rate=16000, n_mels=4)
+    store.put('ef' * 20, 'log_mel', CONFIG, np.zeros((4, 3)))
+    store.put('ef' * 20, 'cough_log_mel', other, np.zeros((4, 2)))
+    assert store.delete('ef' * 20) == 2
+    assert list(store.iter_features('log_mel', CONFIG)) == []
@@ -0,0 +1,31 @@
+# tests/test_image_io.py
+import io
+
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from utils.image_io import load_rgb  # noqa: E402
+
+
+def encode(size, fmt='JPEG', mode='RGB'):
+    buffer = io.BytesIO()
+    Image.new(mode, size, 128).save(buffer, fmt)
+    buffer.seek(0)
+    return buffer
+
+
+def test_large_jpeg_decodes_bounded():
+    decoded = load_rgb(encode((4032, 3024)), max_side=512)
+    assert decoded.pixels.shape == (384, 512, 3)
+    assert decoded.original_size == (4032, 3024)
+    # Draft-scale decode: never a full-size 12 MP raster (~46 MB as RGBX)
+    assert decoded.decode_peak_mb < 4
+
+
+def test_decode_peak_is_per_image():
+    small = load_rgb(encode((320, 240)), max_side=512)
+    large = load_rgb(encode((2000, 2000), fmt='PNG'), max_side=512)
+    assert small.decode_peak_mb < large.decode_peak_mb
+    # Measured again after the large decode, the small image reports the same figure
+    assert load_rgb(encode((320, 240)), max_side=512).decode_peak_mb == small.decode_peak_mb
@@ -0,0 +1,53 @@
+# tests/test_medical_translator.py
+import json
+import os
+import re
+
+import pytest
+
+from utils.medical_translator import PHRASE_DIR, MedicalTranslator, phrase_pattern
+
+INSIGHTS = [
+    'Normal respiratory patterns detected. No acute concerns.',
+    'Mild respiratory irregularity observed. Monitor symptoms.',
+    'Significant respiratory abnormality. Immediate medical attention required.',
+    'Normal cough pattern detected. No concerning respiratory indicators.',
+    'Skin condition detected: Eczema. Keep area clean and monitor.',
+    'I understand your symptoms. Please continue monitoring and consult a specialist if symptoms persist.',
+]
+LANGUAGES = sorted(name[:-5] for name in os.listdir(PHRASE_DIR) if name.endswith('.json'))
+
+
+def load_table(lang):
+    with open(os.path.join(PHRASE_DIR, f'{lang}.json'), encoding='utf-8') as fp:
+        return json.load(fp)
+
+
+def legacy_translate(english_text, table):
+    """_translate_medical before the compiled tables: one str.replace per phrase"""
+    for eng, trans in table.items():
+        english_text = english_text.replace(eng, trans)
+    return english_text
+
+
+@pytest.mark.parametrize('lang', LANGUAGES)
+def test_matches_replace_loop(lang):
+    table = load_table(lang)
+    translator = MedicalTranslator({lang: table})
+    for text in INSIGHTS + [' '.join(INSIGHTS)]:
+        assert translator.translate(text, lang) == legacy_translate(text, table)
+
+
+def test_unknown_language_is_untouched():
+    assert MedicalTranslator({}).translate(INSIGHTS[0], 'xx') == INSIGHTS[0]
+
+
+def test_longest_phrase_wins():
+    translator = MedicalTranslator({'xx': {'chest': 'A', 'chest pain': 'B', 'pain': 'C'}})
+    assert translator.translate('chest pain, chest, pain', 'xx') == 'B, A, C'
+
+
+def test_pattern_escapes_and_backtracks():
+    pattern = re.compile(phrase_pattern(['a.b', 'a.bc', 'a']))
+    assert pattern.findall('a.bc a.b axb a') == ['a.bc', 'a.b', 'a', 'a']
+    assert phrase_pattern([]) == ''
@@ -0,0 +1,69 @@
+# tests/test_symptom_classifier.py
+import pytest
+
+from utils.symptom_classifier import SymptomClassifier
+
+# One realistic message per lexicon: (lang, text, expected tags, expected severity)
+SENTENCES = [
+    ('en', 'I have been coughing up phlegm for three days and had chills last night.', ['cough', 'fever'], 'low'),
+    ('hi', 'मुझे तीन दिन से खांसी और बुखार है, रात में सांस फूलती है।', ['cough', 'fever'], 'high'),
+    ('ta', 'எனக்கு இருமல் மற்றும் காய்ச்சல் இருக்கிறது.', ['cough', 'fever'], 'low'),
+    ('es', 'Tengo tos y fiebre desde ayer, y un poco de dificultad para respirar.', ['cough', 'fever'], 'high'),
+    ('fr', "J'ai de la fièvre et une éruption sur la peau depuis hier soir.", ['fever', 'rash'], 'low'),
+    ('ar', 'أعاني من السعال والحمى منذ يومين', ['cough', 'fever'], 'low'),
+    ('ar', 'ابني عنده طفح على الجلد وحكة شديدة', ['rash'], 'high'),
+    ('zh', '我咳嗽三天了，昨天晚上开始发烧。', ['cough', 'fever'], 'low'),
+    ('ja', '三日前から咳が出ていて、昨日から熱があります。', ['cough', 'fever'], 'low'),
+    ('ko', '사흘째 기침이 나고 어제부터 열이 나요.', ['cough', 'fever'], 'low'),
+    ('de', 'Ich habe seit gestern Husten und starkes Fieber.', ['cough', 'fever'], 'high'),
+    ('it', 'Ho la tosse e la febbre da due giorni.', ['cough', 'fever'], 'low'),
+    ('pt', 'Estou com tosse e febre desde ontem e sinto falta de ar.', ['cough', 'fever'], 'high'),
+    ('ru', 'У меня сильный кашель и высокая температура уже три дня.', ['cough', 'fever'], 'high'),
+    ('mr', 'मला दोन दिवसांपासून खोकला आणि ताप आहे.', ['cough', 'fever'], 'low'),
+    ('te', 'నాకు రెండు రోజులుగా దగ్గు మరియు జ్వరం ఉంది.', ['cough', 'fever'], 'low'),
+    ('kn', 'ನನಗೆ ಎರಡು ದಿನಗಳಿಂದ ಕೆಮ್ಮು ಮತ್ತು ಜ್ವರ ಇದೆ.', ['cough', 'fever'], 'low'),
+    ('ml', 'എനിക്ക് രണ്ട് ദിവസമായി ചുമയും പനിയും ഉണ്ട്.', ['cough', 'fever'], 'low'),
+    ('bn', 'আমার দুই দিন ধরে কাশি আর জ্বর হচ্ছে।', ['cough', 'fever'], 'low'),
+]
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return SymptomClassifier.from_directory()
+
+
+@pytest.mark.parametrize('lang,text,tags,severity', SENTENCES, ids=[f'{s[0]}-{i}' for i, s in enumerate(SENTENCES)])
+def test_realistic_sentence(classifier, lang, text, tags, severity):
+    result = classifier.classify(text)
+    assert result['tags'] == tags
+    assert result['severity'] == severity
+    assert lang in result['languages']
+
+
+def test_every_lexicon_has_a_sentence(classifier):
+    assert set(classifier.languages) == {lang for lang, *_ in SENTENCES}
+
+
+def test_word_start_rejects_mid_word_match(classifier):
+    # "skin" inside "pumpkins" is not a rash mention
+    assert classifier.classify('We carved pumpkins yesterday')['tags'] == ['general']
+
+
+@pytest.mark.parametrize('text', [
+    'I tossed and turned all night',     # it/pt "tosse"
+    'The pelletier family moved in',     # it "pelle"
+    'Our hautboy teacher is strict',     # de "haut"
+    'احفظ الملف في مجلد جديد',           # "جلد" inside "مجلد" (folder)
+], ids=['tosse', 'pelle', 'haut', 'ar-folder'])
+def test_other_languages_stems_do_not_fire(classifier, text):
+    result = classifier.classify(text)
+    assert result['tags'] == ['general']
+
+
+def test_arabic_clitics_still_match(classifier):
+    assert classifier.classify('وبالجلد حكة')['tags'] == ['rash']
+
+
+def test_unmatched_text_is_general():
+    result = SymptomClassifier({}).classify('hello')
+    assert result == {'tags': ['general'], 'severity': 'low', 'score': 0, 'languages': [], 'raw': 'hello'}
@@ -0,0 +1,51 @@
+# tests/test_tts_cache.py
+import os
+import time
+
+from utils import tts_cache
+from utils.tts_cache import FAILED, PENDING, READY, UNKNOWN, TTSCache, speech_key
+
+
+def test_put_then_status_ready(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), memory_budget_bytes=0)
+    key = speech_key('Normal cough pattern detected.', 'en')
+    assert cache.status(key) == UNKNOWN
+    cache.mark_pending(key)
+    cache.put(key, b'ID3')
+    assert cache.status(key) == READY
+    assert cache.get(key) == b'ID3'
+
+
+def test_fresh_pending_marker_is_pending(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path))
+    key = speech_key('Monitor symptoms.', 'hi')
+    cache.mark_pending(key)
+    assert cache.status(key) == PENDING
+
+
+def test_stale_pending_marker_reads_as_failed(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path))
+    key = speech_key('Monitor symptoms.', 'ta')
+    cache.mark_pending(key)
+    stale = time.time() - tts_cache.PENDING_TIMEOUT_S - 5
+    os.utime(cache._marker(key, PENDING), (stale, stale))
+    assert cache.status(key) == FAILED
+    # A new job for the same clip starts over
+    cache.mark_pending(key)
+    assert cache.status(key) == PENDING
+
+
+def test_key_ignores_whitespace_and_case_of_lang():
+    assert speech_key('Keep  area\nclean.', 'EN') == speech_key('Keep area clean.', 'en')
+
+
+def test_prune_disk_drops_least_recently_used_clips(tmp_path):
+    cache = TTSCache(cache_dir=str(tmp_path), memory_budget_bytes=0, disk_budget_bytes=250)
+    keys = [speech_key(f'clip {i}', 'en') for i in range(3)]
+    for age, key in zip((300, 200, 100), keys):
+        cache.put(key, b'x' * 100)
+        then = time.time() - age
+        os.utime(cache._path(key, 'mp3'), (then, then))
+    assert cache.prune_disk() == 1
+    assert cache.path_for(keys[0]) is None
+    assert cache.path_for(keys[1]) is not None and cache.path_for(keys[2]) is not None
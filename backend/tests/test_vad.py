@@ -0,0 +1,48 @@
+# tests/test_vad.py
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from utils import vad  # noqa: E402
+
+RATE = 16000
+
+
+def padded_tone(lead=1.0, body=2.0, tail=1.5, noise=0.001, seed=0):
+    rng = np.random.default_rng(seed)
+    n = int((lead + body + tail) * RATE)
+    y = rng.standard_normal(n).astype(np.float32) * noise
+    t = np.arange(int(body * RATE)) / RATE
+    y[int(lead * RATE):int(lead * RATE) + len(t)] += 0.3 * np.sin(2 * np.pi * 440 * t)
+    return y
+
+
+@pytest.mark.skipif(not vad.VAD_ENABLED, reason='CUREVOX_VAD=false')
+def test_trims_leading_and_trailing_noise():
+    y = padded_tone()
+    trimmed, bounds = vad.trim_silence(y, RATE)
+    pad = vad.VAD_PAD_SECONDS
+    assert bounds.start_seconds == pytest.approx(1.0 - pad, abs=0.03)
+    assert bounds.end / RATE == pytest.approx(3.0 + pad, abs=0.03)
+    assert bounds.removed_seconds == pytest.approx(4.5 - (2.0 + 2 * pad), abs=0.05)
+    assert len(trimmed) == bounds.end - bounds.start
+
+
+def test_constant_level_recording_is_left_whole():
+    y = np.full(2 * RATE, 0.1, dtype=np.float32)
+    trimmed, bounds = vad.trim_silence(y, RATE)
+    assert (bounds.start, bounds.end, bounds.total) == (0, len(y), len(y))
+    assert len(trimmed) == len(y)
+
+
+def test_signal_at_the_edges_is_not_cut():
+    y = padded_tone(lead=0.0, tail=0.0)
+    _, bounds = vad.trim_silence(y, RATE)
+    assert (bounds.start, bounds.end) == (0, len(y))
+
+
+def test_frame_energy_keeps_partial_last_frame():
+    frame = vad.frame_length(RATE)
+    energy = vad.frame_energy_db(np.ones(frame * 3 + 5, dtype=np.float32), frame)
+    assert energy.shape == (4,)
+    np.testing.assert_allclose(energy, 0.0, atol=1e-4)
@@ -0,0 +1,178 @@
+# utils/audio_features.py
+"""
+Log-mel feature extraction shared by the audio analyzers.
+Resample kernels and mel filterbanks are built once per
+(source rate, target rate, n_mels) and reused on every call.
+"""
+from __future__ import annotations  # torch annotations must not trigger the lazy import
+
+import os
+import threading
+from typing import Dict, Iterator, Optional, Tuple
+
+from utils import audio_io
+from utils.lazy_imports import lazy_import
+from utils.vad import TrimBounds
+
+torch = lazy_import('torch')
+torchaudio = lazy_import('torchaudio')
+
+
+class MelFeaturePipeline:
+    """Cached resample → mono → log-mel pipeline"""
+
+    def __init__(self, target_rate: int = 16000, n_mels: int = 128):
+        self.target_rate = target_rate
+        self.n_mels = n_mels
+        self._resamplers: Dict[Tuple[int, int], torchaudio.transforms.Resample] = {}
+        self._mel_transforms: Dict[Tuple[int, int], torchaudio.transforms.MelSpectrogram] = {}
+        self._lock = threading.Lock()
+
+    def resampler(self, source_rate: int, target_rate: int) -> torchaudio.transforms.Resample:
+        key = (source_rate, target_rate)
+        transform = self._resamplers.get(key)
+        if transform is None:
+            with self._lock:
+                transform = self._resamplers.get(key)
+                if transform is None:
+                    transform = torchaudio.transforms.Resample(source_rate, target_rate)
+                    self._resamplers[key] = transform
+        return transform
+
+    def mel_transform(self, sample_rate: int, n_mels: int) -> torchaudio.transforms.MelSpectrogram:
+        key = (sample_rate, n_mels)
+        transform = self._mel_transforms.get(key)
+        if transform is None:
+            with self._lock:
+                transform = self._mel_transforms.get(key)
+                if transform is None:
+                    transform = torchaudio.transforms.MelSpectrogram(
+                        sample_rate=sample_rate, n_mels=n_mels
+                    )
+                    self._mel_transforms[key] = transform
+        return transform
+
+    def to_mono(self, waveform: torch.Tensor) -> torch.Tensor:
+        """(channels, samples) → (1, samples)"""
+        if waveform.dim() == 1:
+            return waveform.unsqueeze(0)
+        if waveform.size(0) > 1:
+            return waveform.mean(dim=0, keepdim=True)
+        return waveform
+
+    def log_mel(self, waveform: torch.Tensor, sample_rate: int,
+                target_rate: Optional[int] = None, n_mels: Optional[int] = None) -> torch.Tensor:
+        """Waveform at any rate/channel count → (1, n_mels, frames) log10 mel"""
+        target_rate = target_rate or self.target_rate
+        n_mels = n_mels or self.n_mels
+
+        with torch.inference_mode():
+            # Downmix first: one resample and one mel instead of one per channel
+            mono = self.to_mono(waveform)
+            if sample_rate != target_rate:
+                mono = self.resampler(sample_rate, target_rate)(mono)
+            mel_spec = self.mel_transform(target_rate, n_mels)(mono)
+            return torch.log10(mel_spec + 1e-9)
+
+    __call__ = log_mel
+
+    def warm_up(self, source_rates=(16000, 44100, 48000)):
+        """Pre-build the transforms for the common upload rates"""
+        for rate in source_rates:
+            self.log_mel(torch.zeros(1, rate // 10), rate)
+
+    def cache_info(self) -> Dict[str, int]:
+        return {'resamplers': len(self._resamplers), 'mel_transforms': len(self._mel_transforms)}
+
+
+# ---------------------------------------------------------------------------
+# Streaming / windowed extraction for long recordings
+# ---------------------------------------------------------------------------
+
+STREAM_CHUNK_SECONDS = float(os.getenv('CUREVOX_STREAM_CHUNK_SECONDS', 5.0))
+STREAM_WINDOW_SECONDS = float(os.getenv('CUREVOX_STREAM_WINDOW_SECONDS', 4.0))
+STREAM_HOP_SECONDS = float(os.getenv('CUREVOX_STREAM_HOP_SECONDS', 2.0))
+# Clips longer than this are analysed window by window instead of in one piece
+STREAM_MIN_SECONDS = float(os.getenv('CUREVOX_STREAM_MIN_SECONDS', 30.0))
+# Compressed files often report no frame count; their length is estimated
+# from the file size at this bitrate instead
+STREAM_ASSUMED_KBPS = float(os.getenv('CUREVOX_STREAM_ASSUMED_KBPS', 128))
+
+
+def should_stream(audio_path: str) -> bool:
+    """Only clips known (or, without a frame count, estimated from the file
+    size) to be longer than STREAM_MIN_SECONDS take the windowed path"""
+    info = audio_io.probe(audio_path)
+    duration = info.duration if info else None
+    if duration is None:
+        try:
+            duration = os.path.getsize(audio_path) * 8 / (STREAM_ASSUMED_KBPS * 1000)
+        except OSError:
+            return False
+    return duration > STREAM_MIN_SECONDS
+
+
+class SampleRingBuffer:
+    """Fixed-capacity mono sample buffer; memory does not grow with clip length"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buffer = torch.zeros(capacity)
+        self.size = 0
+
+    def write(self, samples: torch.Tensor) -> torch.Tensor:
+        """Copy in as many samples as fit, return the remainder"""
+        take = min(self.capacity - self.size, samples.shape[-1])
+        self._buffer[self.size:self.size + take] = samples[:take]
+        self.size += take
+        return samples[take:]
+
+    @property
+    def full(self) -> bool:
+        return self.size == self.capacity
+
+    def view(self) -> torch.Tensor:
+        return self._buffer[:self.size]
+
+    def advance(self, n: int):
+        """Drop the oldest `n` samples, keeping the rest as window overlap"""
+        n = min(n, self.size)
+        keep = self.size - n
+        self._buffer[:keep] = self._buffer[n:self.size].clone()
+        self.size = keep
+
+
+def iter_log_mel_windows(audio_path: str, pipeline: MelFeaturePipeline,
+                         window_seconds: float = STREAM_WINDOW_SECONDS,
+                         hop_seconds: float = STREAM_HOP_SECONDS,
+                         chunk_seconds: float = STREAM_CHUNK_SECONDS,
+                         bounds: Optional[TrimBounds] = None
+                         ) -> Iterator[Tuple[float, torch.Tensor]]:
+    """Yield (window start in seconds, (1, n_mels, frames) log-mel) per window.
+
+    At most one decoded chunk plus one window of samples is alive at a time.
+    With `bounds` only the trimmed range is decoded; start times stay
+    relative to the start of the file.
+    """
+    rate = pipeline.target_rate
+    window = max(1, int(window_seconds * rate))
+    hop = max(1, min(window, int(hop_seconds * rate)))
+    ring = SampleRingBuffer(window)
+    consumed = 0      # samples dropped from the front of the ring so far
+    emitted_until = 0  # absolute sample index covered by the last window
+    lead = bounds.start_seconds if bounds is not None else 0.0
+
+    with torch.inference_mode():
+        for chunk in audio_io.iter_chunks(audio_path, chunk_seconds, target_rate=rate, bounds=bounds):
+            mono = torch.from_numpy(chunk)
+            while mono.numel():
+                mono = ring.write(mono)
+                if ring.full:
+                    yield lead + consumed / rate, pipeline.log_mel(ring.view().unsqueeze(0), rate)
+                    emitted_until = consumed + ring.size
+                    ring.advance(hop)
+                    consumed += hop
+
+        # Tail shorter than a full window that no window has covered yet
+        if consumed + ring.size > emitted_until and ring.size:
+            yield lead + consumed / rate, pipeline.log_mel(ring.view().unsqueeze(0), rate)
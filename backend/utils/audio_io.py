@@ -0,0 +1,284 @@
+# utils/audio_io.py
+"""
+One decode path for every audio upload.
+PCM/float WAV files are read as a memory-mapped numpy view of the data
+chunk (no decode, no copy); mp3/m4a and anything else go through
+torchaudio, then librosa. Everything comes out as 16 kHz mono float32.
+"""
+import hashlib
+import io
+import os
+import struct
+import threading
+from typing import BinaryIO, Iterator, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from utils import vad
+
+TARGET_RATE = 16000
+
+AudioSource = Union[str, os.PathLike, bytes, BinaryIO]
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+_PCM_DTYPES = {8: np.uint8, 16: np.int16, 32: np.int32}
+_FLOAT_DTYPES = {32: np.float32, 64: np.float64}
+
+
+class AudioInfo(NamedTuple):
+    sample_rate: int
+    channels: int
+    frames: int  # 0 when unknown (compressed formats)
+
+    @property
+    def duration(self) -> Optional[float]:
+        return self.frames / self.sample_rate if self.frames and self.sample_rate else None
+
+
+class WavLayout(NamedTuple):
+    sample_rate: int
+    channels: int
+    dtype: np.dtype
+    data_offset: int
+    frames: int
+
+
+def parse_wav_header(fp: BinaryIO) -> Optional[WavLayout]:
+    """Locate fmt/data chunks; None if this is not a WAV we can map directly"""
+    fp.seek(0)
+    riff = fp.read(12)
+    if len(riff) < 12 or riff[:4] != b'RIFF' or riff[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    while True:
+        header = fp.read(8)
+        if len(header) < 8:
+            return None
+        chunk_id, size = header[:4], struct.unpack('<I', header[4:])[0]
+        if chunk_id == b'fmt ':
+            body = fp.read(size + (size & 1))
+            if len(body) < 16:
+                return None  # truncated fmt chunk → decoder fallback
+            tag, channels, rate, _, block_align, bits = struct.unpack('<HHIIHH', body[:16])
+            if tag == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                tag = struct.unpack('<H', body[24:26])[0]
+            fmt = (tag, channels, rate, block_align, bits)
+        elif chunk_id == b'data':
+            if fmt is None:
+                return None
+            tag, channels, rate, block_align, bits = fmt
+            dtypes = _PCM_DTYPES if tag == _WAVE_FORMAT_PCM else (
+                _FLOAT_DTYPES if tag == _WAVE_FORMAT_IEEE_FLOAT else {})
+            dtype = dtypes.get(bits)
+            if dtype is None or block_align != channels * bits // 8:
+                return None  # 24-bit, A-law, ADPCM... → decoder fallback
+            data_offset = fp.tell()
+            # Streamed/truncated files carry a bogus data size; trust the file length
+            available = fp.seek(0, io.SEEK_END) - data_offset
+            return WavLayout(rate, channels, np.dtype(dtype).newbyteorder('<'),
+                             data_offset, min(size, available) // block_align)
+        else:
+            fp.seek(size + (size & 1), io.SEEK_CUR)  # chunks are word aligned
+
+
+def wav_view(source: AudioSource) -> Optional[Tuple[np.ndarray, int]]:
+    """Zero-copy (frames, channels) view of a WAV data chunk + sample rate"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fp:
+            layout = parse_wav_header(fp)
+        if layout is None or layout.frames == 0:
+            return None
+        samples = np.memmap(source, dtype=layout.dtype, mode='r', offset=layout.data_offset,
+                            shape=(layout.frames, layout.channels))
+        return samples, layout.sample_rate
+
+    data = _as_bytes(source)
+    layout = parse_wav_header(io.BytesIO(data))
+    if layout is None or layout.frames == 0:
+        return None
+    samples = np.frombuffer(data, dtype=layout.dtype, offset=layout.data_offset,
+                            count=layout.frames * layout.channels)
+    return samples.reshape(layout.frames, layout.channels), layout.sample_rate
+
+
+def probe(source: AudioSource) -> Optional[AudioInfo]:
+    """Header-only metadata; None if the file cannot be read"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fp:
+            layout = parse_wav_header(fp)
+        if layout is not None:
+            return AudioInfo(layout.sample_rate, layout.channels, layout.frames)
+        try:
+            import torchaudio
+            info = torchaudio.info(str(source))
+            return AudioInfo(info.sample_rate, info.num_channels, info.num_frames)
+        except Exception:
+            return None
+
+    layout = parse_wav_header(io.BytesIO(_as_bytes(source)))
+    return AudioInfo(layout.sample_rate, layout.channels, layout.frames) if layout else None
+
+
+def to_float_mono(samples: np.ndarray) -> np.ndarray:
+    """(frames, channels) integer/float view → (frames,) float32 in [-1, 1]"""
+    if samples.dtype == np.uint8:
+        scale, shift = 1 / 128.0, -128.0
+    elif np.issubdtype(samples.dtype, np.integer):
+        scale, shift = 1.0 / np.iinfo(samples.dtype).max, 0.0
+    else:
+        scale, shift = 1.0, 0.0
+
+    # Downmix before the float conversion: one float32 array, not one per channel
+    mono = samples[:, 0] if samples.shape[1] == 1 else samples.mean(axis=1, dtype=np.float32)
+    mono = np.asarray(mono, dtype=np.float32)
+    if shift:
+        mono = mono + shift
+    if scale != 1.0:
+        mono = mono * np.float32(scale)
+    return mono
+
+
+_resamplers = {}
+_resampler_lock = threading.Lock()
+
+
+def resample(mono: np.ndarray, source_rate: int, target_rate: int = TARGET_RATE) -> np.ndarray:
+    """Cached torchaudio Resample on a float32 mono array"""
+    if source_rate == target_rate:
+        return mono
+    import torch
+    import torchaudio
+
+    key = (source_rate, target_rate)
+    transform = _resamplers.get(key)
+    if transform is None:
+        with _resampler_lock:
+            transform = _resamplers.setdefault(key, torchaudio.transforms.Resample(source_rate, target_rate))
+    with torch.inference_mode():
+        return transform(torch.from_numpy(np.ascontiguousarray(mono))).numpy()
+
+
+def decode_native(source: AudioSource, target_rate: int) -> Tuple[np.ndarray, int]:
+    """mp3 / m4a / exotic WAV: torchaudio (ffmpeg/sox) at the file's own
+    rate, then librosa (resampled to `target_rate` while decoding)"""
+    if not isinstance(source, (str, os.PathLike)):
+        source = io.BytesIO(_as_bytes(source))
+    try:
+        import torchaudio
+        waveform, sr = torchaudio.load(source)
+        return waveform.mean(dim=0).numpy().astype(np.float32, copy=False), sr
+    except Exception:
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        import librosa
+        y, _ = librosa.load(source, sr=target_rate, mono=True)
+        return y.astype(np.float32, copy=False), target_rate
+
+
+def _decode_fallback(source: AudioSource, target_rate: int) -> np.ndarray:
+    return resample(*decode_native(source, target_rate), target_rate)
+
+
+def load_audio(source: AudioSource, target_rate: int = TARGET_RATE) -> np.ndarray:
+    """Any upload → (samples,) float32 mono at `target_rate`"""
+    view = wav_view(source)
+    if view is None:
+        return _decode_fallback(source, target_rate)
+    samples, sr = view
+    return resample(to_float_mono(samples), sr, target_rate)
+
+
+def wav_silence_bounds(samples: np.ndarray, sample_rate: int, chunk_seconds: float = 5.0) -> vad.TrimBounds:
+    """Trim bounds of a (frames, channels) WAV view, measured chunk by chunk
+    at the source rate (only per-frame energies are kept)"""
+    frame = vad.frame_length(sample_rate)
+    step = frame * max(1, int(chunk_seconds * sample_rate) // frame)
+    energy_db = np.concatenate([
+        vad.frame_energy_db(to_float_mono(samples[start:start + step]), frame)
+        for start in range(0, samples.shape[0], step)
+    ])
+    return vad.active_bounds(energy_db, frame, samples.shape[0], sample_rate)
+
+
+def silence_bounds(source: Union[str, os.PathLike]) -> Optional[vad.TrimBounds]:
+    """Leading/trailing silence of a WAV file without decoding it whole;
+    None for compressed formats (streamed untrimmed)"""
+    view = wav_view(source)
+    return wav_silence_bounds(*view) if view is not None else None
+
+
+def load_audio_trimmed(source: AudioSource, target_rate: int = TARGET_RATE) -> Tuple[np.ndarray, vad.TrimBounds]:
+    """load_audio with leading/trailing silence cropped at the source rate,
+    before the float conversion and the resampler → (samples, bounds)"""
+    view = wav_view(source)
+    if view is None:
+        mono, sr = decode_native(source, target_rate)
+        mono, bounds = vad.trim_silence(mono, sr)
+        return resample(mono, sr, target_rate), bounds
+    samples, sr = view
+    bounds = wav_silence_bounds(samples, sr)
+    return resample(to_float_mono(samples[bounds.start:bounds.end]), sr, target_rate), bounds
+
+
+def iter_chunks(source: Union[str, os.PathLike], chunk_seconds: float,
+                target_rate: int = TARGET_RATE, bounds: Optional[vad.TrimBounds] = None) -> Iterator[np.ndarray]:
+    """Decode a file `chunk_seconds` at a time → float32 mono chunks at
+    `target_rate`; WAV files are limited to `bounds` (see silence_bounds)"""
+    view = wav_view(source)
+    if view is not None:
+        samples, sr = view
+        if bounds is not None:
+            samples = samples[bounds.start:bounds.end]
+        step = max(1, int(chunk_seconds * sr))
+        for start in range(0, samples.shape[0], step):
+            yield resample(to_float_mono(samples[start:start + step]), sr, target_rate)
+        return
+
+    # Compressed: one sequential decoder pass. Re-opening at frame_offset per
+    # chunk re-decodes mp3 from the start every time (quadratic in length).
+    try:
+        from torchaudio.io import StreamReader
+    except ImportError:
+        StreamReader = None
+    if StreamReader is None:
+        mono, sr = decode_native(source, target_rate)
+        step = max(1, int(chunk_seconds * sr))
+        for start in range(0, mono.shape[0], step):
+            yield resample(mono[start:start + step], sr, target_rate)
+        return
+
+    reader = StreamReader(str(source))
+    sr = int(reader.get_src_stream_info(reader.default_audio_stream).sample_rate)
+    reader.add_basic_audio_stream(frames_per_chunk=max(1, int(chunk_seconds * sr)))
+    for (chunk,) in reader.stream():
+        if chunk is None or chunk.numel() == 0:
+            continue
+        # (frames, channels) float32
+        yield resample(chunk.mean(dim=1).numpy().astype(np.float32, copy=False), sr, target_rate)
+
+
+def sha1_stream(stream: BinaryIO, block_size: int = 1 << 16) -> Tuple[str, int]:
+    """(sha1 hex digest, byte length) of a stream without buffering it whole"""
+    digest = hashlib.sha1()
+    length = 0
+    stream.seek(0)
+    for block in iter(lambda: stream.read(block_size), b''):
+        digest.update(block)
+        length += len(block)
+    stream.seek(0)
+    return digest.hexdigest(), length
+
+
+def _as_bytes(source) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, (bytearray, memoryview)):
+        return bytes(source)
+    stream = getattr(source, 'stream', source)  # werkzeug FileStorage
+    stream.seek(0)
+    data = stream.read()
+    stream.seek(0)
+    return data
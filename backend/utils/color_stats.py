@@ -0,0 +1,87 @@
+# utils/color_stats.py
+"""
+Vectorised colour statistics for rash images.
+Every statistic is computed from the (H, W, 3) uint8 array produced by
+image_io.load_rgb in whole-array NumPy operations - no per-pixel Python.
+"""
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+RED_THRESHOLD = 180
+
+
+class ColorStats(NamedTuple):
+    avg_r: float
+    avg_g: float
+    avg_b: float
+    redness_score: float         # mean R above the mean of G and B
+    red_ratio: float             # share of pixels with R > RED_THRESHOLD
+    skin_ratio: float            # share of pixels inside the YCbCr skin range
+    skin_redness_score: float    # redness_score restricted to skin pixels
+    region_histograms: np.ndarray  # (rows, cols, 3, bins) pixel counts
+
+    def to_dict(self) -> dict:
+        return {
+            'avg_r': round(self.avg_r, 1),
+            'avg_g': round(self.avg_g, 1),
+            'avg_b': round(self.avg_b, 1),
+            'redness_score': round(self.redness_score, 2),
+            'red_ratio': round(self.red_ratio, 4),
+            'skin_ratio': round(self.skin_ratio, 4),
+            'skin_redness_score': round(self.skin_redness_score, 2),
+            'region_histograms': self.region_histograms.tolist()
+        }
+
+
+def redness(r: float, g: float, b: float) -> float:
+    """Heuristic inflammation score: how far red sits above green/blue"""
+    return max(0.0, r - (g + b) / 2)
+
+
+def skin_mask(pixels: np.ndarray) -> np.ndarray:
+    """(H, W) bool mask using the classic Cb∈[77,127], Cr∈[133,173] rule"""
+    rgb = pixels.astype(np.float32)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    cb = 128 - 0.168736 * r - 0.331264 * g + 0.5 * b
+    cr = 128 + 0.5 * r - 0.418688 * g - 0.081312 * b
+    return (cb >= 77) & (cb <= 127) & (cr >= 133) & (cr <= 173)
+
+
+def region_histograms(pixels: np.ndarray, grid: Tuple[int, int] = (2, 2), bins: int = 16) -> np.ndarray:
+    """Per-region, per-channel histograms from a single np.bincount"""
+    height, width, channels = pixels.shape
+    rows, cols = grid
+    row_idx = (np.arange(height) * rows // height)[:, None]
+    col_idx = (np.arange(width) * cols // width)[None, :]
+    region = (row_idx * cols + col_idx)[..., None]                  # (H, W, 1)
+    value_bin = pixels.astype(np.intp) * bins // 256                  # (H, W, 3)
+    flat = (region * channels + np.arange(channels)) * bins + value_bin
+    counts = np.bincount(flat.ravel(), minlength=rows * cols * channels * bins)
+    return counts.reshape(rows, cols, channels, bins)
+
+
+def compute_color_stats(pixels: np.ndarray, grid: Tuple[int, int] = (2, 2), bins: int = 16) -> ColorStats:
+    """All colour metrics for one RGB uint8 image"""
+    flat = pixels.reshape(-1, 3)
+    means = flat.mean(axis=0, dtype=np.float64)
+    red_ratio = float(np.count_nonzero(flat[:, 0] > RED_THRESHOLD)) / max(1, flat.shape[0])
+
+    mask = skin_mask(pixels).ravel()
+    skin_count = int(np.count_nonzero(mask))
+    if skin_count:
+        skin_means = flat[mask].mean(axis=0, dtype=np.float64)
+        skin_redness = redness(*skin_means)
+    else:
+        skin_redness = 0.0
+
+    return ColorStats(
+        avg_r=float(means[0]),
+        avg_g=float(means[1]),
+        avg_b=float(means[2]),
+        redness_score=float(redness(*means)),
+        red_ratio=red_ratio,
+        skin_ratio=skin_count / max(1, flat.shape[0]),
+        skin_redness_score=float(skin_redness),
+        region_histograms=region_histograms(pixels, grid, bins)
+    )
@@ -0,0 +1,145 @@
+# utils/cough_segments.py
+"""
+Cough event segmentation ahead of the cough model.
+Recordings are mostly silence and room noise; a cough is a short burst with
+an explosive onset. Short-time energy marks frames above the clip's noise
+floor, spectral flux marks onsets, and each onset inside an energetic run
+starts one event (capped at COUGH_MAX_SECONDS). Only the events are
+featurised and scored, so model compute follows the cough count rather
+than the clip length. Framing, FFT and peak picking are vectorised over
+the whole buffer.
+"""
+import os
+from typing import Iterable, Iterator, NamedTuple
+
+import numpy as np
+
+FRAME_SECONDS = 0.025
+HOP_SECONDS = 0.010
+# An event frame is this far above the noise floor (10th percentile frame energy)
+COUGH_THRESHOLD_DB = float(os.getenv('CUREVOX_COUGH_THRESHOLD_DB', 12.0))
+# ...and no more than this far below the loudest frame
+COUGH_PEAK_RANGE_DB = float(os.getenv('CUREVOX_COUGH_PEAK_RANGE_DB', 30.0))
+# Onset: spectral flux this many standard deviations above its median
+COUGH_FLUX_K = float(os.getenv('CUREVOX_COUGH_FLUX_K', 1.5))
+COUGH_MIN_SECONDS = float(os.getenv('CUREVOX_COUGH_MIN_SECONDS', 0.08))
+COUGH_MAX_SECONDS = float(os.getenv('CUREVOX_COUGH_MAX_SECONDS', 0.8))
+# Buffers whose loudest frame is below this (dBFS) hold no events at all
+SILENCE_DB = -60.0
+
+
+class CoughEvent(NamedTuple):
+    start: float          # seconds from the start of the recording
+    end: float
+    samples: np.ndarray   # mono float32 at the segmenter's rate
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+def frame_signal(y: np.ndarray, frame: int, hop: int) -> np.ndarray:
+    """(samples,) → (frames, frame) strided view (zero-padded to one frame)"""
+    if len(y) < frame:
+        y = np.pad(y, (0, frame - len(y)))
+    return np.lib.stride_tricks.sliding_window_view(y, frame)[::hop]
+
+
+def _local_max(values: np.ndarray, radius: int) -> np.ndarray:
+    padded = np.pad(values, radius, mode='edge')
+    return values >= np.lib.stride_tricks.sliding_window_view(padded, 2 * radius + 1).max(axis=1)
+
+
+class CoughSegmenter:
+    """Energy + spectral-flux onset detector. One instance per recording:
+    `samples_seen` counts what events() has consumed."""
+
+    def __init__(self, sample_rate: int = 16000,
+                 threshold_db: float = COUGH_THRESHOLD_DB,
+                 flux_k: float = COUGH_FLUX_K,
+                 min_seconds: float = COUGH_MIN_SECONDS,
+                 max_seconds: float = COUGH_MAX_SECONDS):
+        self.sample_rate = sample_rate
+        self.frame = int(FRAME_SECONDS * sample_rate)
+        self.hop = int(HOP_SECONDS * sample_rate)
+        self.threshold_db = threshold_db
+        self.flux_k = flux_k
+        self.min_frames = max(1, int(round(min_seconds / HOP_SECONDS)))
+        self.max_frames = max(self.min_frames, int(round(max_seconds / HOP_SECONDS)))
+        self._window = np.hanning(self.frame).astype(np.float32)
+        self.samples_seen = 0
+
+    @property
+    def max_samples(self) -> int:
+        """Length of the longest event segments() can return"""
+        return self.max_frames * self.hop + self.frame - self.hop
+
+    def config(self) -> str:
+        """Detector parameters, for feature-store config ids"""
+        return f'{self.threshold_db}/{COUGH_PEAK_RANGE_DB}/{self.flux_k}/{self.min_frames}/{self.max_frames}'
+
+    def frame_features(self, y: np.ndarray, from_silence: bool = False):
+        """(energy dB, onset strength) per frame. `from_silence`: the buffer
+        starts the recording, so sound in its first frame is an onset."""
+        frames = frame_signal(y, self.frame, self.hop)
+        energy_db = 10 * np.log10(np.mean(np.square(frames, dtype=np.float32), axis=1) + 1e-10)
+        spectrum = np.log1p(100 * np.abs(np.fft.rfft(frames * self._window, axis=1)))
+        before = np.zeros_like(spectrum[:1]) if from_silence else spectrum[:1]
+        flux = np.maximum(np.diff(spectrum, axis=0, prepend=before), 0).sum(axis=1)
+        return energy_db, flux
+
+    def segments(self, y: np.ndarray, from_silence: bool = True) -> np.ndarray:
+        """(events, 2) [start, end) sample bounds of the cough events in `y`"""
+        empty = np.empty((0, 2), dtype=np.int64)
+        energy_db, flux = self.frame_features(y, from_silence)
+        peak_db = energy_db.max()
+        if peak_db < SILENCE_DB:
+            return empty
+
+        floor_db = np.percentile(energy_db, 10)
+        active = (energy_db > floor_db + self.threshold_db) & (energy_db > peak_db - COUGH_PEAK_RANGE_DB)
+        onsets = active & (flux > np.median(flux) + self.flux_k * flux.std())
+        onsets &= _local_max(flux, self.min_frames)
+        onset_frames = np.flatnonzero(onsets)
+        if not onset_frames.size:
+            return empty
+
+        # Energetic runs; an event starts at each onset and ends at the next
+        # onset, the end of its run or after max_frames, whichever is first
+        edges = np.diff(np.concatenate(([0], active.view(np.int8), [0])))
+        run_ends = np.flatnonzero(edges == -1)
+        own_run_end = run_ends[np.searchsorted(run_ends, onset_frames, side='right')]
+        next_onset = np.append(onset_frames[1:], len(active))
+        ends = np.minimum.reduce([own_run_end, next_onset, onset_frames + self.max_frames])
+        keep = ends - onset_frames >= self.min_frames
+        bounds = np.stack([onset_frames[keep], ends[keep]], axis=1) * self.hop
+        bounds[:, 1] = np.minimum(bounds[:, 1] + self.frame - self.hop, len(y))
+        return bounds
+
+    def events(self, chunks: Iterable[np.ndarray], start_seconds: float = 0.0) -> Iterator[CoughEvent]:
+        """Cough events across consecutive decoded chunks (times offset by
+        `start_seconds`, e.g. trimmed leading silence). The last
+        max-event-length of each chunk is carried over, so an event that
+        straddles a chunk boundary is detected whole in the next pass."""
+        rate = self.sample_rate
+        carry_len = self.max_frames * self.hop + self.frame
+        carry = np.zeros(0, dtype=np.float32)
+        offset = 0  # absolute sample index of carry[0]
+        chunks = iter(chunks)
+        pending = next(chunks, None)
+        while pending is not None:
+            chunk, pending = pending, next(chunks, None)
+            self.samples_seen += len(chunk)
+            buffer = np.concatenate((carry, chunk)) if carry.size else chunk
+            # Events starting after `settled` may run past the buffer; the
+            # next pass sees them whole (the last chunk settles everything)
+            settled = len(buffer) if pending is None else len(buffer) - carry_len
+            cut = max(settled, 0)
+            for start, end in self.segments(buffer, from_silence=offset == 0):
+                if start >= settled:
+                    break
+                yield CoughEvent(start_seconds + (offset + start) / rate,
+                                 start_seconds + (offset + end) / rate, buffer[start:end])
+                cut = max(cut, end)
+            carry = buffer[cut:]
+            offset += cut
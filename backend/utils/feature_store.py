@@ -0,0 +1,291 @@
+# utils/feature_store.py
+"""
+Persistent store for computed model inputs (log-mel, MFCC, image
+embeddings), keyed by upload hash and feature-config id.
+Arrays are written once as float16 .npy files (half the size of float32,
+and still memory-mappable, which compressed .npz is not) under
+<store>/<feature>/<config hash>/<digest[:2]>/<digest>.npy; a
+`feature_index` table in <store>/index.sqlite (its own file, not the app
+database, so migrations never see it) lists every entry, so a new model
+can be rescored over historical uploads without decoding them again
+(iter_features). Writes are atomic (rename), so concurrent workers never
+read half-written arrays.
+
+The store keeps data derived from medical uploads, so it is off unless
+CUREVOX_FEATURE_STORE=true, lives outside the source tree and is bounded:
+entries older than CUREVOX_FEATURE_STORE_MAX_AGE_DAYS and the oldest
+entries past CUREVOX_FEATURE_STORE_MAX_MB are pruned (on open and every
+PRUNE_EVERY writes); delete(digest) drops one upload's features.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_ROOT = os.getenv('CUREVOX_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'curevox'))
+FEATURE_STORE_ENABLED = os.getenv('CUREVOX_FEATURE_STORE', 'false').lower() == 'true'
+DEFAULT_STORE_DIR = os.getenv('CUREVOX_FEATURE_STORE_DIR', os.path.join(CACHE_ROOT, 'features'))
+DEFAULT_MAX_AGE_DAYS = float(os.getenv('CUREVOX_FEATURE_STORE_MAX_AGE_DAYS', 30))
+DEFAULT_MAX_BYTES = int(float(os.getenv('CUREVOX_FEATURE_STORE_MAX_MB', 1024)) * 1024 * 1024)
+PRUNE_EVERY = 100  # writes between retention passes
+STORE_DTYPE = np.dtype(os.getenv('CUREVOX_FEATURE_STORE_DTYPE', 'float16'))
+# Bump when feature code changes in a way the parameters do not capture
+FEATURE_VERSION = 1
+
+Features = Tuple[np.ndarray, Dict[str, Any]]
+
+
+def default_index_path(root: str = DEFAULT_STORE_DIR) -> str:
+    """CUREVOX_FEATURE_DB, else an index file next to the arrays"""
+    return os.getenv('CUREVOX_FEATURE_DB') or os.path.join(root, 'index.sqlite')
+
+
+def feature_config(feature: str, **params) -> str:
+    """Stable id of the code version + parameters that produced a feature"""
+    options = ','.join(f'{name}={value}' for name, value in sorted(params.items()))
+    return f'{feature}/v{FEATURE_VERSION}/{options}'
+
+
+class FeatureStore:
+    """float16 .npy arrays on disk + a SQLite index table"""
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, index_path: Optional[str] = None,
+                 dtype: np.dtype = STORE_DTYPE, max_age_days: Optional[float] = DEFAULT_MAX_AGE_DAYS,
+                 max_bytes: Optional[int] = DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.index_path = index_path or default_index_path(self.root)
+        self.dtype = np.dtype(dtype)
+        self.max_age_days = max_age_days
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._pruned_pid: Optional[int] = None
+        self._counters = {'hits': 0, 'misses': 0, 'writes': 0, 'stale': 0, 'errors': 0, 'removed': 0}
+
+    def _db(self) -> sqlite3.Connection:
+        """One connection per thread and process (never shared across a fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode = WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS feature_index (
+                    digest TEXT NOT NULL,
+                    feature TEXT NOT NULL,
+                    config TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    shape TEXT NOT NULL,
+                    dtype TEXT NOT NULL,
+                    bytes INTEGER NOT NULL,
+                    meta TEXT,
+                    created_at TEXT NOT NULL,
+                    PRIMARY KEY (digest, feature, config)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_feature_index_config ON feature_index (feature, config)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+            if self._pruned_pid != os.getpid():
+                self._pruned_pid = os.getpid()
+                self.prune()
+        return conn
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _path(self, digest: str, feature: str, config: str) -> str:
+        config_id = hashlib.sha1(config.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.root, feature, config_id, digest[:2], f'{digest}.npy')
+
+    def get(self, digest: str, feature: str, config: str) -> Optional[Features]:
+        """(read-only memory-mapped array, meta), or None"""
+        row = self._db().execute(
+            'SELECT path, meta FROM feature_index WHERE digest = ? AND feature = ? AND config = ?',
+            (digest, feature, config)
+        ).fetchone()
+        if row is None:
+            self._count('misses')
+            return None
+        path, meta = row
+        try:
+            array = np.load(path, mmap_mode='r')
+        except (OSError, ValueError):
+            # File removed (cache cleanup) or unreadable: drop the index row
+            self._db().execute('DELETE FROM feature_index WHERE digest = ? AND feature = ? AND config = ?',
+                               (digest, feature, config))
+            self._count('stale')
+            self._count('misses')
+            return None
+        self._count('hits')
+        return array, json.loads(meta) if meta else {}
+
+    def put(self, digest: str, feature: str, config: str, array: np.ndarray,
+            meta: Optional[Dict[str, Any]] = None) -> str:
+        path = self._path(digest, feature, config)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stored = np.ascontiguousarray(array, dtype=self.dtype)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                np.save(fp, stored)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._db().execute(
+            'INSERT OR REPLACE INTO feature_index VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (digest, feature, config, path, json.dumps(list(stored.shape)), stored.dtype.str,
+             stored.nbytes, json.dumps(meta or {}), datetime.utcnow().isoformat())
+        )
+        self._count('writes')
+        if self._counters['writes'] % PRUNE_EVERY == 0:
+            self.prune()
+        return path
+
+    def _remove(self, rows: List[Tuple[str, str, str, str]]) -> int:
+        """Delete (digest, feature, config, path) entries: index row, then array"""
+        db = self._db()
+        for digest, feature, config, path in rows:
+            db.execute('DELETE FROM feature_index WHERE digest = ? AND feature = ? AND config = ?',
+                       (digest, feature, config))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._counters['removed'] += len(rows)
+        return len(rows)
+
+    def delete(self, digest: str) -> int:
+        """Drop every stored feature of one upload (upload or user removed)"""
+        rows = self._db().execute(
+            'SELECT digest, feature, config, path FROM feature_index WHERE digest = ?', (digest,)
+        ).fetchall()
+        return self._remove(rows)
+
+    def prune(self, now: Optional[datetime] = None) -> int:
+        """Apply the retention bounds: drop entries older than max_age_days,
+        then the oldest entries until the arrays fit in max_bytes"""
+        db = self._db()
+        removed = 0
+        if self.max_age_days is not None:
+            cutoff = ((now or datetime.utcnow()) - timedelta(days=self.max_age_days)).isoformat()
+            removed += self._remove(db.execute(
+                'SELECT digest, feature, config, path FROM feature_index WHERE created_at < ?', (cutoff,)
+            ).fetchall())
+        if self.max_bytes is not None:
+            excess = db.execute('SELECT COALESCE(SUM(bytes), 0) FROM feature_index').fetchone()[0] - self.max_bytes
+            oldest = []
+            if excess > 0:
+                for digest, feature, config, path, size in db.execute(
+                        'SELECT digest, feature, config, path, bytes FROM feature_index ORDER BY created_at'
+                ).fetchall():
+                    if excess <= 0:
+                        break
+                    oldest.append((digest, feature, config, path))
+                    excess -= size
+            removed += self._remove(oldest)
+        return removed
+
+    def _lookup(self, digest: str, feature: str, config: str) -> Optional[Features]:
+        try:
+            return self.get(digest, feature, config)
+        except sqlite3.Error as e:
+            logger.warning(f"Feature store lookup failed: {str(e)}")
+            self._count('errors')
+            return None
+
+    def _save(self, digest: str, feature: str, config: str, array: np.ndarray, meta: Dict[str, Any]):
+        try:
+            self.put(digest, feature, config, array, meta)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Feature store write failed: {str(e)}")
+            self._count('errors')
+
+    def get_or_compute(self, digest: Optional[str], feature: str, config: str,
+                       compute: Callable[[], Features]) -> Tuple[np.ndarray, Dict[str, Any], bool]:
+        """(array, meta, stored) - `compute` only runs on a miss. Store
+        failures are logged and never fail the analysis."""
+        if digest is None:
+            return (*compute(), False)
+        found = self._lookup(digest, feature, config)
+        if found is not None:
+            return (*found, True)
+
+        array, meta = compute()
+        self._save(digest, feature, config, array, meta)
+        return array, meta, False
+
+    def get_or_compute_many(self, digests: List[Optional[str]], feature: str, config: str,
+                            compute: Callable[[List[int]], List[Features]]
+                            ) -> List[Tuple[np.ndarray, Dict[str, Any], bool]]:
+        """get_or_compute over several uploads: `compute(indices)` runs once,
+        for the misses only, so they can share one batched model pass"""
+        results = []
+        for digest in digests:
+            found = self._lookup(digest, feature, config) if digest is not None else None
+            results.append((*found, True) if found is not None else None)
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            for index, (array, meta) in zip(missing, compute(missing)):
+                if digests[index] is not None:
+                    self._save(digests[index], feature, config, array, meta)
+                results[index] = (array, meta, False)
+        return results
+
+    def iter_features(self, feature: str, config: str) -> Iterator[Tuple[str, np.ndarray, Dict[str, Any]]]:
+        """(digest, array, meta) for every stored upload - rescoring with a new model"""
+        rows = self._db().execute(
+            'SELECT digest, path, meta FROM feature_index WHERE feature = ? AND config = ? ORDER BY created_at',
+            (feature, config)
+        ).fetchall()
+        for digest, path, meta in rows:
+            if os.path.exists(path):
+                yield digest, np.load(path, mmap_mode='r'), json.loads(meta) if meta else {}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counters, enabled=FEATURE_STORE_ENABLED, dtype=self.dtype.name,
+                        max_age_days=self.max_age_days, max_bytes=self.max_bytes)
+
+
+_default_store: Optional[FeatureStore] = None
+_default_store_lock = threading.Lock()
+
+
+def get_feature_store() -> FeatureStore:
+    """Process-wide store (analyzers + /api/metrics)"""
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = FeatureStore()
+    return _default_store
+
+
+def stored_features(digest: Optional[str], feature: str, config: str,
+                    compute: Callable[[], Features]) -> Tuple[np.ndarray, Dict[str, Any], bool]:
+    """get_feature_store().get_or_compute, or just `compute` when the store is disabled"""
+    if not FEATURE_STORE_ENABLED:
+        return (*compute(), False)
+    return get_feature_store().get_or_compute(digest, feature, config, compute)
+
+
+def stored_features_many(digests: List[Optional[str]], feature: str, config: str,
+                         compute: Callable[[List[int]], List[Features]]
+                         ) -> List[Tuple[np.ndarray, Dict[str, Any], bool]]:
+    """get_feature_store().get_or_compute_many, or `compute` over everything when the store is disabled"""
+    if not FEATURE_STORE_ENABLED:
+        return [(array, meta, False) for array, meta in compute(list(range(len(digests))))]
+    return get_feature_store().get_or_compute_many(digests, feature, config, compute)
@@ -0,0 +1,127 @@
+# utils/image_io.py
+"""
+Bounded-resolution image decoding for the rash analyzers.
+JPEGs are decoded at a reduced DCT scale (draft mode), everything else is
+shrunk with Image.reduce() before the RGB conversion, so a 12 MP phone
+photo never materialises as a full-size array. Multi-image uploads are
+decoded concurrently (load_rgb_many). Each decode reports the largest
+pixel buffer it held (decode_peak_mb); ru_maxrss is only a process-wide
+high-water mark, so it is reported separately as process_peak_rss_mb.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from utils.lazy_imports import lazy_import
+
+Image = lazy_import('PIL.Image')
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+MAX_IMAGE_SIDE = int(os.getenv('CUREVOX_IMAGE_MAX_SIDE', 512))
+# Decoder threads for multi-image uploads (libjpeg / zlib release the GIL)
+DECODE_THREADS = int(os.getenv('CUREVOX_IMAGE_DECODE_THREADS', 4))
+
+_EXIF_ORIENTATION = 0x0112
+_ORIENTATION_TRANSPOSE = {  # Image.Transpose member names (resolved once PIL is loaded)
+    2: 'FLIP_LEFT_RIGHT',
+    3: 'ROTATE_180',
+    4: 'FLIP_TOP_BOTTOM',
+    5: 'TRANSPOSE',
+    6: 'ROTATE_270',
+    7: 'TRANSVERSE',
+    8: 'ROTATE_90',
+}
+
+
+class DecodedImage(NamedTuple):
+    pixels: np.ndarray            # (H, W, 3) uint8, EXIF-upright
+    original_size: Tuple[int, int]
+    decode_ms: float
+    decode_peak_mb: float                 # largest pixel buffer held by this decode
+    process_peak_rss_mb: Optional[float]  # process lifetime high-water mark (never per image)
+
+    def stats(self) -> dict:
+        return {
+            'original_size': list(self.original_size),
+            'decoded_size': [self.pixels.shape[1], self.pixels.shape[0]],
+            'decode_ms': round(self.decode_ms, 3),
+            'decode_peak_mb': self.decode_peak_mb,
+            'process_peak_rss_mb': self.process_peak_rss_mb
+        }
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_executor_lock = threading.Lock()
+
+
+def process_peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss is KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def _buffer_bytes(img) -> int:
+    """Pillow's in-memory size of an image: 1 byte/pixel for single-band
+    8-bit modes, 4 for everything else (RGB is stored as 32-bit pixels)"""
+    width, height = img.size
+    return width * height * (1 if img.mode in ('1', 'L', 'P') else 4)
+
+
+def load_rgb(source, max_side: int = MAX_IMAGE_SIDE) -> DecodedImage:
+    """Path / file object → upright RGB array whose longest side ≤ max_side"""
+    start = time.perf_counter()
+    img = Image.open(source)
+    original_size = img.size
+    orientation = img.getexif().get(_EXIF_ORIENTATION, 1)
+
+    if img.format == 'JPEG':
+        # libjpeg decodes straight to 1/2, 1/4 or 1/8 scale
+        img.draft('RGB', (max_side, max_side))
+    peak = _buffer_bytes(img)  # the decoded (draft-scale) raster
+
+    if img.mode not in ('RGB', 'RGBA', 'L', 'LA'):
+        img = img.convert('RGB')  # palette / 1-bit / CMYK cannot be reduced directly
+        peak += _buffer_bytes(img)
+
+    factor = max(img.size) // max_side
+    if factor > 1:
+        img = img.reduce(factor)
+    if max(img.size) > max_side:
+        img.thumbnail((max_side, max_side), Image.Resampling.BILINEAR)
+
+    # Orientation is applied to the small image, not the full-size one
+    if orientation in _ORIENTATION_TRANSPOSE:
+        img = img.transpose(getattr(Image.Transpose, _ORIENTATION_TRANSPOSE[orientation]))
+
+    pixels = np.asarray(img.convert('RGB'))
+    peak = max(peak, _buffer_bytes(img) + pixels.nbytes)
+    return DecodedImage(pixels, original_size, (time.perf_counter() - start) * 1000,
+                        round(peak / (1024 * 1024), 3), process_peak_rss_mb())
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=DECODE_THREADS, thread_name_prefix='curevox-decode')
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def load_rgb_many(sources: Iterable, max_side: int = MAX_IMAGE_SIDE) -> List[DecodedImage]:
+    """load_rgb over several images on the decoder threads, in input order"""
+    sources = list(sources)
+    if len(sources) < 2:
+        return [load_rgb(source, max_side) for source in sources]
+    return list(_get_executor().map(lambda source: load_rgb(source, max_side), sources))
@@ -0,0 +1,181 @@
+# utils/inference_backends.py
+"""
+Selectable CPU inference backends for the breath, cough and rash models.
+  eager        utils/networks.py module + state dict (<model>.pth, mmap-loaded)
+  torchscript  exported TorchScript archive (<model>.pt); traced and frozen
+               from the eager module when only a state dict is deployed
+  int8         eager module with its Linear layers dynamically quantized
+The backend is chosen per model with CUREVOX_BACKEND_<MODEL> (default
+CUREVOX_INFERENCE_BACKEND). With no weights on disk load_backend() returns
+None and the analyzer keeps its mock inference.
+"""
+import copy
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from utils.lazy_imports import lazy_import
+from utils.model_loader import load_state_dict, load_torchscript
+
+torch = lazy_import('torch')
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('eager', 'torchscript', 'int8')
+DEFAULT_BACKEND = os.getenv('CUREVOX_INFERENCE_BACKEND', 'torchscript')
+# Compare the selected backend against eager once at load time
+PARITY_CHECK = os.getenv('CUREVOX_BACKEND_PARITY_CHECK', 'false').lower() == 'true'
+PARITY_TOLERANCE = float(os.getenv('CUREVOX_BACKEND_PARITY_TOLERANCE', 0.05))  # max |Δ probability|
+
+
+class ModelSpec(NamedTuple):
+    name: str
+    network: str                     # class in utils/networks.py
+    torchscript_path: str
+    weights_path: str
+    example_shape: Tuple[int, ...]   # one input, used for tracing / parity / benchmarks
+    output: str                      # 'softmax' (classes) | 'sigmoid' (score)
+
+
+MODEL_SPECS = {
+    'breath': ModelSpec('breath', 'BreathCNN', 'models/breath_cnn_production.pt',
+                        'models/breath_cnn_production.pth', (1, 1, 128, 251), 'softmax'),
+    'cough': ModelSpec('cough', 'CoughNet', 'models/cough_yamnet_production.pt',
+                       'models/cough_yamnet_production.pth', (1, 1, 64, 251), 'sigmoid'),
+    'rash': ModelSpec('rash', 'RashMobileNet', 'models/rash_mobilenet_production.pt',
+                      'models/rash_mobilenet_production.pth', (1, 3, 160, 160), 'softmax'),
+}
+
+_backends: Dict[Tuple[str, str], Any] = {}
+_backend_stats: Dict[str, Dict[str, Any]] = {}
+_backends_lock = threading.Lock()
+
+
+def backend_for(model_name: str) -> str:
+    backend = os.getenv(f'CUREVOX_BACKEND_{model_name.upper()}', DEFAULT_BACKEND)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}' for {model_name} (expected one of {BACKENDS})")
+    return backend
+
+
+def build_eager(spec: ModelSpec, allow_random_init: bool = False):
+    """Eager module with deployed weights (random init only if allowed)"""
+    state = load_state_dict(spec.weights_path)
+    if state is None and not allow_random_init:
+        return None
+    from utils import networks
+    module = getattr(networks, spec.network)()
+    if state is not None:
+        try:
+            module.load_state_dict(state, assign=True)  # keep the mmap-backed tensors
+        except TypeError:  # torch < 2.1
+            module.load_state_dict(state)
+    for param in module.parameters():
+        param.requires_grad_(False)
+    return module.eval()
+
+
+def convert(eager, spec: ModelSpec, backend: str):
+    """eager module → the requested backend variant"""
+    if backend == 'eager':
+        return eager
+    if backend == 'int8':
+        # Dynamic quantization covers Linear layers; convolutions stay fp32
+        return torch.ao.quantization.quantize_dynamic(copy.deepcopy(eager), {torch.nn.Linear}, dtype=torch.qint8)
+    if backend == 'torchscript':
+        with torch.no_grad():
+            traced = torch.jit.trace(eager, torch.zeros(spec.example_shape))
+        return torch.jit.freeze(traced)
+    raise ValueError(f"Unknown inference backend '{backend}'")
+
+
+def build_backend(spec: ModelSpec, backend: str, allow_random_init: bool = False):
+    if backend == 'torchscript':
+        exported = load_torchscript(spec.torchscript_path)
+        if exported is not None:
+            return exported
+    eager = build_eager(spec, allow_random_init)
+    return None if eager is None else convert(eager, spec, backend)
+
+
+def load_backend(model_name: str, backend: Optional[str] = None):
+    """Process-wide model for `model_name` on the configured backend, or None"""
+    backend = backend or backend_for(model_name)
+    key = (model_name, backend)
+    if key in _backends:
+        return _backends[key]
+    with _backends_lock:
+        if key not in _backends:
+            start = time.perf_counter()
+            model = build_backend(MODEL_SPECS[model_name], backend)
+            _backends[key] = model
+            if model is not None:
+                _backend_stats[model_name] = {'backend': backend,
+                                              'load_ms': round((time.perf_counter() - start) * 1000, 1)}
+                logger.info(f"Model '{model_name}' loaded on {backend} backend")
+    model = _backends[key]
+    if model is not None and PARITY_CHECK and backend != 'eager':
+        report = parity_check(model_name, (backend,), allow_random_init=False).get(backend)
+        if report and not report['ok']:
+            logger.warning(f"Backend parity check failed for {model_name}/{backend}: {report}")
+    return model
+
+
+def probabilities(spec: ModelSpec, logits):
+    if spec.output == 'sigmoid':
+        return torch.sigmoid(logits).reshape(logits.shape[0], -1)[:, :1]
+    return torch.softmax(logits, dim=-1)
+
+
+def parity_check(model_name: str, backends: Iterable[str] = BACKENDS, batch_size: int = 4,
+                 seed: int = 0, allow_random_init: bool = True) -> Dict[str, Dict[str, Any]]:
+    """Max |Δ probability| and top-1 agreement of each backend vs eager on
+    random inputs. Every variant is derived from the same eager weights."""
+    spec = MODEL_SPECS[model_name]
+    reference = build_eager(spec, allow_random_init)
+    if reference is None:
+        return {}
+    generator = torch.Generator().manual_seed(seed)
+    inputs = torch.randn((batch_size,) + spec.example_shape[1:], generator=generator)
+    with torch.inference_mode():
+        expected = probabilities(spec, reference(inputs))
+
+    report = {}
+    for backend in backends:
+        model = convert(reference, spec, backend)
+        with torch.inference_mode():
+            actual = probabilities(spec, model(inputs))
+        if spec.output == 'sigmoid':
+            agreement = ((actual > 0.5) == (expected > 0.5)).float().mean()
+        else:
+            agreement = (actual.argmax(dim=-1) == expected.argmax(dim=-1)).float().mean()
+        max_abs_diff = float((actual - expected).abs().max())
+        report[backend] = {
+            'max_abs_diff': round(max_abs_diff, 6),
+            'top1_agreement': round(float(agreement), 4),
+            'ok': max_abs_diff <= PARITY_TOLERANCE
+        }
+    return report
+
+
+def model_version(model_name: str) -> str:
+    """Identifies the weights behind a model's results ('mock' if none deployed)"""
+    spec = MODEL_SPECS.get(model_name)
+    if spec is None:
+        return 'rules'  # chat: no model
+    backend = backend_for(model_name)
+    paths = (spec.torchscript_path, spec.weights_path) if backend == 'torchscript' else (spec.weights_path,)
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        return f'{backend}:{os.path.basename(path)}:{stat.st_size}:{int(stat.st_mtime)}'
+    return 'mock'
+
+
+def backend_stats() -> Dict[str, Dict[str, Any]]:
+    with _backends_lock:
+        return {name: dict(stats) for name, stats in _backend_stats.items()}
@@ -0,0 +1,64 @@
+# utils/lazy_imports.py
+"""
+Deferred imports for heavy dependencies (torch, torchaudio, PIL, pygame...).
+`torch = lazy_import('torch')` binds a placeholder module; the real import
+runs on the first attribute access, so importing app/analyzers stays cheap
+and a worker only pays for the libraries its requests actually use.
+"""
+import importlib
+import importlib.util
+import threading
+import time
+import types
+from typing import Dict
+
+_import_ms: Dict[str, float] = {}
+_import_lock = threading.Lock()
+
+
+class LazyModule(types.ModuleType):
+    """Module placeholder that imports the real module on first use"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self.__dict__['_module'] = None
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__['_module']
+        if module is None:
+            with _import_lock:
+                module = self.__dict__['_module']
+                if module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(self.__name__)
+                    _import_ms[self.__name__] = round((time.perf_counter() - start) * 1000, 1)
+                    self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f'<lazy module {self.__name__!r} ({state})>'
+
+
+def lazy_import(name: str) -> LazyModule:
+    return LazyModule(name)
+
+
+def is_available(name: str) -> bool:
+    """True if `name` can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def import_stats() -> Dict[str, float]:
+    """ms spent importing each lazily loaded module in this process"""
+    with _import_lock:
+        return dict(_import_ms)
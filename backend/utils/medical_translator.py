@@ -0,0 +1,100 @@
+# utils/medical_translator.py
+"""
+Phrase-table translation of medical insight text.
+Tables live in data/medical_phrases/<lang>.json ({english: translated})
+and are loaded once. Each language is compiled into a single trie-shaped
+regex, so a text is translated in one left-to-right pass with
+longest-match semantics instead of one str.replace scan per phrase.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, Iterable, Optional, Pattern, Tuple
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PHRASE_DIR = os.getenv('CUREVOX_PHRASE_DIR', os.path.join(BASE_DIR, '..', 'data', 'medical_phrases'))
+
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for a character trie; `None` marks the end of a phrase"""
+    branches = [re.escape(char) + _trie_pattern(child)
+                for char, child in sorted(item for item in node.items() if item[0] is not None)]
+    if not branches:
+        return ''
+    body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if None in node:
+        # Greedy optional: the longer phrase is tried first, the shorter on backtrack
+        body = '(?:' + body + ')?'
+    return body
+
+
+def phrase_pattern(phrases: Iterable[str]) -> str:
+    """Regex source matching any of `phrases`, longest first ('' if none)"""
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[None] = True
+    return _trie_pattern(trie)
+
+
+def compile_phrases(phrases: Dict[str, str]) -> Optional[Pattern]:
+    """One trie-shaped regex for all phrases (an Aho-Corasick-style automaton
+    built by the regex compiler): at any position only the branch for the
+    next character is tried, and the longest phrase wins"""
+    if not phrases:
+        return None
+    return re.compile(phrase_pattern(phrases))
+
+
+class MedicalTranslator:
+    """Compiled per-language phrase tables"""
+
+    def __init__(self, tables: Dict[str, Dict[str, str]]):
+        self._tables: Dict[str, Tuple[Pattern, Dict[str, str]]] = {}
+        for lang, phrases in tables.items():
+            pattern = compile_phrases(phrases)
+            if pattern is not None:
+                self._tables[lang] = (pattern, dict(phrases))
+
+    @classmethod
+    def from_directory(cls, languages: Iterable[str], phrase_dir: str = PHRASE_DIR) -> 'MedicalTranslator':
+        """Load <lang>.json for every requested language that has a table"""
+        tables = {}
+        for lang in languages:
+            path = os.path.join(phrase_dir, f'{lang}.json')
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as fp:
+                    tables[lang] = json.load(fp)
+        logger.info(f"Medical phrase tables loaded: {sorted(tables)}")
+        return cls(tables)
+
+    @property
+    def languages(self):
+        return sorted(self._tables)
+
+    def translate(self, english_text: str, lang: str) -> str:
+        table = self._tables.get(lang)
+        if table is None:
+            return english_text
+        pattern, phrases = table
+        return pattern.sub(lambda match: phrases[match.group(0)], english_text)
+
+
+_translator: Optional[MedicalTranslator] = None
+_translator_lock = threading.Lock()
+
+
+def get_translator(languages: Iterable[str]) -> MedicalTranslator:
+    """Process-wide translator, built on first use"""
+    global _translator
+    if _translator is None:
+        with _translator_lock:
+            if _translator is None:
+                _translator = MedicalTranslator.from_directory(languages)
+    return _translator
@@ -0,0 +1,90 @@
+# utils/model_loader.py
+"""
+Process-wide model weight loading.
+Each model file is loaded once per process and shared by every analyzer
+that asks for it. With gunicorn preload_app the load happens in the master,
+so forked workers map the same physical pages copy-on-write; parameters are
+frozen (requires_grad off, inference only) so nothing ever dirties them.
+Plain state-dict checkpoints are opened with torch.load(mmap=True), which
+backs the tensors with the page cache: workers that load after the fork
+still share one copy of the weights.
+"""
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from utils.lazy_imports import lazy_import
+
+torch = lazy_import('torch')
+
+MMAP_WEIGHTS = os.getenv('CUREVOX_MODEL_MMAP', 'true').lower() == 'true'
+
+_models: Dict[str, Any] = {}
+_model_stats: Dict[str, Dict[str, Any]] = {}
+_models_lock = threading.Lock()
+
+
+def _freeze(module):
+    for param in module.parameters():
+        param.requires_grad_(False)
+    module.eval()
+    return module
+
+
+def _record(path: str, kind: str, start: float):
+    _model_stats[path] = {
+        'kind': kind,
+        'size_mb': round(os.path.getsize(path) / (1024 * 1024), 2),
+        'load_ms': round((time.perf_counter() - start) * 1000, 1),
+        'loaded_by_pid': os.getpid()
+    }
+
+
+def load_torchscript(model_path: str):
+    """Shared TorchScript module for `model_path`, or None if not deployed"""
+    path = os.path.abspath(model_path)
+    if not os.path.exists(path):
+        return None
+    model = _models.get(path)
+    if model is None:
+        with _models_lock:
+            model = _models.get(path)
+            if model is None:
+                start = time.perf_counter()
+                model = _freeze(torch.jit.load(path, map_location='cpu'))
+                _models[path] = model
+                _record(path, 'torchscript', start)
+    return model
+
+
+def load_state_dict(weights_path: str, mmap: Optional[bool] = None) -> Optional[Dict[str, Any]]:
+    """Shared (by default mmap-backed) state dict for `weights_path`, or None"""
+    path = os.path.abspath(weights_path)
+    if not os.path.exists(path):
+        return None
+    state = _models.get(path)
+    if state is None:
+        with _models_lock:
+            state = _models.get(path)
+            if state is None:
+                use_mmap = MMAP_WEIGHTS if mmap is None else mmap
+                start = time.perf_counter()
+                try:
+                    state = torch.load(path, map_location='cpu', mmap=use_mmap, weights_only=True)
+                except TypeError:  # torch < 2.1: no mmap / weights_only
+                    use_mmap = False
+                    state = torch.load(path, map_location='cpu')
+                _models[path] = state
+                _record(path, 'state_dict_mmap' if use_mmap else 'state_dict', start)
+    return state
+
+
+def model_stats() -> Dict[str, Dict[str, Any]]:
+    """Loaded weights; preloaded=True means inherited from the gunicorn master"""
+    pid = os.getpid()
+    with _models_lock:
+        return {
+            os.path.basename(path): dict(stats, preloaded=stats['loaded_by_pid'] != pid)
+            for path, stats in _model_stats.items()
+        }
@@ -0,0 +1,99 @@
+# utils/networks.py
+"""
+Eager PyTorch definitions of the breath, cough and rash models.
+Only needed by the 'eager' and 'int8' inference backends (and to trace a
+TorchScript module when no exported .pt exists); the classifier heads are
+Linear layers so dynamic int8 quantization has real weight mass to act on.
+Imported lazily by utils/inference_backends.py.
+"""
+import torch
+from torch import nn
+
+
+def _conv_block(in_channels: int, out_channels: int) -> nn.Sequential:
+    return nn.Sequential(
+        nn.Conv2d(in_channels, out_channels, kernel_size=3, padding=1, bias=False),
+        nn.BatchNorm2d(out_channels),
+        nn.ReLU(inplace=True)
+    )
+
+
+def _separable_block(in_channels: int, out_channels: int, stride: int) -> nn.Sequential:
+    """MobileNet depthwise + pointwise convolution"""
+    return nn.Sequential(
+        nn.Conv2d(in_channels, in_channels, kernel_size=3, stride=stride, padding=1,
+                  groups=in_channels, bias=False),
+        nn.BatchNorm2d(in_channels),
+        nn.ReLU(inplace=True),
+        nn.Conv2d(in_channels, out_channels, kernel_size=1, bias=False),
+        nn.BatchNorm2d(out_channels),
+        nn.ReLU(inplace=True)
+    )
+
+
+class BreathCNN(nn.Module):
+    """(B, 1, 128, T) log-mel → logits over low / medium / high risk"""
+
+    def __init__(self, n_classes: int = 3):
+        super().__init__()
+        self.features = nn.Sequential(
+            _conv_block(1, 16), nn.MaxPool2d(2),
+            _conv_block(16, 32), nn.MaxPool2d(2),
+            _conv_block(32, 64),
+            nn.AdaptiveAvgPool2d((4, 4))
+        )
+        self.classifier = nn.Sequential(
+            nn.Flatten(),
+            nn.Linear(64 * 4 * 4, 256),
+            nn.ReLU(inplace=True),
+            nn.Linear(256, n_classes)
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.classifier(self.features(x))
+
+
+class CoughNet(nn.Module):
+    """(B, 1, 64, T) log-mel → one cough-severity logit"""
+
+    def __init__(self):
+        super().__init__()
+        self.features = nn.Sequential(
+            _conv_block(1, 32), nn.MaxPool2d(2),
+            _separable_block(32, 64, stride=2),
+            _separable_block(64, 128, stride=2),
+            nn.AdaptiveAvgPool2d((2, 4))
+        )
+        self.classifier = nn.Sequential(
+            nn.Flatten(),
+            nn.Linear(128 * 2 * 4, 256),
+            nn.ReLU(inplace=True),
+            nn.Linear(256, 1)
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.classifier(self.features(x))
+
+
+class RashMobileNet(nn.Module):
+    """(B, 3, H, W) RGB in [0, 1] → logits over the four skin conditions"""
+
+    def __init__(self, n_classes: int = 4):
+        super().__init__()
+        self.features = nn.Sequential(
+            _conv_block(3, 32),
+            _separable_block(32, 64, stride=2),
+            _separable_block(64, 128, stride=2),
+            _separable_block(128, 128, stride=2),
+            _separable_block(128, 256, stride=2),
+            nn.AdaptiveAvgPool2d(1)
+        )
+        self.classifier = nn.Sequential(
+            nn.Flatten(),
+            nn.Linear(256, 512),
+            nn.ReLU(inplace=True),
+            nn.Linear(512, n_classes)
+        )
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.classifier(self.features(x))
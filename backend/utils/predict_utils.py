@@ -1,26 +1,20 @@
 # utils/predict_utils.py
-import os, tempfile, hashlib
+import os, tempfile
+from utils import audio_io
+from utils.symptom_classifier import get_symptom_classifier
 
 def safe_text_classify(text):
-    t = text.lower()
-    tags = []
-    tscore = 0
-    if "cough" in t: tags.append("cough")
-    if "fever" in t or "temperature" in t: tags.append("fever")
-    if "rash" in t or "skin" in t: tags.append("rash")
-    # basic severity heuristic
-    if any(w in t for w in ["severe","difficulty","bleeding","chest pain","shortness"]):
-        severity = "high"
-    else:
-        severity = "low"
-    return {"tags": tags or ["general"], "severity": severity, "raw": text[:400]}
+    # one pass over the compiled multilingual lexicons (data/symptom_lexicon)
+    return get_symptom_classifier().classify(text)
 
-def safe_audio_check(filestorage, mode="cough"):
+def safe_audio_check(filestorage, mode="cough", digest=None):
     # small deterministic result: hash file length etc.
-    content = filestorage.read()
-    filestorage.stream.seek(0)
-    h = hashlib.sha1(content).hexdigest()
-    length = len(content)
+    if digest is None:
+        h, length = audio_io.sha1_stream(filestorage.stream)
+    else:
+        # caller already hashed the upload (result cache lookup)
+        h, length = digest, filestorage.stream.seek(0, os.SEEK_END)
+        filestorage.stream.seek(0)
     # heuristic
     if length == 0:
         return {"mode": mode, "result": "no audio", "confidence": 0.0}
@@ -0,0 +1,63 @@
+# utils/proc_memory.py
+"""
+Private vs shared memory of the current process (Linux /proc).
+After a preloading gunicorn master forks, model weights show up as shared
+pages; `private_mb` is what each additional worker really costs, and PSS
+splits the shared pages fairly between the processes mapping them.
+"""
+import os
+from typing import Dict, Optional
+
+_SMAPS_FIELDS = {
+    'Rss': 'rss_mb',
+    'Pss': 'pss_mb',
+    'Shared_Clean': 'shared_clean_mb',
+    'Shared_Dirty': 'shared_dirty_mb',
+    'Private_Clean': 'private_clean_mb',
+    'Private_Dirty': 'private_dirty_mb',
+    'Swap': 'swap_mb',
+}
+
+
+def _read_kb_fields(path: str) -> Optional[Dict[str, int]]:
+    try:
+        with open(path) as fp:
+            lines = fp.readlines()
+    except OSError:
+        return None
+    fields = {}
+    for line in lines:
+        name, _, value = line.partition(':')
+        parts = value.split()
+        if len(parts) == 2 and parts[1] == 'kB':
+            fields[name] = int(parts[0])
+    return fields
+
+
+def rss_bytes(pid: str = 'self') -> Optional[int]:
+    """Resident set size from /proc/<pid>/statm (cheap enough to poll); None if unsupported"""
+    try:
+        with open(f'/proc/{pid}/statm') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def memory_usage(pid: str = 'self') -> Dict[str, float]:
+    """{rss, pss, shared_*, private_*, private, shared} in MB; {} if unsupported"""
+    fields = _read_kb_fields(f'/proc/{pid}/smaps_rollup')
+    if fields is None:
+        # Pre-4.14 kernels: RSS split only (RssAnon is private, RssFile/RssShmem mostly shared)
+        status = _read_kb_fields(f'/proc/{pid}/status')
+        if not status or 'VmRSS' not in status:
+            return {}
+        return {
+            'rss_mb': round(status['VmRSS'] / 1024, 1),
+            'anon_mb': round(status.get('RssAnon', 0) / 1024, 1),
+            'file_mb': round(status.get('RssFile', 0) / 1024, 1),
+        }
+
+    usage = {key: round(fields.get(name, 0) / 1024, 1) for name, key in _SMAPS_FIELDS.items()}
+    usage['private_mb'] = round(usage['private_clean_mb'] + usage['private_dirty_mb'], 1)
+    usage['shared_mb'] = round(usage['shared_clean_mb'] + usage['shared_dirty_mb'], 1)
+    return usage
@@ -0,0 +1,118 @@
+# utils/result_cache.py
+"""
+Analysis results keyed by upload content.
+Users retry the same recording or photo after a network error; the SHA-1 of
+the upload (plus analyzer type, model version and language) finds the
+stored result instead of rerunning the analyzer. Per-process LRU with a TTL
+and an entry bound.
+"""
+import copy
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+DEFAULT_MAX_ENTRIES = int(os.getenv('CUREVOX_RESULT_CACHE_SIZE', 1024))
+DEFAULT_TTL_SECONDS = float(os.getenv('CUREVOX_RESULT_CACHE_TTL', 600))
+RESULT_CACHE_ENABLED = os.getenv('CUREVOX_RESULT_CACHE', 'true').lower() == 'true'
+
+ResultKey = Tuple[str, str, str, str, str]
+
+
+def content_hash(source) -> str:
+    """SHA-1 of a path, stream or werkzeug FileStorage (stream left at 0)"""
+    from utils.audio_io import sha1_stream
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as fp:
+            return sha1_stream(fp)[0]
+    return sha1_stream(getattr(source, 'stream', source))[0]
+
+
+def batch_digest(digests) -> str:
+    """One key for an ordered batch of uploads (their digests in order)"""
+    return hashlib.sha1('\n'.join(digests).encode('ascii')).hexdigest()
+
+
+def result_key(digest: str, analysis_type: str, model_version: str = '', lang: str = 'en',
+               **options) -> ResultKey:
+    """(content hash, analyzer, model version, language, options) - options
+    such as the speech delivery mode change the payload, so they are part of it"""
+    variant = ','.join(f'{name}={value}' for name, value in sorted(options.items()) if value is not None)
+    return (digest, analysis_type, model_version, (lang or 'en')[:2], variant)
+
+
+def analysis_key(source, analysis_type: str, lang: str = 'en', digest: Optional[str] = None,
+                 **options) -> ResultKey:
+    from utils.inference_backends import model_version
+    return result_key(digest or content_hash(source), analysis_type, model_version(analysis_type), lang, **options)
+
+
+class ResultCache:
+    """LRU of analysis results with per-entry expiry"""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[ResultKey, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+
+    def get(self, key: ResultKey) -> Optional[Any]:
+        """Copy of the stored result, or None (missing / expired)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._counters['expired'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+        return copy.deepcopy(value)  # callers may annotate / mutate their copy
+
+    def put(self, key: ResultKey, value: Any):
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def get_or_compute(self, key: ResultKey, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(result, cached) - `compute` only runs on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        value = compute()
+        self.put(key, value)
+        return value, False
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._counters, entries=len(self._entries),
+                        max_entries=self.max_entries, ttl_seconds=self.ttl_seconds)
+
+
+_default_cache: Optional[ResultCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ResultCache:
+    """Process-wide result cache (analyzers + upload routes)"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResultCache()
+    return _default_cache
@@ -0,0 +1,121 @@
+# utils/symptom_classifier.py
+"""
+Lexicon-driven symptom tagging for chat and symptom text.
+Keyword tables live in data/symptom_lexicon/<lang>.json
+({"tags": {tag: [keywords]}, "severity": {level: [keywords]}}) and every
+language is compiled into one trie-shaped regex, so a message is tagged and
+scored in a single pass whatever language it is written in. Keywords match
+at the start of a word, so stems catch inflections ("температур" → "температура").
+Latin-script tables set "word_end": true and list their inflections instead
+("cough", "coughing"): a stem from one of them would otherwise fire inside
+another language's words ("tosse" in "tossed"). Arabic clitics (و, ب, ال)
+attach to the front of the word, so ar.json gives a "prefix" regex allowed
+between the word start and the keyword; scripts written without spaces
+(zh, ja) set "word_start": false.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from utils.medical_translator import phrase_pattern
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+LEXICON_DIR = os.getenv('CUREVOX_LEXICON_DIR', os.path.join(BASE_DIR, '..', 'data', 'symptom_lexicon'))
+
+SEVERITY_ORDER = ('low', 'medium', 'high')
+
+
+class SymptomClassifier:
+    """Compiled multilingual symptom / severity keyword matcher"""
+
+    def __init__(self, lexicons: Dict[str, dict]):
+        self._labels: Dict[str, List[Tuple[str, str]]] = {}  # keyword → [(kind, label)]
+        self._languages: Dict[str, List[str]] = {}          # keyword → languages listing it
+        self._tag_order: Dict[str, int] = {}
+        # (word_start, prefix, word_end) → keywords matched that way
+        boundaries: Dict[Tuple[bool, str, bool], set] = {}
+        for lang, lexicon in sorted(lexicons.items()):
+            keywords = boundaries.setdefault(
+                (lexicon.get('word_start', True), lexicon.get('prefix', ''), lexicon.get('word_end', False)), set()
+            )
+            for kind in ('tags', 'severity'):
+                for label, words in lexicon.get(kind, {}).items():
+                    if kind == 'tags':
+                        self._tag_order.setdefault(label, len(self._tag_order))
+                    for word in words:
+                        word = word.casefold()
+                        labels = self._labels.setdefault(word, [])
+                        if (kind, label) not in labels:
+                            labels.append((kind, label))
+                        word_languages = self._languages.setdefault(word, [])
+                        if lang not in word_languages:
+                            word_languages.append(lang)
+                        keywords.add(word)
+
+        # One group per branch: the keyword, without any clitic prefix
+        branches = [
+            (r'(?<!\w)' if word_start else '') + (f'(?:{prefix})?' if prefix else '')
+            + '(' + phrase_pattern(keywords) + ')' + (r'(?!\w)' if word_end else '')
+            for (word_start, prefix, word_end), keywords in sorted(boundaries.items()) if keywords
+        ]
+        self._pattern = re.compile('|'.join(branches)) if branches else None
+        self.languages = sorted(lexicons)
+
+    @classmethod
+    def from_directory(cls, languages: Optional[Iterable[str]] = None,
+                       lexicon_dir: str = LEXICON_DIR) -> 'SymptomClassifier':
+        """Load <lang>.json for the requested languages (all tables if None)"""
+        if languages is None:
+            languages = [name[:-5] for name in os.listdir(lexicon_dir) if name.endswith('.json')]
+        lexicons = {}
+        for lang in languages:
+            path = os.path.join(lexicon_dir, f'{lang}.json')
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as fp:
+                    lexicons[lang] = json.load(fp)
+        logger.info(f"Symptom lexicons loaded: {sorted(lexicons)}")
+        return cls(lexicons)
+
+    def classify(self, text: str) -> Dict[str, Any]:
+        """{'tags', 'severity', 'score', 'languages', 'raw'} for one message"""
+        matches = self._pattern.finditer(text.casefold()) if self._pattern else ()
+        tags, severity_hits, languages = set(), {}, set()
+        for match in matches:
+            word = match.group(match.lastindex)
+            languages.update(self._languages[word])
+            for kind, label in self._labels[word]:
+                if kind == 'tags':
+                    tags.add(label)
+                else:
+                    severity_hits[label] = severity_hits.get(label, 0) + 1
+
+        severity = 'low'
+        for level in SEVERITY_ORDER:
+            if severity_hits.get(level):
+                severity = level
+        return {
+            'tags': sorted(tags, key=self._tag_order.get) or ['general'],
+            'severity': severity,
+            'score': sum(severity_hits.values()),
+            'languages': sorted(languages),
+            'raw': text[:400]
+        }
+
+
+_classifier: Optional[SymptomClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_symptom_classifier(languages: Optional[Iterable[str]] = None) -> SymptomClassifier:
+    """Process-wide classifier, built on first use"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = SymptomClassifier.from_directory(languages)
+    return _classifier
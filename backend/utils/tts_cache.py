@@ -0,0 +1,238 @@
+# utils/tts_cache.py
+"""
+Content-addressed cache for synthesised speech.
+Tier 1 is a per-process LRU bounded by bytes; tier 2 is a directory on
+disk shared by every gunicorn worker (atomic rename, so readers never see
+half-written clips). Keys are SHA-256 of (normalised text, lang, format).
+The disk store defaults to $CUREVOX_CACHE_DIR/tts ($TMPDIR/curevox/tts),
+outside the source tree, and is bounded by CUREVOX_TTS_CACHE_DISK_MB:
+every PRUNE_EVERY disk writes the least recently used clips (mtime, which
+disk hits refresh) are deleted until the store fits. A deferred job's
+.pending marker older than PENDING_TIMEOUT_S reads as FAILED: the worker
+that queued it was recycled or crashed.
+"""
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+CACHE_ROOT = os.getenv('CUREVOX_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'curevox'))
+DEFAULT_CACHE_DIR = os.getenv('CUREVOX_TTS_CACHE_DIR', os.path.join(CACHE_ROOT, 'tts'))
+DEFAULT_MEMORY_BYTES = int(os.getenv('CUREVOX_TTS_CACHE_MEMORY_MB', 32)) * 1024 * 1024
+DEFAULT_DISK_BYTES = int(float(os.getenv('CUREVOX_TTS_CACHE_DISK_MB', 512)) * 1024 * 1024)
+PRUNE_EVERY = 50  # disk writes between pruning passes
+PENDING_TIMEOUT_S = float(os.getenv('CUREVOX_SPEECH_PENDING_TIMEOUT_S', 120))
+
+_WHITESPACE = re.compile(r'\s+')
+_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# Deferred-synthesis job states, visible to every worker through the disk store
+READY, PENDING, FAILED, UNKNOWN = 'ready', 'pending', 'failed', 'unknown'
+
+
+def normalise_text(text: str) -> str:
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFC', text)).strip()
+
+
+def speech_key(text: str, lang: str, fmt: str = 'mp3') -> str:
+    payload = '\x1f'.join((normalise_text(text), lang.lower(), fmt.lower()))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def is_valid_key(key: str) -> bool:
+    return bool(_KEY_PATTERN.match(key or ''))
+
+
+class TTSCache:
+    """Memory LRU (byte budget) in front of a shared on-disk store"""
+
+    def __init__(self, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 memory_budget_bytes: int = DEFAULT_MEMORY_BYTES,
+                 disk_budget_bytes: Optional[int] = DEFAULT_DISK_BYTES):
+        self.cache_dir = os.path.abspath(cache_dir) if cache_dir else None
+        self.memory_budget_bytes = memory_budget_bytes
+        self.disk_budget_bytes = disk_budget_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0, 'disk_writes': 0,
+                          'disk_pruned': 0}
+
+    def _path(self, key: str, fmt: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f'{key}.{fmt}')
+
+    def path_for(self, key: str, fmt: str = 'mp3') -> Optional[str]:
+        """On-disk location of a cached clip, if it exists"""
+        if not self.cache_dir:
+            return None
+        path = self._path(key, fmt)
+        return path if os.path.exists(path) else None
+
+    def _remember(self, key: str, data: bytes):
+        """Insert into the LRU, evicting oldest entries past the budget (lock held)"""
+        if len(data) > self.memory_budget_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= len(previous)
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.memory_budget_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self._counters['evictions'] += 1
+
+    def get(self, key: str, fmt: str = 'mp3') -> Optional[bytes]:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._counters['memory_hits'] += 1
+                return data
+
+        path = self.path_for(key, fmt)
+        if path is None:
+            with self._lock:
+                self._counters['misses'] += 1
+            return None
+        with open(path, 'rb') as fp:
+            data = fp.read()
+        try:
+            os.utime(path)  # recently used: pruned last
+        except OSError:
+            pass
+        with self._lock:
+            self._counters['disk_hits'] += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes, fmt: str = 'mp3'):
+        with self._lock:
+            self._remember(key, data)
+        if not self.cache_dir:
+            return
+        path = self._path(key, fmt)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._clear_marker(key, PENDING)
+        self._clear_marker(key, FAILED)
+        with self._lock:
+            self._counters['disk_writes'] += 1
+            prune = self._counters['disk_writes'] % PRUNE_EVERY == 0
+        if prune:
+            self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """Delete least recently used clips until the store fits the disk
+        budget → number removed (job markers are left alone)"""
+        if not self.cache_dir or self.disk_budget_bytes is None:
+            return 0
+        clips, total = [], 0
+        for directory, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith(('.part', f'.{PENDING}', f'.{FAILED}')):
+                    continue
+                try:
+                    info = os.stat(os.path.join(directory, name))
+                except OSError:
+                    continue
+                clips.append((info.st_mtime, info.st_size, os.path.join(directory, name)))
+                total += info.st_size
+        removed = 0
+        for _, size, path in sorted(clips):
+            if total <= self.disk_budget_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        with self._lock:
+            self._counters['disk_pruned'] += removed
+        return removed
+
+    def get_or_create(self, text: str, lang: str, fmt: str, synthesize: Callable[[], bytes]) -> bytes:
+        """Cached clip for (text, lang, fmt); `synthesize` only runs on a miss"""
+        key = speech_key(text, lang, fmt)
+        data = self.get(key, fmt)
+        if data is None:
+            data = synthesize()
+            self.put(key, data, fmt)
+        return data
+
+    def _marker(self, key: str, state: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f'{key}.{state}')
+
+    def mark_pending(self, key: str):
+        if self.cache_dir:
+            os.makedirs(os.path.join(self.cache_dir, key[:2]), exist_ok=True)
+            open(self._marker(key, PENDING), 'w').close()
+            self._clear_marker(key, FAILED)
+
+    def mark_failed(self, key: str, message: str = ''):
+        if self.cache_dir:
+            os.makedirs(os.path.join(self.cache_dir, key[:2]), exist_ok=True)
+            with open(self._marker(key, FAILED), 'w') as fp:
+                fp.write(message)
+            self._clear_marker(key, PENDING)
+
+    def _clear_marker(self, key: str, state: str):
+        try:
+            os.remove(self._marker(key, state))
+        except OSError:
+            pass
+
+    def status(self, key: str, fmt: str = 'mp3') -> str:
+        """READY / PENDING / FAILED / UNKNOWN for a deferred clip"""
+        with self._lock:
+            if key in self._memory:
+                return READY
+        if not self.cache_dir:
+            return UNKNOWN
+        if os.path.exists(self._path(key, fmt)):
+            return READY
+        try:
+            pending_since = os.path.getmtime(self._marker(key, PENDING))
+        except OSError:
+            pending_since = None
+        if pending_since is not None:
+            if time.time() - pending_since <= PENDING_TIMEOUT_S:
+                return PENDING
+            # Nobody is going to finish this job; stop clients polling forever
+            self.mark_failed(key, f'synthesis still pending after {PENDING_TIMEOUT_S:g} s')
+            return FAILED
+        if os.path.exists(self._marker(key, FAILED)):
+            return FAILED
+        return UNKNOWN
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters, memory_entries=len(self._memory), memory_bytes=self._memory_bytes)
+
+
+_default_cache: Optional[TTSCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> TTSCache:
+    """Process-wide cache instance (shared by the TTS engine and /api/speech)"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = TTSCache()
+    return _default_cache
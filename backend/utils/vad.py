@@ -0,0 +1,80 @@
+# utils/vad.py
+"""
+Energy-based voice-activity trimming ahead of feature extraction.
+Phone recordings start with the tap on "record" and end with the tap on
+"stop"; the leading and trailing room noise is cropped at the source rate,
+so neither the resampler nor the mel transform ever sees it. Only the edges
+are trimmed - pauses inside the recording are part of the breathing
+pattern. Quiet recordings without a clear noise floor are left whole.
+"""
+import os
+from typing import NamedTuple, Tuple
+
+import numpy as np
+
+VAD_ENABLED = os.getenv('CUREVOX_VAD', 'true').lower() == 'true'
+VAD_FRAME_SECONDS = 0.02
+# Signal frames are this far above the noise floor (10th percentile frame energy)...
+VAD_THRESHOLD_DB = float(os.getenv('CUREVOX_VAD_THRESHOLD_DB', 10.0))
+# ...and the loudest frame is at least this far above the cut level
+VAD_MIN_RANGE_DB = float(os.getenv('CUREVOX_VAD_MIN_RANGE_DB', 20.0))
+# Kept either side of the first / last signal frame (onsets, decays)
+VAD_PAD_SECONDS = float(os.getenv('CUREVOX_VAD_PAD_SECONDS', 0.2))
+
+
+class TrimBounds(NamedTuple):
+    start: int        # first kept frame, at the source rate
+    end: int          # one past the last kept frame
+    total: int
+    sample_rate: int
+
+    @property
+    def start_seconds(self) -> float:
+        return self.start / self.sample_rate
+
+    @property
+    def removed_seconds(self) -> float:
+        return (self.total - (self.end - self.start)) / self.sample_rate
+
+
+def vad_config() -> str:
+    """Trim parameters, for feature-store config ids"""
+    if not VAD_ENABLED:
+        return 'off'
+    return f'{VAD_THRESHOLD_DB}/{VAD_MIN_RANGE_DB}/{VAD_PAD_SECONDS}'
+
+
+def frame_length(sample_rate: int) -> int:
+    return max(1, int(VAD_FRAME_SECONDS * sample_rate))
+
+
+def frame_energy_db(mono: np.ndarray, frame: int) -> np.ndarray:
+    """(samples,) float → mean-square energy in dB per non-overlapping frame"""
+    full = len(mono) // frame
+    energy = np.square(mono[:full * frame].reshape(full, frame), dtype=np.float32).mean(axis=1)
+    if len(mono) > full * frame:
+        energy = np.append(energy, np.square(mono[full * frame:], dtype=np.float32).mean())
+    return 10 * np.log10(energy + 1e-10)
+
+
+def active_bounds(energy_db: np.ndarray, frame: int, total: int, sample_rate: int) -> TrimBounds:
+    """Bounds from the first to the last frame above the noise gate"""
+    untrimmed = TrimBounds(0, total, total, sample_rate)
+    if not VAD_ENABLED or not energy_db.size:
+        return untrimmed
+    peak_db = energy_db.max()
+    gate_db = min(np.percentile(energy_db, 10) + VAD_THRESHOLD_DB, peak_db - VAD_MIN_RANGE_DB)
+    active = np.flatnonzero(energy_db > gate_db)
+    if not active.size:
+        return untrimmed
+    pad = int(VAD_PAD_SECONDS * sample_rate)
+    start = max(0, int(active[0]) * frame - pad)
+    end = min(total, (int(active[-1]) + 1) * frame + pad)
+    return TrimBounds(start, end, total, sample_rate)
+
+
+def trim_silence(mono: np.ndarray, sample_rate: int) -> Tuple[np.ndarray, TrimBounds]:
+    """(cropped view, bounds) of a float mono signal"""
+    frame = frame_length(sample_rate)
+    bounds = active_bounds(frame_energy_db(mono, frame), frame, len(mono), sample_rate)
+    return mono[bounds.start:bounds.end], bounds
@@ -0,0 +1,49 @@
+# utils/warm_up.py
+"""
+Tiny built-in samples for worker warm-up.
+A freshly forked worker pays for torch's lazy initialisation, filterbank
+and resampler construction and first-inference kernel selection on its
+first request. Running every analyzer once on these in-memory samples
+(1 s of room noise with a cough-like burst, a small skin-tone JPEG, a
+short symptom message) moves that cost to boot. The samples go through
+the same decoders as uploads, so the decode paths are warmed as well.
+"""
+import io
+import os
+import wave
+
+import numpy as np
+
+from utils.lazy_imports import lazy_import
+
+Image = lazy_import('PIL.Image')
+
+WARM_UP_ENABLED = os.getenv('CUREVOX_WORKER_WARM_UP', 'true').lower() == 'true'
+SAMPLE_SECONDS = 1.0
+SAMPLE_IMAGE_SIDE = 96
+SAMPLE_MESSAGE = 'I have had a dry cough and a mild fever since yesterday.'
+
+
+def sample_wav(sample_rate: int = 16000, seconds: float = SAMPLE_SECONDS) -> bytes:
+    """16-bit mono WAV: low room noise, one decaying broadband burst at 0.3 s"""
+    rng = np.random.default_rng(0)
+    y = rng.standard_normal(int(seconds * sample_rate)) * 0.002
+    start, length = int(0.3 * sample_rate), int(0.25 * sample_rate)
+    y[start:start + length] += 0.4 * rng.standard_normal(length) * np.exp(-np.arange(length) / (0.06 * sample_rate))
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.clip(y, -1, 1) * 32767).astype('<i2').tobytes())
+    return buffer.getvalue()
+
+
+def sample_jpeg(side: int = SAMPLE_IMAGE_SIDE) -> bytes:
+    """Skin-toned JPEG with a reddish patch"""
+    pixels = np.empty((side, side, 3), dtype=np.uint8)
+    pixels[...] = (224, 172, 140)
+    pixels[side // 4:side // 2, side // 4:side // 2] = (200, 90, 80)
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()